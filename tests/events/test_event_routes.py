@@ -67,3 +67,20 @@ class EventsRoutesTestCase(ApiDBTestCase):
         self.assertEqual(len(events), 6)
         events = self.get("/data/events/last?only_files=true")
         self.assertEqual(len(events), 2)
+
+    def test_get_events_since(self):
+        for name in ["test 1", "test 2", "test 3"]:
+            assets_service.create_asset(
+                self.project.id,
+                self.asset_type.id,
+                name,
+                "",
+                {}
+            )
+        result = self.get("/data/events/last?cursor=&page_size=2")
+        self.assertEqual(len(result["data"]), 2)
+        result = self.get(
+            "/data/events/last?cursor=%s" % result["next_cursor"]
+        )
+        self.assertEqual(len(result["data"]), 1)
+        self.get("/data/events/last?cursor=wrong", 400)
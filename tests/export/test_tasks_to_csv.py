@@ -1,8 +1,16 @@
+import gzip
+import io
+import zipfile
+
 from tests.base import ApiDBTestCase
 
 
 class TasksCsvExportTestCase(ApiDBTestCase):
 
+    expected_result = """Project;Department;Task Type;Entity Type;Entity;Assigner;Assignees;Duration;Estimation;Start date;Real start date;Due date;Task Status\r
+Cosmos Landromat;Modeling;Shaders;Props;Tree;Ema Peel;John Doe;50;40;2017-02-20;2017-02-22;2017-02-28;Open\r
+"""
+
     def setUp(self):
         super(TasksCsvExportTestCase, self).setUp()
 
@@ -21,7 +29,24 @@ class TasksCsvExportTestCase(ApiDBTestCase):
 
     def test_get_output_files(self):
         csv_tasks = self.get_raw("/export/csv/tasks.csv")
-        expected_result = """Project;Department;Task Type;Entity Type;Entity;Assigner;Assignees;Duration;Estimation;Start date;Real start date;Due date;Task Status\r
-Cosmos Landromat;Modeling;Shaders;Props;Tree;Ema Peel;John Doe;50;40;2017-02-20;2017-02-22;2017-02-28;Open\r
-"""
-        self.assertEqual(csv_tasks, expected_result)
+        self.assertEqual(csv_tasks, self.expected_result)
+
+    def test_get_compressed_output_files(self):
+        response = self.app.get(
+            "/export/csv/tasks.csv?gzip=true", headers=self.base_headers
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/gzip")
+        csv_tasks = gzip.decompress(response.data).decode("utf-8")
+        self.assertEqual(csv_tasks, self.expected_result)
+
+    def test_get_xlsx_output_files(self):
+        response = self.app.get(
+            "/export/csv/tasks.csv?format=xlsx", headers=self.base_headers
+        )
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(response.data))
+        sheet = archive.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        self.assertEqual(sheet.count("<row>"), 2)
+        self.assertTrue("Cosmos Landromat" in sheet)
+        self.assertTrue("<c><v>50</v></c>" in sheet)
@@ -30,3 +30,20 @@ class PaginationTestCase(ApiDBTestCase):
         self.assertEqual(pagination_infos["page"], 2)
         self.assertEqual(pagination_infos["offset"], 100)
         self.assertEqual(pagination_infos["limit"], 100)
+
+    def test_cursor_paginate(self):
+        result = self.get("data/persons?cursor=")
+        self.assertEqual(len(result["data"]), 100)
+        person_ids = [person["id"] for person in result["data"]]
+        while result["next_cursor"] is not None:
+            result = self.get("data/persons?cursor=%s" % result["next_cursor"])
+            person_ids += [person["id"] for person in result["data"]]
+        self.assertEqual(len(person_ids), 251)
+        self.assertEqual(len(set(person_ids)), 251)
+
+    def test_cursor_approximate_total(self):
+        result = self.get("data/persons?cursor=&approximate_total=true")
+        self.assertTrue("total" in result)
+
+    def test_wrong_cursor(self):
+        self.get("data/persons?cursor=wrong", 400)
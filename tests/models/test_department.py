@@ -15,6 +15,21 @@ class DepartmentTestCase(ApiDBTestCase):
         departments = self.get("data/departments")
         self.assertEqual(len(departments), 3)
 
+    def test_get_departments_streamed(self):
+        departments = self.get("data/departments?stream=true")
+        self.assertEqual(len(departments), 3)
+
+    def test_get_departments_streamed_wrong_filter(self):
+        path = "data/departments?id=wrong-id"
+        response = self.app.get(path, headers=self.base_headers)
+        streamed_response = self.app.get(
+            path + "&stream=true", headers=self.base_headers
+        )
+        self.assertNotEqual(streamed_response.status_code, 200)
+        self.assertEqual(
+            streamed_response.status_code, response.status_code
+        )
+
     def test_get_department(self):
         department = self.get_first("data/departments")
         department_again = self.get("data/departments/%s" % department["id"])
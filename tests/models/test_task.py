@@ -101,3 +101,16 @@ class TaskTestCase(ApiDBTestCase):
         self.assertEqual(task["project"]["name"], "Cosmos Landromat")
         self.assertEqual(task["entity"]["name"], "Tree")
         self.assertEqual(task["assigner"]["first_name"], "Ema")
+
+    def test_serialize(self):
+        task = self.tasks[0]
+        task_dict = task.serialize()
+        self.assertEqual(task_dict["id"], str(task.id))
+        self.assertEqual(task_dict["type"], "Task")
+        self.assertEqual(
+            task_dict["created_at"], fields.serialize_value(task.created_at)
+        )
+        self.assertTrue("assignees" not in task_dict)
+        task_dict = task.serialize(relations=True, ignores=["data"])
+        self.assertEqual(task_dict["assignees"], [str(self.person.id)])
+        self.assertTrue("data" not in task_dict)
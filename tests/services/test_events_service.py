@@ -1,11 +1,13 @@
 import time
 from tests.base import ApiDBTestCase
 
+from zou.app.models.event import ApiEvent
 from zou.app.utils import fields
 from zou.app.services import (
     events_service,
     assets_service
 )
+from zou.app.services.exception import WrongParameterException
 
 
 class EventsServiceTestCase(ApiDBTestCase):
@@ -50,6 +52,77 @@ class EventsServiceTestCase(ApiDBTestCase):
         events = events_service.get_last_events(before=date)
         self.assertEqual(len(events), 2)
 
+    def test_get_events_since(self):
+        for name in ["test 1", "test 2", "test 3"]:
+            assets_service.create_asset(
+                self.project.id,
+                self.asset_type.id,
+                name,
+                "",
+                {}
+            )
+        result = events_service.get_events_since(page_size=2)
+        self.assertEqual(len(result["data"]), 2)
+        cursor = result["next_cursor"]
+        result = events_service.get_events_since(cursor=cursor)
+        self.assertEqual(len(result["data"]), 1)
+        self.assertEqual(result["data"][0]["name"], "asset:new")
+        cursor = result["next_cursor"]
+        result = events_service.get_events_since(cursor=cursor)
+        self.assertEqual(len(result["data"]), 0)
+        self.assertEqual(result["next_cursor"], cursor)
+
+        assets_service.create_asset(
+            self.project.id,
+            self.asset_type.id,
+            "test 4",
+            "",
+            {}
+        )
+        result = events_service.get_events_since(cursor=cursor)
+        self.assertEqual(len(result["data"]), 1)
+
+    def test_get_events_since_transaction_order(self):
+        ApiEvent.create(name="asset:new")
+        ApiEvent.create(name="asset:update", transaction_id=1)
+        ApiEvent.create(name="asset:delete", transaction_id=2 ** 62)
+        result = events_service.get_events_since()
+        self.assertEqual(
+            [event["name"] for event in result["data"]],
+            ["asset:update", "asset:new"],
+        )
+        self.assertRaises(
+            WrongParameterException,
+            events_service.get_events_since,
+            cursor="wrong",
+        )
+
+    def test_check_event_partitions(self):
+        events_service.next_partition_check = 0
+        events_service.check_event_partitions()
+        self.assertGreater(
+            events_service.next_partition_check,
+            time.time() + events_service.EVENT_PARTITION_RETRY_INTERVAL,
+        )
+        self.assertEqual(events_service.create_event_partitions(), [])
+
+    def test_check_event_partitions_failure(self):
+        create_event_partitions = events_service.create_event_partitions
+
+        def fail():
+            raise Exception("Lock timeout")
+
+        events_service.next_partition_check = 0
+        events_service.create_event_partitions = fail
+        try:
+            events_service.check_event_partitions()
+        finally:
+            events_service.create_event_partitions = create_event_partitions
+        self.assertLess(
+            events_service.next_partition_check,
+            time.time() + events_service.EVENT_PARTITION_RETRY_INTERVAL + 1,
+        )
+
     def test_get_last_login_logs(self):
         self.generate_fixture_person()
         login_logs = events_service.get_last_login_logs()
@@ -34,6 +34,22 @@ class NamesServiceTestCase(ApiDBTestCase):
         self.assertEqual(asset_name, "Props / Tree")
         self.assertEqual(shot_name, "E01 / S01 / P01")
 
+    def test_get_full_entity_names(self):
+        names = names_service.get_full_entity_names(
+            [self.asset.id, self.shot.id]
+        )
+        self.assertEqual(len(names), 2)
+        self.assertEqual(
+            names[str(self.asset.id)],
+            names_service.get_full_entity_name(self.asset.id)
+        )
+        self.assertEqual(
+            names[str(self.shot.id)],
+            names_service.get_full_entity_name(self.shot.id)
+        )
+        self.assertEqual(names[str(self.shot.id)][0], "E01 / S01 / P01")
+        self.assertEqual(names_service.get_full_entity_names([]), {})
+
     def test_get_preview_file_name(self):
         preview_file = files_service.create_preview_file(
             "main",
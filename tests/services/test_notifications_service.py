@@ -1,5 +1,7 @@
 from tests.base import ApiDBTestCase
 
+from zou.app.models.comment import Comment
+from zou.app.models.news import News
 from zou.app.models.notification import Notification
 from zou.app.services import comments_service, notifications_service
 
@@ -76,6 +78,43 @@ class NotificationsServiceTestCase(ApiDBTestCase):
         notifications = Notification.get_all()
         self.assertEqual(len(notifications), 2)
 
+    def test_create_notifications(self):
+        self.generate_fixture_comment()
+        notification = {
+            "person_id": str(self.person.id),
+            "author_id": self.user["id"],
+            "comment_id": self.comment["id"],
+            "task_id": self.comment["object_id"],
+            "type": "comment",
+        }
+        notifications = notifications_service.create_notifications([
+            notification,
+            dict(notification, type="mention"),
+        ])
+        self.assertEqual(len(notifications), 2)
+        self.assertEqual(
+            set(n["notification_type"] for n in notifications),
+            {"comment", "mention"},
+        )
+        notifications = notifications_service.create_notifications([
+            notification
+        ])
+        self.assertEqual(len(notifications), 0)
+        self.assertEqual(len(Notification.get_all()), 2)
+
+    def test_manage_comment_subscriptions_job(self):
+        self.generate_fixture_comment()
+        self.comment["mentions"] = [str(self.person.id)]
+        comment = Comment.get(self.comment["id"])
+        comment.update({"mentions": [self.person]})
+        for _ in range(2):
+            comments_service.manage_comment_subscriptions_job(
+                self.task_dict["id"], self.comment["id"], False
+            )
+        notifications = Notification.get_all()
+        self.assertEqual(len(notifications), 2)
+        self.assertEqual(len(News.get_all()), 1)
+
     def test_create_assignation_notification(self):
         self.generate_fixture_comment()
         notifications_service.create_assignation_notification(
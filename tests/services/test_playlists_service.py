@@ -1,10 +1,14 @@
+import os
+
 from tests.base import ApiDBTestCase
 
+from zou.app import app
 from zou.app.models.playlist import Playlist
 from zou.app.services import (
     files_service,
     playlists_service
 )
+from zou.app.utils import fs, movie_utils
 
 
 class PlaylistsServiceTestCase(ApiDBTestCase):
@@ -151,3 +155,65 @@ class PlaylistsServiceTestCase(ApiDBTestCase):
         playlist_dict = playlists_service.build_playlist_dict(playlist)
         self.assertTrue("shots" not in playlist_dict)
         self.assertEqual(playlist_dict["for_entity"], "shot")
+
+    def test_get_playlist_movie_cache_file_path(self):
+        self.generate_fixture_preview_files()
+        preview_files = [
+            files_service.get_preview_file(preview_file["id"])
+            for preview_file in playlists_service.get_preview_files_for_task(
+                self.task.id
+            )
+        ]
+        path = playlists_service.get_playlist_movie_cache_file_path(
+            preview_files, 1920, 1080, "24.00"
+        )
+        same_path = playlists_service.get_playlist_movie_cache_file_path(
+            preview_files, 1920, 1080, "24.00"
+        )
+        reversed_path = playlists_service.get_playlist_movie_cache_file_path(
+            list(reversed(preview_files)), 1920, 1080, "24.00"
+        )
+        other_fps_path = playlists_service.get_playlist_movie_cache_file_path(
+            preview_files, 1920, 1080, "25.00"
+        )
+        self.assertEqual(path, same_path)
+        self.assertNotEqual(path, reversed_path)
+        self.assertNotEqual(path, other_fps_path)
+
+    def test_build_playlist_movie_cache_file(self):
+        build_playlist_movie = movie_utils.build_playlist_movie
+        tmp_folder = app.config["TMP_DIR"]
+        fs.mkdir_p(tmp_folder)
+        movie_file_path = os.path.join(
+            tmp_folder, "cache-playlist-movies-test.mp4"
+        )
+        built_file_paths = []
+
+        def build_movie_mock(success):
+            def build_movie(tmp_file_paths, file_path, *args):
+                built_file_paths.append(file_path)
+                with open(file_path, "w") as movie_file:
+                    movie_file.write("partial movie")
+                return {"success": success, "message": "error"}
+            return build_movie
+
+        try:
+            movie_utils.build_playlist_movie = build_movie_mock(False)
+            result = playlists_service.build_playlist_movie_cache_file(
+                [], movie_file_path, 1920, 1080, "24.00"
+            )
+            self.assertFalse(result["success"])
+            self.assertFalse(os.path.exists(movie_file_path))
+            self.assertFalse(os.path.exists(built_file_paths[0]))
+
+            movie_utils.build_playlist_movie = build_movie_mock(True)
+            result = playlists_service.build_playlist_movie_cache_file(
+                [], movie_file_path, 1920, 1080, "24.00"
+            )
+            self.assertTrue(result["success"])
+            self.assertTrue(os.path.exists(movie_file_path))
+            self.assertNotEqual(built_file_paths[1], movie_file_path)
+            self.assertFalse(os.path.exists(built_file_paths[1]))
+        finally:
+            movie_utils.build_playlist_movie = build_playlist_movie
+            fs.rm_file(movie_file_path)
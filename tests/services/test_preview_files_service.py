@@ -0,0 +1,47 @@
+import os
+
+from tests.base import ApiDBTestCase
+
+from zou.app import app
+from zou.app.services import files_service, preview_files_service
+from zou.app.utils import fs
+
+
+class PreviewFilesServiceTestCase(ApiDBTestCase):
+
+    def setUp(self):
+        super(PreviewFilesServiceTestCase, self).setUp()
+
+        self.generate_fixture_project_status()
+        self.generate_fixture_project()
+        self.generate_fixture_asset_type()
+        self.generate_fixture_asset()
+        self.generate_fixture_department()
+        self.generate_fixture_task_type()
+        self.generate_fixture_task_status()
+        self.generate_fixture_person()
+        self.generate_fixture_assigner()
+        self.generate_fixture_task()
+        self.generate_fixture_preview_file()
+        self.preview_file_id = str(self.preview_file.id)
+
+    def test_preview_file_status(self):
+        preview_file = files_service.get_preview_file(self.preview_file_id)
+        self.assertEqual(preview_file["status"], "ready")
+
+    def test_prepare_and_store_movie_job_failure(self):
+        tmp_folder = app.config["TMP_DIR"]
+        fs.mkdir_p(tmp_folder)
+        movie_path = os.path.join(
+            tmp_folder, "%s.mp4.tmp" % self.preview_file_id
+        )
+        with open(movie_path, "w") as movie_file:
+            movie_file.write("not a movie")
+
+        with self.assertRaises(Exception):
+            preview_files_service.prepare_and_store_movie_job(
+                self.preview_file_id, movie_path
+            )
+        preview_file = files_service.get_preview_file(self.preview_file_id)
+        self.assertEqual(preview_file["status"], "broken")
+        self.assertFalse(os.path.exists(movie_path))
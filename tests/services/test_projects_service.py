@@ -1,15 +1,25 @@
 from tests.base import ApiDBTestCase
 
+from zou.app.models.comment import Comment
 from zou.app.models.entity import Entity
+from zou.app.models.output_file import OutputFile
+from zou.app.models.playlist import Playlist
+from zou.app.models.preview_file import PreviewFile
 from zou.app.models.project import Project
+from zou.app.models.task import Task
+from zou.app.models.working_file import WorkingFile
 from zou.app.models.metadata_descriptor import MetadataDescriptor
 from zou.app.models.project_status import ProjectStatus
 from zou.app.services import (
     breakdown_service,
     deletion_service,
-    projects_service
+    projects_service,
+    tasks_service
+)
+from zou.app.services.exception import (
+    ProjectNotFoundException,
+    TaskNotFoundException
 )
-from zou.app.services.exception import ProjectNotFoundException
 
 
 class ProjectServiceTestCase(ApiDBTestCase):
@@ -241,9 +251,46 @@ class ProjectServiceTestCase(ApiDBTestCase):
             self.shot.id, self.asset.id
         )
 
+        self.task_id = self.task.id
+        self.task_status_id = self.task_status.id
+        self.generate_fixture_comment()
+        self.generate_fixture_preview_file()
+        self.generate_fixture_subscription()
+        self.generate_fixture_software()
+        self.generate_fixture_file_status()
+        self.generate_fixture_output_type()
+        self.generate_fixture_working_file()
+        self.generate_fixture_output_file()
+        self.generate_fixture_playlist("Playlist 1")
+        self.generate_fixture_build_job(None)
+        self.generate_fixture_metadata_descriptor()
+        projects_service.add_team_member(self.project.id, self.person.id)
+
         project_id = str(self.project.id)
-        deletion_service.remove_project(project_id)
+        task_id = str(self.task_id)
+        tasks_service.get_task(task_id)
+        steps = []
+        deletion_service.remove_project(
+            project_id,
+            progress=lambda project_id, step, count: steps.append(step)
+        )
         self.assertIsNone(Project.get(project_id))
+        self.assertIsNotNone(Project.get(self.project_closed.id))
+        for model in [
+            Comment,
+            Entity,
+            OutputFile,
+            Playlist,
+            PreviewFile,
+            Task,
+            WorkingFile,
+        ]:
+            self.assertEqual(model.query.count(), 0)
+        self.assertEqual(steps[-2], "project")
+        self.assertEqual(steps[-1], "stored files")
+        self.assertRaises(
+            TaskNotFoundException, tasks_service.get_task, task_id
+        )
 
     def test_is_tv_show(self):
         self.assertFalse(projects_service.is_tv_show(self.project.serialize()))
@@ -1,12 +1,16 @@
+import datetime
 import uuid
 import gazu
 
 from tests.base import ApiDBTestCase
 
 from zou.app.models.entity import Entity
+from zou.app.models.playlist import Playlist
+from zou.app.models.preview_file import PreviewFile
 from zou.app.models.project import Project
+from zou.app.models.task import Task
 from zou.app.services import sync_service
-from zou.app.utils import events
+from zou.app.utils import events, query
 
 
 class SyncServiceTestCase(ApiDBTestCase):
@@ -36,13 +40,30 @@ class SyncServiceTestCase(ApiDBTestCase):
                 "type": "Project"
             }
         gazu.client.fetch_one = fetch_one_mock
+        self.real_fetch_all = gazu.client.fetch_all
 
     def tearDown(self):
         gazu.client.fetch_one = self.real_fetch_one
+        gazu.client.fetch_all = self.real_fetch_all
 
     def handle_event(self, data={}):
         self.last_event_data = data
 
+    def test_get_preview_transfer_count(self):
+        self.generate_fixture_department()
+        self.generate_fixture_task_status()
+        self.generate_fixture_task_type()
+        self.generate_fixture_person()
+        self.generate_fixture_assigner()
+        self.task = self.generate_fixture_shot_task()
+        self.generate_fixture_preview_file(revision=1)
+        self.generate_fixture_preview_file(revision=2).update(
+            {"extension": "pdf"}
+        )
+        self.assertEqual(
+            sync_service.get_preview_transfer_count(PreviewFile.query), 5
+        )
+
     def test_sync_event(self):
         sync_service.sync_event({
             "name": "project:new",
@@ -91,3 +112,128 @@ class SyncServiceTestCase(ApiDBTestCase):
         events.register("task:update", "handle_event", self)
         sync_service.forward_base_event("task", "update", {"task_id": "test"})
         self.assertTrue("task_id" in self.last_event_data)
+
+    def test_sync_project_entries_resume(self):
+        project = {"id": str(self.project.id), "name": self.project.name}
+        fetched_paths = []
+        failing_pages = [3]
+
+        def fetch_all_mock(path):
+            fetched_paths.append(path)
+            page = int(path.split("page=")[1])
+            if page in failing_pages:
+                raise gazu.exception.ServerErrorException()
+            return {
+                "nb_pages": 3,
+                "data": [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "name": "Playlist %s-%s" % (page, index),
+                        "project_id": project["id"],
+                        "build_jobs": [],
+                        "type": "Playlist",
+                    }
+                    for index in range(2)
+                ]
+            }
+        gazu.client.fetch_all = fetch_all_mock
+
+        with self.assertRaises(gazu.exception.ServerErrorException):
+            sync_service.sync_project_entries(project, "playlists", Playlist)
+        self.assertEqual(len(Playlist.get_all()), 4)
+
+        failing_pages.clear()
+        fetched_paths.clear()
+        sync_service.sync_project_entries(project, "playlists", Playlist)
+        self.assertEqual(fetched_paths, [
+            "projects/%s/playlists/all?page=3" % project["id"]
+        ])
+        self.assertEqual(len(Playlist.get_all()), 6)
+
+        fetched_paths.clear()
+        sync_service.sync_project_entries(project, "playlists", Playlist)
+        self.assertEqual(fetched_paths, [])
+
+    def test_sync_project_entries_cursor_resume(self):
+        self.generate_fixture_department()
+        self.generate_fixture_task_type()
+        self.generate_fixture_task_status()
+        project = {"id": str(self.project.id), "name": self.project.name}
+        tasks = [
+            {
+                "id": str(uuid.uuid4()),
+                "name": "Task %s" % index,
+                "project_id": project["id"],
+                "task_type_id": str(self.task_type.id),
+                "task_status_id": str(self.task_status.id),
+                "entity_id": str(self.asset.id),
+                "assignees": [],
+                "type": "Task",
+            }
+            for index in range(3)
+        ]
+        cursors = [
+            query.encode_cursor(datetime.datetime.utcnow(), task["id"])
+            for task in tasks
+        ]
+        fetched_paths = []
+        failing_cursors = [cursors[1]]
+
+        def fetch_all_mock(path):
+            fetched_paths.append(path)
+            cursor = path.split("cursor=")[1]
+            if cursor in failing_cursors:
+                raise gazu.exception.ServerErrorException()
+            index = 0 if cursor == "" else cursors.index(cursor) + 1
+            return {
+                "data": tasks[index:index + 1],
+                "next_cursor": cursors[index] if index < 2 else None,
+            }
+        gazu.client.fetch_all = fetch_all_mock
+
+        with self.assertRaises(gazu.exception.ServerErrorException):
+            sync_service.sync_project_entries(project, "tasks", Task)
+        self.assertEqual(len(Task.get_all()), 2)
+
+        failing_cursors.clear()
+        fetched_paths.clear()
+        sync_service.sync_project_entries(project, "tasks", Task)
+        path_pattern = "projects/%s/tasks?cursor=%%s" % project["id"]
+        self.assertEqual(fetched_paths, [path_pattern % cursors[1]])
+        self.assertEqual(len(Task.get_all()), 3)
+
+    def test_sync_project_entries_without_cursor_support(self):
+        self.generate_fixture_department()
+        self.generate_fixture_task_type()
+        self.generate_fixture_task_status()
+        project = {"id": str(self.project.id), "name": self.project.name}
+        fetched_paths = []
+
+        def fetch_all_mock(path):
+            fetched_paths.append(path)
+            page = 1
+            if "page=" in path:
+                page = int(path.split("page=")[1])
+            return {
+                "nb_pages": 2,
+                "data": [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "name": "Task %s" % page,
+                        "project_id": project["id"],
+                        "task_type_id": str(self.task_type.id),
+                        "task_status_id": str(self.task_status.id),
+                        "entity_id": str(self.asset.id),
+                        "assignees": [],
+                        "type": "Task",
+                    }
+                ]
+            }
+        gazu.client.fetch_all = fetch_all_mock
+
+        sync_service.sync_project_entries(project, "tasks", Task)
+        self.assertEqual(fetched_paths, [
+            "projects/%s/tasks?cursor=" % project["id"],
+            "projects/%s/tasks?page=2" % project["id"],
+        ])
+        self.assertEqual(len(Task.get_all()), 2)
@@ -7,7 +7,12 @@ from zou.app.models.task import Task
 from zou.app.models.task_type import TaskType
 from zou.app.models.time_spent import TimeSpent
 from zou.app.models.preview_file import PreviewFile
-from zou.app.services import comments_service, deletion_service, tasks_service
+from zou.app.services import (
+    comments_service,
+    deletion_service,
+    projects_service,
+    tasks_service
+)
 from zou.app.utils import events, fields
 
 from zou.app.services.exception import TaskNotFoundException
@@ -114,6 +119,16 @@ class TaskServiceTestCase(ApiDBTestCase):
         self.assertEqual(task["task_type_id"], task_type["id"])
         self.assertEqual(task["project_id"], shot["project_id"])
         self.assertEqual(task["task_status_id"], status["id"])
+        self.assertEqual(task["retake_count"], 0)
+        self.assertEqual(tasks[1]["entity_id"], shot_2["id"])
+        self.assertEqual(tasks[1]["task_type_name"], task_type["name"])
+
+        shot_3 = self.generate_fixture_shot("S03").serialize()
+        tasks = tasks_service.create_tasks(
+            task_type, [shot, shot_2, shot_3, shot_3]
+        )
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(tasks[0]["entity_id"], shot_3["id"])
 
     def test_status_to_wip(self):
         events.register(
@@ -350,6 +365,28 @@ class TaskServiceTestCase(ApiDBTestCase):
         task = tasks_service.get_task_with_relations(task_id)
         self.assertEqual(len(task["assignees"]), 0)
 
+    def test_get_tasks_for_project_with_cursor(self):
+        result = tasks_service.get_tasks_for_project(
+            self.project.id, cursor="", approximate_total=True
+        )
+        self.assertEqual(len(result["data"]), 2)
+        self.assertIsNone(result["next_cursor"])
+        self.assertTrue("total" in result)
+
+    def test_get_tasks_with_relations(self):
+        self.shot_task.assignees = []
+        self.shot_task.save()
+        tasks = tasks_service.get_tasks_with_relations(
+            [self.task.id, self.shot_task.id]
+        )
+        self.assertEqual(len(tasks), 2)
+        task_map = {task["id"]: task for task in tasks}
+        self.assertEqual(
+            task_map[str(self.task.id)]["assignees"], [str(self.person.id)]
+        )
+        self.assertEqual(task_map[str(self.shot_task.id)]["assignees"], [])
+        self.assertEqual(tasks_service.get_tasks_with_relations([]), [])
+
     def test_get_tasks_for_person(self):
         projects = [self.project.serialize()]
         tasks = tasks_service.get_person_tasks(self.user["id"], projects)
@@ -482,6 +519,28 @@ class TaskServiceTestCase(ApiDBTestCase):
         )
         self.assertEqual(mentions[0], self.person)
 
+    def test_get_comment_mentions_team_change(self):
+        mentions = comments_service.get_comment_mentions(
+            self.task_id,
+            "Test @John Doe @Emma Doe"
+        )
+        self.assertEqual(len(mentions), 1)
+        john = self.person
+        emma = self.generate_fixture_person(
+            first_name="Emma",
+            desktop_login="emma.doe",
+            email="emma.doe@gmail.com"
+        )
+        projects_service.add_team_member(self.project.id, emma.id)
+        mentions = comments_service.get_comment_mentions(
+            self.task_id,
+            "Test @John Doe @Emma Doe"
+        )
+        self.assertEqual(
+            set(mention.id for mention in mentions),
+            {john.id, emma.id}
+        )
+
     def test_get_comments(self):
         self.generate_fixture_user_client()
         self.generate_fixture_comment()
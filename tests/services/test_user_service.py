@@ -1,6 +1,8 @@
 # -*- coding: UTF-8 -*-
 from tests.base import ApiDBTestCase
 
+from zou.app.models.comment import Comment
+from zou.app.models.notification import Notification
 from zou.app.models.person import Person
 from zou.app.services import (
     user_service,
@@ -103,3 +105,64 @@ class UserServiceTestCase(ApiDBTestCase):
             self.assertTrue(
                 user_service.check_entity_access(str(self.asset_id))
             )
+
+    def test_get_permission_context(self):
+        from zou.app import app
+        with app.app_context():
+            self.generate_fixture_user_vendor()
+            self.log_in_vendor()
+            person = self.get_current_user_raw()
+            context = user_service.get_permission_context()
+            self.assertEqual(context["person_id"], self.user["id"])
+            self.assertEqual(context["project_ids"], set())
+            self.assertFalse(user_service.check_belong_to_project(
+                self.project_id
+            ))
+
+            # Changes made without event are not seen during the request.
+            self.project.team.append(person)
+            self.project.save()
+            self.assertTrue(user_service.get_permission_context() is context)
+            self.assertFalse(user_service.check_belong_to_project(
+                self.project_id
+            ))
+
+            tasks_service.assign_task(self.task_id, str(person.id))
+            context = user_service.get_permission_context()
+            self.assertEqual(context["project_ids"], {str(self.project_id)})
+            self.assertEqual(
+                user_service.get_assigned_entity_ids(),
+                {str(self.task.entity_id)}
+            )
+            self.assertTrue(user_service.check_working_on_entity(
+                self.task.entity_id
+            ))
+
+    def test_get_last_notifications(self):
+        self.generate_fixture_preview_file()
+        comment = Comment.create(
+            object_id=self.task_id,
+            object_type="Task",
+            task_status_id=self.open_status_id,
+            person_id=self.person.id,
+            text="first comment",
+        )
+        comment.set_preview_files([self.preview_file.id])
+        comment.set_mentions([self.user["id"]])
+        Notification.create(
+            person_id=self.user["id"],
+            author_id=self.person.id,
+            comment_id=comment.id,
+            task_id=self.task_id,
+            type="comment",
+        )
+        notifications = user_service.get_last_notifications()
+        self.assertEqual(len(notifications), 1)
+        notification = notifications[0]
+        self.assertEqual(notification["full_entity_name"], "Props / Tree")
+        self.assertEqual(notification["comment_text"], "first comment")
+        self.assertEqual(
+            notification["preview_file_id"], str(self.preview_file.id)
+        )
+        self.assertEqual(len(notification["mentions"]), 1)
+        self.assertEqual(notification["mentions"], [self.user["id"]])
@@ -1,6 +1,12 @@
 from tests.base import ApiDBTestCase
 
-from zou.app.services import comments_service
+from zou.app.models.episode_stat import EpisodeStat
+from zou.app.models.task import Task
+from zou.app.services import (
+    comments_service,
+    deletion_service,
+    stats_service
+)
 
 
 class EpisodeStatsTestCase(ApiDBTestCase):
@@ -89,3 +95,60 @@ class EpisodeStatsTestCase(ApiDBTestCase):
             retake_stats[ep1_id][layout_id]["retake"]["frames"], 80)
         self.assertEqual(
             retake_stats[ep3_id][layout_id]["retake"]["count"], 8)
+
+    def test_episode_stat_table(self):
+        path = "/data/projects/%s/episodes/retake-stats" % self.project_id
+        retake_stats = self.get(path)
+        path = "/data/projects/%s/episodes/stats" % self.project_id
+        stats = self.get(path)
+
+        ep1_id = self.episode_ids["E01"]
+        rows = EpisodeStat.query.filter_by(episode_id=ep1_id).all()
+        self.assertEqual(sum(row.count for row in rows), 24)
+        self.assertEqual(sum(row.frames for row in rows), 240)
+
+        EpisodeStat.delete_all_by(project_id=self.project_id)
+        self.assertEqual(
+            stats_service.get_episode_stats_for_project(self.project_id), {}
+        )
+        stats_service.rebuild_project_stats(self.project_id)
+        self.assertEqual(self.get(path), stats)
+        path = "/data/projects/%s/episodes/retake-stats" % self.project_id
+        self.assertEqual(self.get(path), retake_stats)
+
+        task = Task.query.filter_by(project_id=self.project_id).first()
+        deletion_service.remove_task(task.id, force=True)
+        rows = EpisodeStat.query.filter_by(project_id=self.project_id).all()
+        self.assertEqual(sum(row.count for row in rows), 71)
+
+    def get_episode_stat_rows(self):
+        return sorted(
+            (
+                str(row.episode_id),
+                str(row.task_type_id),
+                str(row.task_status_id),
+                row.retake_count,
+                row.count,
+                row.frames,
+            )
+            for row in EpisodeStat.query.filter_by(
+                project_id=self.project_id
+            ).all()
+        )
+
+    def test_episode_stat_table_changes(self):
+        self.shot.update({"nb_frames": 25})
+        self.sequence.update({"parent_id": self.episode_ids["E01"]})
+        task = Task.query.filter_by(entity_id=self.shot.id).first()
+        task.update({"task_status_id": self.wip_id})
+        rows = self.get_episode_stat_rows()
+
+        ep1_rows = EpisodeStat.query.filter_by(
+            episode_id=self.episode_ids["E01"]
+        ).all()
+        self.assertEqual(sum(row.count for row in ep1_rows), 30)
+        self.assertEqual(sum(row.frames for row in ep1_rows), 330)
+        self.assertTrue(all(row[4] > 0 for row in rows))
+
+        stats_service.rebuild_project_stats(self.project_id)
+        self.assertEqual(self.get_episode_stat_rows(), rows)
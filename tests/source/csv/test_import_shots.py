@@ -1,3 +1,4 @@
+import json
 import os
 
 from tests.base import ApiDBTestCase
@@ -50,3 +51,20 @@ class ImportCsvShotsTestCase(ApiDBTestCase):
 
         shot = shots[0]
         self.assertEqual(shot["data"].get("contractor", None), "contractor 1")
+
+    def test_import_shots_with_errors(self):
+        path = "/import/csv/projects/%s/shots" % self.project.id
+        file_path_fixture = self.get_fixture_file_path(
+            os.path.join("csv", "shots_errors.csv")
+        )
+        result = json.loads(self.upload_file(path, file_path_fixture))
+        self.assertEqual(len(result), 3)
+        self.assertEqual(result[0]["nb_frames"], 100)
+        self.assertTrue(result[1]["error"])
+        self.assertEqual(result[1]["line_number"], 3)
+        self.assertEqual(result[2]["nb_frames"], 50)
+
+        shots = shots_service.get_shots()
+        self.assertEqual(len(shots), 2)
+        sequences = shots_service.get_sequences()
+        self.assertEqual(len(sequences), 2)
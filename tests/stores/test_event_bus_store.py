@@ -0,0 +1,128 @@
+import os
+import redis
+
+from tests.base import ApiDBTestCase
+
+from zou.app import config
+from zou.app.models.event import ApiEvent
+from zou.app.services import events_service
+from zou.app.stores import event_bus_store
+from zou.app.utils import events, fields
+
+
+class EventBusStoreTestCase(ApiDBTestCase):
+
+    def setUp(self):
+        super(EventBusStoreTestCase, self).setUp()
+        config.EVENT_BUS_ENABLED = True
+        self.store = event_bus_store
+        self.store.init()
+        self.store.clear()
+        self.store.init()
+        self.group = self.store.EVENT_LOG_GROUP
+
+    def tearDown(self):
+        self.store.clear()
+        self.store.event_bus = None
+        config.EVENT_BUS_ENABLED = False
+        super(EventBusStoreTestCase, self).tearDown()
+
+    def test_emit(self):
+        events.emit("asset:new", {"asset_id": "asset-1"})
+        events.emit_many(
+            "asset:update",
+            [{"asset_id": "asset-1"}, {"asset_id": "asset-2"}],
+            persist=False,
+        )
+        self.assertEqual(len(ApiEvent.get_all()), 0)
+
+        nb_events = self.store.consume_batch(
+            self.group, "consumer-1", events_service.store_events
+        )
+        self.assertEqual(nb_events, 3)
+        api_events = ApiEvent.get_all()
+        self.assertEqual(len(api_events), 1)
+        self.assertEqual(api_events[0].name, "asset:new")
+        self.assertEqual(api_events[0].data, {"asset_id": "asset-1"})
+
+    def test_emit_without_bus(self):
+        publish = self.store.publish
+
+        def fail(events):
+            raise redis.ConnectionError("Event bus is down")
+
+        self.store.publish = fail
+        try:
+            events.emit("asset:new", {"asset_id": "asset-1"})
+            events.emit_many("asset:update", [{"asset_id": "asset-1"}])
+        finally:
+            self.store.publish = publish
+        api_events = ApiEvent.get_all()
+        self.assertEqual(len(api_events), 2)
+
+    def test_consumer_name(self):
+        self.assertEqual(
+            self.store.get_consumer_name(),
+            "%s-%s" % (config.EVENT_BUS_CONSUMER, os.getpid()),
+        )
+
+    def test_replay(self):
+        events.emit("asset:new", {"asset_id": "asset-1"})
+        events.emit("asset:new", {"asset_id": "asset-2"})
+
+        def fail(events):
+            raise Exception("Handling failed")
+
+        with self.assertRaises(Exception):
+            self.store.consume_batch(self.group, "consumer-1", fail)
+        self.assertEqual(len(ApiEvent.get_all()), 0)
+
+        nb_events = self.store.consume_batch(
+            self.group, "consumer-2", events_service.store_events
+        )
+        self.assertEqual(nb_events, 0)
+        nb_events = self.store.consume_batch(
+            self.group, "consumer-2", events_service.store_events,
+            min_idle_time=0,
+        )
+        self.assertEqual(nb_events, 2)
+        self.assertEqual(len(ApiEvent.get_all()), 2)
+        nb_events = self.store.consume_batch(
+            self.group, "consumer-1", events_service.store_events
+        )
+        self.assertEqual(nb_events, 0)
+
+    def test_dead_letter(self):
+        events.emit("asset:new", {"asset_id": "asset-1"})
+        events.emit(
+            "asset:new",
+            {"asset_id": "asset-2"},
+            project_id=str(fields.gen_uuid()),
+        )
+        events.emit("asset:new", {"asset_id": "asset-3"})
+
+        nb_events = self.store.consume_batch(
+            self.group, "consumer-1", events_service.store_events,
+            max_attempts=2,
+        )
+        self.assertEqual(nb_events, 3)
+        self.assertEqual(len(ApiEvent.get_all()), 2)
+
+        nb_events = self.store.consume_batch(
+            self.group, "consumer-1", events_service.store_events,
+            max_attempts=2,
+        )
+        self.assertEqual(nb_events, 1)
+        self.assertEqual(len(ApiEvent.get_all()), 2)
+        dead_entries = self.store.event_bus.xrange(
+            self.store.DEAD_LETTER_STREAM_NAME % self.group
+        )
+        self.assertEqual(len(dead_entries), 1)
+        event = self.store.parse_entry(dead_entries[0][1])
+        self.assertEqual(event["data"]["asset_id"], "asset-2")
+
+        nb_events = self.store.consume_batch(
+            self.group, "consumer-1", events_service.store_events,
+            max_attempts=2,
+        )
+        self.assertEqual(nb_events, 0)
@@ -49,3 +49,21 @@ class FileStoreTestCase(unittest.TestCase):
         file_name = "thumbnails-63e453f1-9655-49ad-acba-ff7f27c49e9d"
         result_path = file_store.path(file_store.pictures, file_name)
         self.assertTrue(os.path.exists(result_path))
+
+    def test_open_picture_range(self):
+        file_path_fixture = self.get_fixture_file_path("thumbnails/th01.png")
+        instance_id = "63e453f1-9655-49ad-acba-ff7f27c49e9d"
+        file_store.add_picture("thumbnails", instance_id, file_path_fixture)
+        with open(file_path_fixture, "rb") as fixture_file:
+            content = fixture_file.read()
+
+        self.assertEqual(
+            file_store.get_picture_size("thumbnails", instance_id),
+            len(content)
+        )
+        chunks = file_store.open_picture("thumbnails", instance_id)
+        self.assertEqual(b"".join(chunks), content)
+        chunks = file_store.open_picture("thumbnails", instance_id, 10, 19)
+        self.assertEqual(b"".join(chunks), content[10:20])
+        chunks = file_store.open_picture("thumbnails", instance_id, 10)
+        self.assertEqual(b"".join(chunks), content[10:])
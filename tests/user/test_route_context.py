@@ -3,7 +3,8 @@ from tests.base import ApiDBTestCase
 from zou.app.services import (
     tasks_service,
     notifications_service,
-    projects_service
+    projects_service,
+    shots_service
 )
 
 from zou.app.models.project import Project
@@ -449,6 +450,48 @@ class UserContextRoutesTestCase(ApiDBTestCase):
         self.assertEqual(len(context["search_filters"]), 0)
         self.assertEqual(len(context["custom_actions"]), 0)
 
+    def test_get_context_etag(self):
+        path = "/data/user/context"
+        response = self.app.get(path, headers=self.base_headers)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+
+        headers = dict(self.base_headers)
+        headers["If-None-Match"] = etag
+        response = self.app.get(path, headers=headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+
+        self.post("data/user/filters", {
+            "list_type": "asset",
+            "name": "props",
+            "query": "props",
+            "project_id": str(self.project.id)
+        })
+        response = self.app.get(path, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_get_context_etag_project_data(self):
+        path = "/data/user/context"
+        self.project.update({"production_type": "tvshow"})
+        response = self.app.get(path, headers=self.base_headers)
+        etag = response.headers["ETag"]
+
+        projects_service.add_metadata_descriptor(
+            self.project_id, "asset", "contractor", [], False
+        )
+        response = self.app.get(path, headers=self.base_headers)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+        episode = shots_service.create_episode(str(self.project_id), "A01")
+        context = self.get(path)
+        project = [
+            project for project in context["projects"]
+            if project["id"] == str(self.project_id)
+        ][0]
+        self.assertEqual(project["first_episode_id"], episode["id"])
+
     def test_get_metadata_columns(self):
         projects_service.add_metadata_descriptor(
             self.project_id,
@@ -28,3 +28,48 @@ class CacheTestCase(unittest.TestCase):
 
         self.assertEqual(result, result2)
         self.assertNotEqual(result, result3)
+
+    def test_memoize_with_tags(self):
+        @cache.memoize_function(50, tags=lambda result: ["task:%s" % result])
+        def memoized_function3(parameter):
+            self.called = self.called + 1
+            return parameter
+
+        memoized_function3("task-1")
+        memoized_function3("task-1")
+        self.assertEqual(self.called, 1)
+        cache.invalidate_tags("task:task-2")
+        memoized_function3("task-1")
+        self.assertEqual(self.called, 1)
+        cache.invalidate_tags(cache.get_model_tag("task", "task-1"))
+        memoized_function3("task-1")
+        self.assertEqual(self.called, 2)
+
+    def test_memoize_with_tags_during_invalidation(self):
+        @cache.memoize_function(50, tags=["task:task-4"])
+        def memoized_function4(parameter):
+            self.called = self.called + 1
+            if self.called == 1:
+                # A write happens while the result is computed.
+                cache.invalidate_tags("task:task-4")
+            return parameter
+
+        memoized_function4("task-4")
+        self.assertEqual(self.called, 2)
+        memoized_function4("task-4")
+        self.assertEqual(self.called, 2)
+
+    def test_tag_versions_expire(self):
+        timeouts = []
+        add = cache.cache.add
+
+        def add_spy(key, value, timeout=None):
+            timeouts.append(timeout)
+            return add(key, value, timeout=timeout)
+
+        cache.cache.add = add_spy
+        try:
+            cache.get_tag_versions(["task:task-3"], create=True)
+        finally:
+            cache.cache.add = add
+        self.assertEqual(timeouts, [cache.TAG_VERSION_TIMEOUT])
@@ -0,0 +1,29 @@
+import time
+import unittest
+
+from zou.app.utils.cache_backends import LocalLRUCache
+
+
+class LocalLRUCacheTestCase(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        local_cache = LocalLRUCache(2)
+        local_cache.set("a", 1, 60)
+        local_cache.set("b", 2, 60)
+        local_cache.get("a")
+        local_cache.set("c", 3, 60)
+        self.assertEqual(local_cache.get("a"), 1)
+        self.assertIsNone(local_cache.get("b"))
+        self.assertEqual(local_cache.get("c"), 3)
+
+    def test_expiration(self):
+        local_cache = LocalLRUCache(2)
+        local_cache.set("a", 1, 0.01)
+        time.sleep(0.02)
+        self.assertIsNone(local_cache.get("a"))
+
+    def test_delete(self):
+        local_cache = LocalLRUCache(2)
+        local_cache.set("a", 1, 60)
+        local_cache.delete("a", "b")
+        self.assertIsNone(local_cache.get("a"))
@@ -55,3 +55,21 @@ class EventsTestCase(ApiDBTestCase):
         event_models = events_service.get_last_events()
         self.assertEqual(len(event_models), 4)
         self.assertEqual(event_models[0]["name"], "task:new")
+
+    def test_emit_many(self):
+        self.generate_fixture_project_status()
+        project_id = str(self.generate_fixture_project().id)
+        events.emit_many(
+            "task:new",
+            [{"task_id": "task-1"}, {"task_id": "task-2"}],
+            project_id=project_id
+        )
+        event_models = events_service.get_last_events(project_id=project_id)
+        self.assertEqual(len(event_models), 2)
+        self.assertEqual(
+            set(event["data"]["task_id"] for event in event_models),
+            {"task-1", "task-2"}
+        )
+        self.assertEqual(event_models[0]["data"]["project_id"], project_id)
+        events.emit_many("task:new", [{"task_id": "task-3"}], persist=False)
+        self.assertEqual(len(events_service.get_last_events()), 2)
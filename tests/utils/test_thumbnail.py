@@ -141,3 +141,22 @@ class ThumbnailTestCase(unittest.TestCase):
         )
         self.assertTrue(os.path.exists(file_path))
         self.assertTrue(Image.open(file_path).size, thumbnail.SQUARE_SIZE)
+
+    def test_generate_preview_variants_sizes(self):
+        preview_id = "123413-12313"
+        file_path_fixture = self.get_fixture_file_path("thumbnails/th01.png")
+        file_name = thumbnail.get_file_name(preview_id)
+        original_path = os.path.join(TEST_FOLDER, file_name)
+        fs.copyfile(file_path_fixture, original_path)
+        variants = thumbnail.generate_preview_variants(
+            original_path,
+            preview_id
+        )
+        sizes = {
+            picture_type: Image.open(path).size
+            for (picture_type, path) in variants
+        }
+        self.assertEqual(sizes["previews"], (1200, 674))
+        self.assertEqual(sizes["thumbnails"], thumbnail.RECTANGLE_SIZE)
+        self.assertEqual(sizes["thumbnails-square"], thumbnail.SQUARE_SIZE)
+        self.assertTrue(os.path.exists(original_path))
@@ -0,0 +1,57 @@
+import unittest
+
+from zou.app.utils import transfers
+
+
+class TransfersTestCase(unittest.TestCase):
+
+    def setUp(self):
+        super(TransfersTestCase, self).setUp()
+        self.attempts = {}
+
+    def get_transfer(self, name, failures=0, is_done=None):
+        def run():
+            self.attempts[name] = self.attempts.get(name, 0) + 1
+            if self.attempts[name] <= failures:
+                raise IOError("Transfer failed")
+            return 10
+
+        return transfers.Transfer(name, run, is_done)
+
+    def test_run_transfers(self):
+        summary = transfers.run_transfers(
+            [self.get_transfer("file-%s" % i) for i in range(20)],
+            workers=3,
+            total=20,
+        )
+        self.assertEqual(summary["total"], 20)
+        self.assertEqual(summary["transferred"], 20)
+        self.assertEqual(summary["size"], 200)
+        self.assertEqual(len(self.attempts), 20)
+
+    def test_run_transfers_skip(self):
+        summary = transfers.run_transfers(
+            [
+                self.get_transfer("file-1", is_done=lambda: True),
+                self.get_transfer("file-2", is_done=lambda: False),
+            ],
+            workers=2,
+        )
+        self.assertEqual(summary["skipped"], 1)
+        self.assertEqual(summary["transferred"], 1)
+        self.assertEqual(list(self.attempts.keys()), ["file-2"])
+
+    def test_run_transfers_retry(self):
+        summary = transfers.run_transfers(
+            [
+                self.get_transfer("file-1", failures=2),
+                self.get_transfer("file-2", failures=5),
+            ],
+            workers=2,
+            retries=2,
+            backoff=0,
+        )
+        self.assertEqual(summary["transferred"], 1)
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(self.attempts["file-1"], 3)
+        self.assertEqual(self.attempts["file-2"], 3)
@@ -1,12 +1,13 @@
 import os
 import datetime
+import json
 import unittest
 import uuid
 
 from babel import Locale
 from pytz import timezone
 
-from zou.app.utils import colors, fields, query, fs
+from zou.app.utils import colors, fields, query, fs, movie_utils, streaming
 from zou.app.models.person import Person
 from zou.app.models.task import Task
 
@@ -104,3 +105,123 @@ class UtilsTestCase(unittest.TestCase):
         self.assertTrue(os.path.exists(folder))
         fs.rm_rf("one")
         self.assertTrue(not os.path.exists(folder))
+
+    def test_get_file_path_cache(self):
+        class Config(object):
+            FS_BACKEND = "s3"
+            TMP_DIR = "cache-test"
+
+        def open_file(prefix, instance_id):
+            return [b"12345", b"6"]
+
+        fs.mkdir_p(Config.TMP_DIR)
+        file_path_1 = fs.get_file_path(
+            Config, None, open_file, "previews", "id-1", "mp4"
+        )
+        with open(file_path_1, "rb") as cache_file:
+            self.assertEqual(cache_file.read(), b"123456")
+        file_path_2 = fs.get_file_path(
+            Config, None, open_file, "previews", "id-2", "mp4"
+        )
+        self.assertTrue(os.path.exists(file_path_1))
+        self.assertTrue(os.path.exists(file_path_2))
+        fs.rm_rf(Config.TMP_DIR)
+
+    def test_evict_cache_files(self):
+        folder = "cache-test"
+        fs.mkdir_p(folder)
+        file_paths = []
+        for name in [
+            "cache-previews-id-1.mp4",
+            "cache-previews-id-2.mp4",
+            "cache-previews-id-3.mp4",
+            "cache-playlist-movies-id.part.mp4",
+        ]:
+            file_path = os.path.join(folder, name)
+            with open(file_path, "wb") as cache_file:
+                cache_file.write(b"123456")
+            file_paths.append(file_path)
+        os.utime(file_paths[0], (0, 0))
+        os.utime(file_paths[1], (1, 1))
+        os.utime(file_paths[3], (0, 0))
+
+        removed_files = fs.evict_cache_files(folder, 10, grace_period=3600)
+        self.assertEqual(removed_files, file_paths[:2])
+        self.assertEqual(
+            sorted(os.listdir(folder)),
+            [
+                "cache-playlist-movies-id.part.mp4",
+                "cache-previews-id-3.mp4",
+            ],
+        )
+        fs.rm_rf(folder)
+
+    def test_iter_chunks(self):
+        chunks = list(streaming.iter_chunks(range(5), 2))
+        self.assertEqual(chunks, [[0, 1], [2, 3], [4]])
+
+    def test_iter_json_array(self):
+        elements = [{"name": "Shot %s" % i} for i in range(5)]
+        result = "".join(streaming.iter_json_array(iter(elements), 2))
+        self.assertEqual(json.loads(result), elements)
+        result = "".join(streaming.iter_json_array(iter([]), 2))
+        self.assertEqual(json.loads(result), [])
+
+    def test_prefetch_first(self):
+        def generate_elements():
+            raise ValueError("Malformed filter")
+            yield 1
+
+        elements = generate_elements()
+        self.assertRaises(ValueError, streaming.prefetch_first, elements)
+        elements = streaming.prefetch_first(iter([1, 2, 3]))
+        self.assertEqual(list(elements), [1, 2, 3])
+        self.assertEqual(list(streaming.prefetch_first(iter([]))), [])
+
+    def test_can_concat_with_stream_copy(self):
+        movie_info = {
+            "video_codec": "h264",
+            "width": 1920,
+            "height": 1080,
+            "fps": 24.0,
+            "pix_fmt": "yuv420p",
+            "video_profile": "High",
+            "time_base": "1/12288",
+            "audio_codec": "aac",
+            "audio_profile": "LC",
+            "sample_rate": "44100",
+            "channels": 2,
+        }
+        movie_infos = [movie_info, dict(movie_info)]
+        self.assertTrue(movie_utils.can_concat_with_stream_copy(
+            movie_infos, 1920, 1080, "24.00"
+        ))
+        self.assertTrue(movie_utils.can_concat_with_stream_copy(
+            movie_infos, None, 1080, "24.00"
+        ))
+        self.assertFalse(movie_utils.can_concat_with_stream_copy(
+            movie_infos, 1280, 720, "24.00"
+        ))
+        self.assertFalse(movie_utils.can_concat_with_stream_copy(
+            movie_infos, 1920, 1080, "25.00"
+        ))
+        movie_infos[1]["audio_codec"] = None
+        self.assertFalse(movie_utils.can_concat_with_stream_copy(
+            movie_infos, 1920, 1080, "24.00"
+        ))
+        for (field, value) in [
+            ("pix_fmt", "yuv444p"),
+            ("video_profile", "Main"),
+            ("time_base", "1/24000"),
+        ]:
+            movie_infos[1] = dict(movie_info, **{field: value})
+            self.assertFalse(movie_utils.can_concat_with_stream_copy(
+                movie_infos, 1920, 1080, "24.00"
+            ))
+        movie_infos = [
+            dict(movie_info, pix_fmt=None),
+            dict(movie_info, pix_fmt=None),
+        ]
+        self.assertFalse(movie_utils.can_concat_with_stream_copy(
+            movie_infos, 1920, 1080, "24.00"
+        ))
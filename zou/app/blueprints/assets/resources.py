@@ -2,7 +2,7 @@ from flask import request
 from flask_restful import Resource, reqparse
 from flask_jwt_extended import jwt_required
 
-from zou.app.utils import permissions, query
+from zou.app.utils import permissions, query, streaming
 from zou.app.mixin import ArgsMixin
 from zou.app.services import (
     assets_service,
@@ -81,6 +81,10 @@ class AssetsAndTasksResource(Resource):
         user_service.check_project_access(criterions.get("project_id", None))
         if permissions.has_vendor_permissions():
             criterions["assigned_to"] = persons_service.get_current_user()["id"]
+        if streaming.is_stream_requested(request):
+            return streaming.build_json_stream_response(
+                assets_service.iter_assets_and_tasks(criterions)
+            )
         return assets_service.get_assets_and_tasks(criterions, page)
 
 
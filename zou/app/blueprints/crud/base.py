@@ -8,12 +8,26 @@ from flask_jwt_extended import jwt_required
 
 from sqlalchemy.exc import IntegrityError, StatementError
 
-from zou.app.utils import events, fields, permissions
+from zou.app.utils import (
+    events,
+    fields,
+    permissions,
+    query as query_utils,
+    streaming
+)
 from zou.app.services.exception import (
     ArgumentsException, WrongParameterException
 )
 
 
+NON_FILTER_PARAMETERS = [
+    "approximate_total",
+    "cursor",
+    "page",
+    "relations",
+    "stream",
+]
+
 
 class EntityEventMixin(object):
     def make_changes_dict(self, old, new):
@@ -52,11 +66,29 @@ class BaseModelsResource(Resource, EntityEventMixin):
         Resource.__init__(self)
         self.model = model
 
+    def serialize_entries(self, entries, relations=False):
+        return self.model.serialize_list(entries, relations=relations)
+
     def all_entries(self, query=None, relations=False):
         if query is None:
             query = self.model.query
 
-        return self.model.serialize_list(query.all(), relations=relations)
+        return self.serialize_entries(query.all(), relations=relations)
+
+    def stream_entries(self, query, relations=False):
+        """
+        Send entries as a JSON array while they are read from the database
+        through a server-side cursor. Memory usage doesn't depend on the
+        number of entries.
+        """
+        def generate_entries():
+            for entries in streaming.iter_query_chunks(query):
+                for entry in self.serialize_entries(
+                    entries, relations=relations
+                ):
+                    yield entry
+
+        return streaming.build_json_stream_response(generate_entries())
 
     def paginated_entries(self, query, page, relations=False):
         total = query.count()
@@ -88,6 +120,21 @@ class BaseModelsResource(Resource, EntityEventMixin):
             }
         return result
 
+    def cursor_paginated_entries(
+        self, query, cursor, relations=False, approximate_total=False
+    ):
+        (entries, next_cursor) = query_utils.get_cursor_page(
+            query, self.model, cursor
+        )
+        result = {
+            "data": self.serialize_entries(entries, relations=relations),
+            "limit": current_app.config["NB_RECORDS_PER_PAGE"],
+            "next_cursor": next_cursor,
+        }
+        if approximate_total:
+            result["total"] = query_utils.get_approximate_count(query)
+        return result
+
     def build_filters(self, options):
         many_join_filter = []
         in_filter = []
@@ -96,7 +143,7 @@ class BaseModelsResource(Resource, EntityEventMixin):
 
         column_names = [column.name for column in self.model.__table__.columns]
         for key, value in options.items():
-            if key not in ["page", "relations"] and key in column_names:
+            if key not in NON_FILTER_PARAMETERS and key in column_names:
                 field_key = getattr(self.model, key)
                 expr = field_key.property
 
@@ -179,6 +226,17 @@ class BaseModelsResource(Resource, EntityEventMixin):
                     return self.paginated_entries(
                         query, page, relations=relations
                     )
+                elif "cursor" in options:
+                    return self.cursor_paginated_entries(
+                        query,
+                        options["cursor"],
+                        relations=relations,
+                        approximate_total=options.get(
+                            "approximate_total", "false"
+                        ) == "true",
+                    )
+                elif streaming.is_stream_requested(request):
+                    return self.stream_entries(query, relations=relations)
                 else:
                     return self.all_entries(query, relations=relations)
         except StatementError as exception:
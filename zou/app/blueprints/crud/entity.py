@@ -44,9 +44,9 @@ class EntitiesResource(BaseModelsResource, EntityEventMixin):
     def check_create_permissions(self, entity):
         user_service.check_manager_project_access(entity["project_id"])
 
-    def all_entries(self, query=None, relations=False):
-        entities = BaseModelsResource.all_entries(
-            self, query=query, relations=relations
+    def serialize_entries(self, entries, relations=False):
+        entities = BaseModelsResource.serialize_entries(
+            self, entries, relations=relations
         )
         for entity in entities:
             entity["type"] = shots_service.get_base_entity_type_name(entity)
@@ -14,17 +14,14 @@ class PersonsResource(BaseModelsResource):
     def __init__(self):
         BaseModelsResource.__init__(self, Person)
 
-    def all_entries(self, query=None, relations=False):
-        if query is None:
-            query = self.model.query
-
+    def serialize_entries(self, entries, relations=False):
         if permissions.has_manager_permissions():
             if request.args.get("with_pass_hash") == "true":
-                return [person.serialize() for person in query.all()]
+                return [person.serialize() for person in entries]
             else:
-                return [person.serialize_safe() for person in query.all()]
+                return [person.serialize_safe() for person in entries]
         else:
-            return [person.present_minimal() for person in query.all()]
+            return [person.present_minimal() for person in entries]
 
     def post(self):
         abort(405)
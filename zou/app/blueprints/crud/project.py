@@ -1,6 +1,7 @@
 from flask_jwt_extended import jwt_required
 from flask_restful import reqparse
 
+from zou.app import config
 from zou.app.models.project import Project
 from zou.app.models.project_status import ProjectStatus
 from zou.app.services import (
@@ -13,6 +14,8 @@ from zou.app.utils import permissions, fields
 
 from .base import BaseModelResource, BaseModelsResource
 
+import event_handlers
+
 
 class ProjectsResource(BaseModelsResource):
     def __init__(self):
@@ -87,7 +90,10 @@ class ProjectResource(BaseModelResource):
             }, 400
         else:
             self.check_delete_permissions(project_dict)
-            if args["force"] == True:
+            if args["force"] == True and config.ENABLE_JOB_QUEUE:
+                event_handlers.remove_project_task.delay(instance_id)
+                return "", 202
+            elif args["force"] == True:
                 deletion_service.remove_project(instance_id)
             else:
                 project.delete()
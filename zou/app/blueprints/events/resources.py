@@ -17,6 +17,7 @@ class EventsResource(Resource, ArgsMixin):
             ("only_files", False, False),
             ("page_size", 100, False),
             ("project_id", None, False),
+            ("cursor", None, False),
         ])
         permissions.check_manager_permissions()
         before = None
@@ -57,6 +58,14 @@ class EventsResource(Resource, ArgsMixin):
             raise WrongParameterException(
                 "The project_id parameter is not a valid id"
             )
+        elif args["cursor"] is not None:
+            return events_service.get_events_since(
+                cursor=args["cursor"],
+                after=after,
+                page_size=page_size,
+                only_files=only_files,
+                project_id=project_id
+            )
         else:
             return events_service.get_last_events(
                 after=after,
@@ -1,8 +1,8 @@
-from flask import abort
+from flask import abort, request
 from flask_jwt_extended import jwt_required
 
 from zou.app.blueprints.crud.base import BaseModelResource
-from zou.app.utils import csv_utils, permissions
+from zou.app.utils import csv_utils, permissions, streaming
 
 
 class BaseCsvExport(BaseModelResource):
@@ -18,14 +18,25 @@ class BaseCsvExport(BaseModelResource):
     def get(self):
         try:
             self.check_permissions()
-            csv_content = []
-            csv_content.append(self.build_headers())
-            results = self.build_query().all()
-            for result in results:
-                csv_content.append(self.build_row(result))
         except permissions.PermissionDenied:
             abort(403)
 
-        return csv_utils.build_csv_response(
-            csv_content, file_name=self.file_name
+        return csv_utils.build_csv_stream_response(
+            self.iter_rows(),
+            file_name=self.file_name,
+            file_format=csv_utils.get_export_format(request),
+            compress=csv_utils.is_compression_requested(request),
         )
+
+    def iter_rows(self):
+        """
+        Generate the headers then the rows of the export. Results are read
+        through a server-side cursor, chunk by chunk.
+        """
+        yield self.build_headers()
+        for results in streaming.iter_query_chunks(self.build_query()):
+            for row in self.build_rows(results):
+                yield row
+
+    def build_rows(self, results):
+        return [self.build_row(result) for result in results]
@@ -1,3 +1,4 @@
+from flask import request
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required
 from slugify import slugify
@@ -7,7 +8,7 @@ from zou.app.models.entity import Entity, EntityLink
 from zou.app.models.entity_type import EntityType
 
 from zou.app.services import projects_service, user_service
-from zou.app.utils import csv_utils
+from zou.app.utils import csv_utils, streaming
 
 from zou.app.mixin import ArgsMixin
 
@@ -21,15 +22,18 @@ class CastingCsvExport(Resource, ArgsMixin):
 
         episode_id = self.get_episode_id()
 
-        results = self.build_results(project_id, episode_id=episode_id)
-        headers = self.build_headers()
-
-        csv_content = [headers]
-        for result in results:
-            csv_content.append(self.build_row(result))
-
         file_name = "%s casting" % project["name"]
-        return csv_utils.build_csv_response(csv_content, slugify(file_name))
+        return csv_utils.build_csv_stream_response(
+            self.iter_rows(project_id, episode_id=episode_id),
+            slugify(file_name),
+            file_format=csv_utils.get_export_format(request),
+            compress=csv_utils.is_compression_requested(request),
+        )
+
+    def iter_rows(self, project_id, episode_id=None):
+        yield self.build_headers()
+        for result in self.build_results(project_id, episode_id=episode_id):
+            yield self.build_row(result)
 
     def check_permissions(self, project_id):
         user_service.check_project_access(project_id)
@@ -69,8 +73,10 @@ class CastingCsvExport(Resource, ArgsMixin):
         return row
 
     def build_results(self, project_id, episode_id=None):
-        results = []
-
+        """
+        Generate casting links of given project. They are read through a
+        server-side cursor.
+        """
         Target = aliased(Entity, name="target")
         Asset = aliased(Entity, name="asset")
         Parent = aliased(Entity, name="parent")
@@ -115,17 +121,14 @@ class CastingCsvExport(Resource, ArgsMixin):
             target_name,
             asset_type_name,
             asset_name,
-        ) in query.all():
-            results.append(
-                (
-                    episode_name,
-                    target_parent_name,
-                    target_entity_type_name,
-                    target_name,
-                    asset_type_name,
-                    asset_name,
-                    entity_link.nb_occurences,
-                    entity_link.label,
-                )
+        ) in query.yield_per(streaming.STREAM_CHUNK_SIZE):
+            yield (
+                episode_name,
+                target_parent_name,
+                target_entity_type_name,
+                target_name,
+                asset_type_name,
+                asset_name,
+                entity_link.nb_occurences,
+                entity_link.label,
             )
-        return results
@@ -1,7 +1,11 @@
+from flask import request
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required
 from slugify import slugify
 
+from zou.app.models.entity import Entity
+from zou.app.models.task import Task
+from zou.app.models.task_type import TaskType
 from zou.app.services import (
     shots_service,
     projects_service,
@@ -20,21 +24,26 @@ class ShotsCsvExport(Resource):
         self.task_status_map = tasks_service.get_task_status_map()
         self.task_type_map = tasks_service.get_task_type_map()
 
-        csv_content = []
-        results = self.get_shots_data(project_id)
-        metadata_infos = self.get_metadata_infos(project_id)
-        validation_columns = self.get_validation_columns(results)
-        headers = self.build_headers(metadata_infos, validation_columns)
-        csv_content.append(headers)
+        file_name = "%s shots" % project["name"]
+        return csv_utils.build_csv_stream_response(
+            self.iter_rows(project),
+            slugify(file_name),
+            file_format=csv_utils.get_export_format(request),
+            compress=csv_utils.is_compression_requested(request),
+        )
 
-        for result in results:
-            result["project_name"] = project["name"]
-            csv_content.append(
-                self.build_row(result, metadata_infos, validation_columns)
-            )
+    def iter_rows(self, project):
+        """
+        Generate the headers then a row for each shot. Shots are read while
+        the rows are sent.
+        """
+        metadata_infos = self.get_metadata_infos(project["id"])
+        validation_columns = self.get_validation_columns(project["id"])
+        yield self.build_headers(metadata_infos, validation_columns)
 
-        file_name = "%s shots" % project["name"]
-        return csv_utils.build_csv_response(csv_content, slugify(file_name))
+        for result in self.get_shots_data(project["id"]):
+            result["project_name"] = project["name"]
+            yield self.build_row(result, metadata_infos, validation_columns)
 
     def check_permissions(self, project_id):
         user_service.check_project_access(project_id)
@@ -59,15 +68,7 @@ class ShotsCsvExport(Resource):
         return headers + metadata_headers + validation_columns
 
     def get_shots_data(self, project_id):
-        results = shots_service.get_shots_and_tasks({"project_id": project_id})
-        return sorted(
-            results,
-            key=lambda shot: (
-                shot["episode_name"],
-                shot["sequence_name"],
-                shot["name"],
-            ),
-        )
+        return shots_service.iter_shots_and_tasks({"project_id": project_id})
 
     def build_row(self, result, metadata_infos, validation_columns):
         row = [
@@ -97,28 +98,26 @@ class ShotsCsvExport(Resource):
 
         return row
 
-    def get_validation_columns(self, results):
-        validation_map = {}
-
-        for result in results:
-            for task in result["tasks"]:
-                task_type = self.task_type_map[task["task_type_id"]]
-                validation_map[task_type["name"]] = {
-                    "name": task_type["name"],
-                    "priority": task_type["priority"],
-                }
-
-        validation_columns = [
-            validation["name"]
-            for validation in sorted(
-                validation_map.values(),
-                key=lambda validation: (
-                    validation["priority"],
-                    validation["name"],
-                ),
-            )
-        ]
+    def get_validation_columns(self, project_id):
+        """
+        Return the names of the task types used by the shots of given
+        project, sorted by priority.
+        """
+        shot_type = shots_service.get_shot_type()
+        query = (
+            TaskType.query.join(Task, Task.task_type_id == TaskType.id)
+            .join(Entity, Entity.id == Task.entity_id)
+            .filter(Entity.project_id == project_id)
+            .filter(Entity.entity_type_id == shot_type["id"])
+            .with_entities(TaskType.priority, TaskType.name)
+            .distinct()
+            .order_by(TaskType.priority, TaskType.name)
+        )
 
+        validation_columns = []
+        for (_, task_type_name) in query.all():
+            if task_type_name not in validation_columns:
+                validation_columns.append(task_type_name)
         return validation_columns
 
     def get_metadata_infos(self, project_id):
@@ -1,8 +1,9 @@
+from zou.app import db
 from zou.app.blueprints.export.csv.base import BaseCsvExport
 
 from zou.app.models.task_status import TaskStatus
 from zou.app.models.task_type import TaskType
-from zou.app.models.task import Task
+from zou.app.models.task import Task, assignees_table
 from zou.app.models.person import Person
 from zou.app.models.project import Project
 from zou.app.models.department import Department
@@ -62,6 +63,27 @@ class TasksCsvExport(BaseCsvExport):
 
         return query
 
+    def build_rows(self, results):
+        """
+        Assignee names are loaded with a single query for each chunk of tasks.
+        """
+        self.assignee_map = {}
+        task_ids = [task_data[0].id for task_data in results]
+        query = (
+            db.session.query(
+                assignees_table.columns.task,
+                Person.first_name,
+                Person.last_name,
+            )
+            .join(Person, Person.id == assignees_table.columns.person)
+            .filter(assignees_table.columns.task.in_(task_ids))
+        )
+        for (task_id, first_name, last_name) in query.all():
+            self.assignee_map.setdefault(task_id, []).append(
+                "%s %s" % (first_name, last_name)
+            )
+        return BaseCsvExport.build_rows(self, results)
+
     def build_row(self, task_data):
         (
             task,
@@ -74,7 +96,7 @@ class TasksCsvExport(BaseCsvExport):
             assigner_first_name,
             assigner_last_name,
         ) = task_data
-        persons = task.assignees_as_string()
+        persons = ", ".join(self.assignee_map.get(task.id, []))
 
         start_date = ""
         if task.start_date is not None:
@@ -1,10 +1,11 @@
 import os
 
-from flask import abort, request, current_app
+from flask import abort, request, current_app, Response
 from flask import send_file as flask_send_file
 from flask_restful import Resource, reqparse
 from flask_jwt_extended import jwt_required
 from flask_fs.errors import FileNotFound
+from werkzeug.datastructures import ContentRange
 
 from zou.app import config
 from zou.app.mixin import ArgsMixin
@@ -15,8 +16,8 @@ from zou.app.services import (
     files_service,
     names_service,
     persons_service,
+    preview_files_service,
     projects_service,
-    shots_service,
     tasks_service,
     user_service,
 )
@@ -28,6 +29,8 @@ from zou.app.utils import (
     thumbnail as thumbnail_utils,
 )
 
+import event_handlers
+
 
 ALLOWED_PICTURE_EXTENSION = [".png", ".jpg", ".jpeg", ".PNG", ".JPG", ".JPEG"]
 ALLOWED_MOVIE_EXTENSION = [
@@ -86,6 +89,7 @@ def send_standard_file(
     return send_storage_file(
         file_store.get_local_file_path,
         file_store.open_file,
+        file_store.get_file_size,
         "previews",
         preview_file_id,
         extension,
@@ -98,6 +102,7 @@ def send_movie_file(preview_file_id, as_attachment=False):
     return send_storage_file(
         file_store.get_local_movie_path,
         file_store.open_movie,
+        file_store.get_movie_size,
         "previews",
         preview_file_id,
         "mp4",
@@ -110,6 +115,7 @@ def send_picture_file(prefix, preview_file_id, as_attachment=False):
     return send_storage_file(
         file_store.get_local_picture_path,
         file_store.open_picture,
+        file_store.get_picture_size,
         prefix,
         preview_file_id,
         "png",
@@ -121,6 +127,7 @@ def send_picture_file(prefix, preview_file_id, as_attachment=False):
 def send_storage_file(
     get_local_path,
     open_file,
+    get_size,
     prefix,
     preview_file_id,
     extension,
@@ -130,7 +137,31 @@ def send_storage_file(
     """
     Send file from storage. If it's not a local storage, cache the file in
     a temporary folder before sending it. It accepts conditional headers.
+    Range requests on files that are not cached yet are forwarded to the
+    storage, so seeking in a movie doesn't require a full download.
     """
+    if (
+        config.FS_BACKEND != "local"
+        and request.range is not None
+        and not as_attachment
+        and not fs.is_cached(
+            fs.get_cache_file_path(config, prefix, preview_file_id, extension)
+        )
+    ):
+        try:
+            return send_storage_file_range(
+                open_file, get_size, prefix, preview_file_id, mimetype
+            )
+        except FileNotFound:
+            return (
+                {
+                    "error": True,
+                    "message": "File not found for: %s %s"
+                    % (prefix, preview_file_id),
+                },
+                404,
+            )
+
     file_path = fs.get_file_path(
         config, get_local_path, open_file, prefix, preview_file_id, extension
     )
@@ -170,6 +201,35 @@ def send_storage_file(
         )
 
 
+def send_storage_file_range(
+    open_file, get_size, prefix, preview_file_id, mimetype
+):
+    """
+    Stream the part of the stored file asked by the Range header of the
+    current request, directly from the storage.
+    """
+    size = get_size(prefix, preview_file_id)
+    byte_range = request.range.range_for_length(size)
+    if byte_range is None:
+        response = Response(status=416)
+        response.headers["Content-Range"] = "bytes */%d" % size
+        return response
+
+    (start, stop) = byte_range
+    response = Response(
+        open_file(prefix, preview_file_id, start, stop - 1),
+        status=206,
+        mimetype=mimetype,
+        direct_passthrough=True,
+    )
+    response.headers["Accept-Ranges"] = "bytes"
+    response.headers["Content-Length"] = stop - start
+    response.headers["Content-Range"] = ContentRange(
+        "bytes", start, stop, size
+    ).to_header()
+    return response
+
+
 class CreatePreviewFilePictureResource(Resource):
     """
     Main resource to add a preview. It stores the preview file and generates
@@ -201,6 +261,23 @@ class CreatePreviewFilePictureResource(Resource):
             return preview_file, 201
 
         elif extension in ALLOWED_MOVIE_EXTENSION:
+            if config.ENABLE_JOB_QUEUE:
+                uploaded_movie_path = self.save_uploaded_movie(
+                    instance_id, uploaded_file
+                )
+                preview_file = files_service.update_preview_file(
+                    instance_id,
+                    {
+                        "extension": "mp4",
+                        "original_name": original_file_name,
+                        "status": "processing",
+                    },
+                )
+                event_handlers.prepare_and_store_movie_task.delay(
+                    instance_id, uploaded_movie_path
+                )
+                return preview_file, 201
+
             try:
                 self.save_movie_preview(instance_id, uploaded_file)
             except Exception as e:
@@ -245,31 +322,26 @@ class CreatePreviewFilePictureResource(Resource):
         )
         return self.save_variants(original_tmp_path, instance_id)
 
+    def save_uploaded_movie(self, instance_id, uploaded_file):
+        """
+        Store uploaded movie in the temporary folder, so it can be processed
+        later.
+        """
+        tmp_folder = current_app.config["TMP_DIR"]
+        return movie_utils.save_file(tmp_folder, instance_id, uploaded_file)
+
     def save_movie_preview(self, instance_id, uploaded_file):
         """
         Get uploaded movie, normalize it then build thumbnails then save
         everything in the file storage.
         """
-        tmp_folder = current_app.config["TMP_DIR"]
-        uploaded_movie_path = movie_utils.save_file(
-            tmp_folder, instance_id, uploaded_file
-        )
-
-        project = files_service.get_project_from_preview_file(instance_id)
-        fps = shots_service.get_preview_fps(project)
-        (width, height) = shots_service.get_preview_dimensions(project)
-        normalized_movie_path = movie_utils.normalize_movie(
-            uploaded_movie_path, fps=fps, width=width, height=height
+        uploaded_movie_path = self.save_uploaded_movie(
+            instance_id, uploaded_file
         )
-        file_store.add_movie("previews", instance_id, normalized_movie_path)
-        original_tmp_path = movie_utils.generate_thumbnail(
-            normalized_movie_path
+        return preview_files_service.prepare_and_store_movie(
+            instance_id, uploaded_movie_path
         )
 
-        os.remove(uploaded_movie_path)
-        os.remove(normalized_movie_path)
-        return self.save_variants(original_tmp_path, instance_id)
-
     def save_file_preview(self, instance_id, uploaded_file, extension):
         """
         Get uploaded file then save it in the file storage.
@@ -286,47 +358,15 @@ class CreatePreviewFilePictureResource(Resource):
         """
         Build variants of a picture file and save them in the main storage.
         """
-        variants = thumbnail_utils.generate_preview_variants(
-            original_tmp_path, instance_id
+        return preview_files_service.save_variants(
+            instance_id, original_tmp_path
         )
-        variants.append(("original", original_tmp_path))
-        for (name, path) in variants:
-            file_store.add_picture(name, instance_id, path)
-            os.remove(path)
-
-        return variants
 
     def emit_app_preview_event(self, preview_file_id):
         """
         Emit an event, each time a preview is added.
         """
-        preview_file = files_service.get_preview_file(preview_file_id)
-        comment = tasks_service.get_comment_by_preview_file_id(preview_file_id)
-        task = tasks_service.get_task(preview_file["task_id"])
-        comment_id = None
-        events.emit(
-            "preview-file:update", {"preview_file_id": preview_file["id"]},
-            project_id=task["project_id"]
-        )
-
-        if comment is not None:
-            comment_id = comment["id"]
-            events.emit(
-                "comment:update",
-                {"comment_id": comment_id},
-                project_id=task["project_id"]
-            )
-            events.emit(
-                "preview-file:add-file",
-                {
-                    "comment_id": comment_id,
-                    "task_id": preview_file["task_id"],
-                    "preview_file_id": preview_file["id"],
-                    "revision": preview_file["revision"],
-                    "extension": preview_file["extension"],
-                },
-                project_id=task["project_id"]
-            )
+        preview_files_service.emit_app_preview_event(preview_file_id)
 
     def is_allowed(self, preview_file_id):
         """
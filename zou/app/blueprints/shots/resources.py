@@ -17,7 +17,7 @@ from zou.app.services import (
 )
 
 from zou.app.mixin import ArgsMixin
-from zou.app.utils import permissions, query
+from zou.app.utils import permissions, query, streaming
 
 
 class ShotResource(Resource, ArgsMixin):
@@ -261,6 +261,10 @@ class ShotsAndTasksResource(Resource):
         user_service.check_project_access(criterions.get("project_id", None))
         if permissions.has_vendor_permissions():
             criterions["assigned_to"] = persons_service.get_current_user()["id"]
+        if streaming.is_stream_requested(request):
+            return streaming.build_json_stream_response(
+                shots_service.iter_shots_and_tasks(criterions)
+            )
         return shots_service.get_shots_and_tasks(criterions)
 
 
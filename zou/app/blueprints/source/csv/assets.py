@@ -1,17 +1,16 @@
-from flask import current_app
 from zou.app.blueprints.source.csv.base import BaseCsvProjectImportResource
 
 from zou.app.services import assets_service, projects_service, shots_service
 from zou.app.models.entity import Entity
-from zou.app.utils import events
-
-from sqlalchemy.exc import IntegrityError
+from zou.app.models.entity_type import EntityType
 
 
 class AssetsCsvImportResource(BaseCsvProjectImportResource):
+
+    required_columns = ["Name", "Type", "Description"]
+
     def prepare_import(self, project_id):
         self.episodes = {}
-        self.entity_types = {}
         self.descriptor_fields = self.get_descriptor_field_map(
             project_id, "Asset"
         )
@@ -23,71 +22,112 @@ class AssetsCsvImportResource(BaseCsvProjectImportResource):
                 episode["name"]: episode["id"]
                 for episode in episodes
             }
+        self.entity_types = {
+            entity_type.name: str(entity_type.id)
+            for entity_type in EntityType.get_all()
+        }
+
+    def get_episode_id(self, project_id, episode_name):
+        if episode_name is None:
+            return None
+        if episode_name != "MP" and episode_name not in self.episodes:
+            self.episodes[episode_name] = shots_service.get_or_create_episode(
+                project_id, episode_name
+            )["id"]
+        return self.episodes.get(episode_name, None)
 
-    def import_row(self, row, project_id):
-        asset_name = row["Name"]
-        entity_type_name = row["Type"]
-        description = row["Description"]
-        episode_name = row.get("Episode", None)
-        episode_id = None
-        if episode_name is not None:
-            if episode_name != "MP" and episode_name not in self.episodes:
-                self.episodes[
-                    episode_name
-                ] = shots_service.get_or_create_episode(
-                    project_id, episode_name
+    def get_entity_type_id(self, entity_type_name):
+        if entity_type_name not in self.entity_types:
+            self.entity_types[entity_type_name] = \
+                assets_service.get_or_create_asset_type(
+                    entity_type_name
                 )["id"]
-            episode_id = self.episodes.get(episode_name, None)
+        return self.entity_types[entity_type_name]
 
-        self.add_to_cache_if_absent(
-            self.entity_types,
-            assets_service.get_or_create_asset_type,
-            entity_type_name,
-        )
-        entity_type_id = self.get_id_from_cache(
-            self.entity_types, entity_type_name
-        )
+    def parse_row(self, row, project_id):
+        return {
+            "name": row["Name"],
+            "description": row["Description"],
+            "entity_type_id": self.get_entity_type_id(row["Type"]),
+            "source_id": self.get_episode_id(
+                project_id, row.get("Episode", None)
+            ),
+        }
 
-        entity = Entity.get_by(
-            name=asset_name,
-            project_id=project_id,
-            entity_type_id=entity_type_id,
-            source_id=episode_id
-        )
+    def get_event_data(self, asset):
+        return {"asset_id": asset["id"], "episode_id": asset["source_id"]}
 
-        data = {}
-        for name, field_name in self.descriptor_fields.items():
-            if name in row:
-                data[field_name] = row[name]
-            elif entity is not None \
-            and entity.data is not None \
-            and field_name in entity.data:
-                data[field_name] = entity.data[field_name]
+    def get_asset_map(self, project_id, assets):
+        """
+        Retrieve with a single query the assets of given chunk that already
+        exist. They are indexed by name, asset type and episode.
+        """
+        asset_map = {}
+        if len(assets) > 0:
+            query = (
+                Entity.query
+                .filter(Entity.project_id == project_id)
+                .filter(Entity.entity_type_id.in_(
+                    set(asset["entity_type_id"] for asset in assets)
+                ))
+                .filter(Entity.name.in_(
+                    set(asset["name"] for asset in assets)
+                ))
+            )
+            for entity in query.all():
+                source_id = None
+                if entity.source_id is not None:
+                    source_id = str(entity.source_id)
+                key = (entity.name, str(entity.entity_type_id), source_id)
+                asset_map[key] = entity
+        return asset_map
 
-        if entity is None:
+    def import_rows(self, rows, project_id):
+        result = [None] * len(rows)
+        assets = {}
+        for (index, (line_number, row)) in enumerate(rows):
             try:
-                entity = Entity.create(
-                    name=asset_name,
-                    description=description,
-                    project_id=project_id,
-                    entity_type_id=entity_type_id,
-                    source_id=episode_id,
-                    data=data,
-                )
-                events.emit(
-                    "asset:new",
-                    {"asset_id": str(entity.id), "episode_id": episode_id},
-                    project_id=project_id
+                assets[index] = (self.parse_row(row, project_id), row)
+            except KeyError:
+                raise
+            except Exception as e:
+                result[index] = self.get_row_error(line_number, e)
+
+        asset_map = self.get_asset_map(
+            project_id, [asset for (asset, _) in assets.values()]
+        )
+        new_assets = []
+        updated_assets = []
+        asset_ids = {}
+        for (index, (asset, row)) in assets.items():
+            key = (asset["name"], asset["entity_type_id"], asset["source_id"])
+            entity = asset_map.get(key, None)
+            data = self.get_descriptor_data(row, entity)
+            if entity is None:
+                asset["data"] = data
+                entity = self.build_entity_row(
+                    project_id, asset["entity_type_id"], asset
                 )
-            except IntegrityError:
-                current_app.logger.error("Row import failed", exc_info=1)
+                asset_map[key] = entity
+                new_assets.append(entity)
+            elif self.is_update and not isinstance(entity, dict):
+                entity.description = asset["description"]
+                entity.data = data
+                updated_assets.append(entity)
+            if isinstance(entity, dict):
+                asset_ids[index] = str(entity["id"])
+            else:
+                asset_ids[index] = str(entity.id)
 
-        elif self.is_update:
-            entity.update({"description": description, "data": data})
-            events.emit(
-                "asset:update",
-                {"asset_id": str(entity.id), "episode_id": episode_id},
-                project_id=project_id
-            )
+        new_asset_ids = self.insert_entities(new_assets, "entity_uc")
+        Entity.commit()
 
-        return entity.serialize()
+        return self.build_import_result(
+            rows,
+            result,
+            asset_ids,
+            new_asset_ids,
+            set(str(entity.id) for entity in updated_assets),
+            project_id,
+            "asset",
+        )
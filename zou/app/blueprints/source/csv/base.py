@@ -1,3 +1,4 @@
+import datetime
 import uuid
 import os
 import csv
@@ -5,50 +6,127 @@ import csv
 from flask import request, current_app
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required
+from sqlalchemy.dialects.postgresql import insert
 
-from zou.app import app
-from zou.app.utils import permissions
+from zou.app import app, db
+from zou.app.models.entity import Entity
+from zou.app.utils import events, fields, permissions
 from zou.app.services import user_service, projects_service
 
+CSV_DELIMITERS = ",;"
+CSV_IMPORT_CHUNK_SIZE = 500
+
+
+def get_csv_delimiter(csvfile):
+    """
+    Guess the delimiter of given CSV file from its first line. Comma is used
+    if it can't be guessed.
+    """
+    header = csvfile.readline()
+    csvfile.seek(0)
+    try:
+        return csv.Sniffer().sniff(header, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        return ","
+
+
+def read_csv_chunks(file_path, required_columns=[], chunk_size=None):
+    """
+    Read given CSV file and yield its rows by chunks. Each row is given with
+    its line number. A KeyError is raised if one of the required columns is
+    missing.
+    """
+    if chunk_size is None:
+        chunk_size = CSV_IMPORT_CHUNK_SIZE
+
+    with open(file_path) as csvfile:
+        delimiter = get_csv_delimiter(csvfile)
+        reader = csv.DictReader(csvfile, delimiter=delimiter)
+        columns = reader.fieldnames or []
+        for column in required_columns:
+            if column not in columns:
+                raise KeyError(column)
+
+        chunk = []
+        for row in reader:
+            chunk.append((reader.line_num, row))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if len(chunk) > 0:
+            yield chunk
+
 
 class BaseCsvImportResource(Resource):
+    """
+    Import the rows of an uploaded CSV file. Rows are read by chunks and
+    given to import_rows. By default, rows are imported one by one through
+    import_row. The result is a list with an entry for each row: the imported
+    data or an error description.
+    """
+
+    required_columns = []
+
     def __init__(self):
         Resource.__init__(self)
 
     @jwt_required
     def post(self):
+        file_path = self.save_uploaded_file()
+        return self.import_file(file_path)
+
+    def save_uploaded_file(self):
         uploaded_file = request.files["file"]
         file_name = "%s.csv" % uuid.uuid4()
-
         file_path = os.path.join(app.config["TMP_DIR"], file_name)
         uploaded_file.save(file_path)
         self.is_update = request.args.get("update", "false") == "true"
+        return file_path
 
+    def import_file(self, file_path, *args):
         try:
-            result = self.run_import(file_path, ",")
+            result = self.run_import(file_path, *args)
             return result, 201
         except KeyError as e:
-            try:
-                result = self.run_import(file_path, ";")
-                return result, 201
-            except KeyError as e:
-                current_app.logger.error("A column is missing: %s" % e)
-                return (
-                    {"error": True, "message": "A column is missing: %s" % e},
-                    400,
-                )
+            current_app.logger.error("A column is missing: %s" % e)
+            return (
+                {"error": True, "message": "A column is missing: %s" % e},
+                400,
+            )
+        finally:
+            os.remove(file_path)
 
-    def run_import(self, file_path, delimiter):
-        result = []
+    def run_import(self, file_path):
         self.check_permissions()
         self.prepare_import()
-        with open(file_path) as csvfile:
-            reader = csv.DictReader(csvfile, delimiter=delimiter)
-            for row in reader:
-                row = self.import_row(row)
-                result.append(row)
+        return self.import_chunks(file_path)
+
+    def import_chunks(self, file_path, *args):
+        result = []
+        for rows in read_csv_chunks(file_path, self.required_columns):
+            result += self.import_rows(rows, *args)
         return result
 
+    def import_rows(self, rows, *args):
+        result = []
+        for (line_number, row) in rows:
+            try:
+                result.append(self.import_row(row, *args))
+            except KeyError:
+                raise
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error("Row import failed", exc_info=1)
+                result.append(self.get_row_error(line_number, e))
+        return result
+
+    def get_row_error(self, line_number, error):
+        return {
+            "error": True,
+            "line_number": line_number,
+            "message": str(error),
+        }
+
     def prepare_import(self):
         pass
 
@@ -74,36 +152,13 @@ class BaseCsvImportResource(Resource):
 class BaseCsvProjectImportResource(BaseCsvImportResource):
     @jwt_required
     def post(self, project_id):
-        uploaded_file = request.files["file"]
-        file_name = "%s.csv" % uuid.uuid4()
-        file_path = os.path.join(app.config["TMP_DIR"], file_name)
-        uploaded_file.save(file_path)
-        self.is_update = request.args.get("update", "false") == "true"
+        file_path = self.save_uploaded_file()
+        return self.import_file(file_path, project_id)
 
-        try:
-            result = self.run_import(project_id, file_path, ",")
-            return result, 201
-        except KeyError as e:
-            try:
-                result = self.run_import(project_id, file_path, ";")
-                return result, 201
-            except KeyError as e:
-                current_app.logger.error("A column is missing: %s" % e)
-                return (
-                    {"error": True, "message": "A column is missing: %s" % e},
-                    400,
-                )
-
-    def run_import(self, project_id, file_path, delimiter):
-        result = []
+    def run_import(self, file_path, project_id):
         self.check_project_permissions(project_id)
         self.prepare_import(project_id)
-        with open(file_path) as csvfile:
-            reader = csv.DictReader(csvfile, delimiter=delimiter)
-            for row in reader:
-                row = self.import_row(row, project_id)
-                result.append(row)
-        return result
+        return self.import_chunks(file_path, project_id)
 
     def check_project_permissions(self, project_id):
         return user_service.check_manager_project_access(project_id)
@@ -118,3 +173,100 @@ class BaseCsvProjectImportResource(BaseCsvImportResource):
             if descriptor["entity_type"] == entity_type:
                 descriptor_map[descriptor["name"]] = descriptor["field_name"]
         return descriptor_map
+
+    def get_descriptor_data(self, row, entity=None):
+        """
+        Build metadata from the descriptor columns of given row. Values of
+        missing columns are taken from the existing entity.
+        """
+        entity_data = None
+        if isinstance(entity, dict):
+            entity_data = entity["data"]
+        elif entity is not None:
+            entity_data = entity.data
+
+        data = {}
+        for name, field_name in self.descriptor_fields.items():
+            if name in row:
+                data[field_name] = row[name]
+            elif entity_data is not None and field_name in entity_data:
+                data[field_name] = entity_data[field_name]
+        return data
+
+    def build_entity_row(self, project_id, entity_type_id, values):
+        now = datetime.datetime.utcnow()
+        entity = {
+            "id": fields.gen_uuid(),
+            "created_at": now,
+            "updated_at": now,
+            "canceled": False,
+            "project_id": project_id,
+            "entity_type_id": entity_type_id,
+        }
+        entity.update(values)
+        return entity
+
+    def insert_entities(self, entities, constraint=None):
+        """
+        Insert given entity rows with a single multi-row statement. When a
+        constraint is given, rows conflicting with it are skipped. Return
+        the ids of inserted rows.
+        """
+        if len(entities) == 0:
+            return set()
+        query = insert(Entity.__table__).values(entities)
+        if constraint is not None:
+            query = query.on_conflict_do_nothing(constraint=constraint)
+        query = query.returning(Entity.id)
+        return set(
+            str(entity_id) for (entity_id,) in db.session.execute(query)
+        )
+
+    def build_import_result(
+        self,
+        rows,
+        result,
+        entity_ids,
+        new_entity_ids,
+        updated_entity_ids,
+        project_id,
+        model_name,
+    ):
+        """
+        Reload imported entities with a single query, fill the result of
+        their rows and emit creation and update events.
+        """
+        entities = {}
+        if len(entity_ids) > 0:
+            query = Entity.query.filter(
+                Entity.id.in_(set(entity_ids.values()))
+            )
+            for entity in query.all():
+                entities[str(entity.id)] = entity.serialize()
+
+        for (index, entity_id) in entity_ids.items():
+            if entity_id in entities:
+                result[index] = entities[entity_id]
+            else:
+                result[index] = self.get_row_error(
+                    rows[index][0], "%s already exists" % model_name
+                )
+
+        for (event_name, ids) in [
+            ("new", new_entity_ids),
+            ("update", updated_entity_ids),
+        ]:
+            if len(ids) == 0:
+                continue
+            events.emit_many(
+                "%s:%s" % (model_name, event_name),
+                [
+                    self.get_event_data(entities[entity_id])
+                    for entity_id in ids
+                ],
+                project_id=project_id,
+            )
+        return result
+
+    def get_event_data(self, entity):
+        return {}
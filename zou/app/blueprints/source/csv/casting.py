@@ -1,10 +1,28 @@
+import datetime
+
 from slugify import slugify
+from sqlalchemy.dialects.postgresql import insert
+
+from zou.app import db
 from zou.app.blueprints.source.csv.base import BaseCsvProjectImportResource
 
-from zou.app.services import assets_service, shots_service, breakdown_service
+from zou.app.models.entity import EntityLink
+from zou.app.services import assets_service, shots_service
+from zou.app.utils import events, fields
 
 
 class CastingCsvImportResource(BaseCsvProjectImportResource):
+
+    required_columns = [
+        "Episode",
+        "Parent",
+        "Name",
+        "Asset Type",
+        "Asset",
+        "Occurences",
+        "Label",
+    ]
+
     def prepare_import(self, project_id):
         self.asset_type_map = {}
         self.asset_map = {}
@@ -49,7 +67,7 @@ class CastingCsvImportResource(BaseCsvProjectImportResource):
         sequence_key = self.sequence_map[shot["parent_id"]]
         return "%s%s" % (sequence_key, slugify(shot["name"]))
 
-    def import_row(self, row, project_id):
+    def parse_row(self, row):
         asset_key = slugify("%s%s" % (row["Asset Type"], row["Asset"]))
         target_key = slugify(
             "%s%s%s" % (row["Episode"], row["Parent"], row["Name"])
@@ -57,16 +75,78 @@ class CastingCsvImportResource(BaseCsvProjectImportResource):
         occurences = 1
         if len(row["Occurences"]) > 0:
             occurences = int(row["Occurences"])
-        label = slugify(row["Label"])
 
         asset_id = self.asset_map.get(asset_key, None)
+        if asset_id is None:
+            raise ValueError("Asset %s does not exist" % row["Asset"])
         target_id = self.shot_map.get(target_key, None)
         if target_id is None:
             target_id = self.asset_map.get(target_key, None)
+        if target_id is None:
+            raise ValueError("Entity %s does not exist" % row["Name"])
 
-        if asset_id is not None and target_id is not None:
-            link = breakdown_service.get_entity_link(target_id, asset_id)
-            if link is None:
-                breakdown_service.create_casting_link(
-                    target_id, asset_id, occurences, label
+        return {
+            "entity_in_id": target_id,
+            "entity_out_id": asset_id,
+            "nb_occurences": occurences,
+            "label": slugify(row["Label"]),
+        }
+
+    def import_rows(self, rows, project_id):
+        """
+        Create the casting links of given rows with a multi-row insert.
+        Links that already exist are kept as is.
+        """
+        result = [None] * len(rows)
+        links = {}
+        for (index, (line_number, row)) in enumerate(rows):
+            try:
+                links[index] = self.parse_row(row)
+            except KeyError:
+                raise
+            except Exception as e:
+                result[index] = self.get_row_error(line_number, e)
+
+        existing_links = set()
+        target_ids = set(link["entity_in_id"] for link in links.values())
+        if len(target_ids) > 0:
+            query = (
+                db.session.query(
+                    EntityLink.entity_in_id, EntityLink.entity_out_id
                 )
+                .filter(EntityLink.entity_in_id.in_(target_ids))
+            )
+            existing_links = set(
+                (str(entity_in_id), str(entity_out_id))
+                for (entity_in_id, entity_out_id) in query.all()
+            )
+
+        now = datetime.datetime.utcnow()
+        new_links = []
+        for (index, link) in links.items():
+            key = (link["entity_in_id"], link["entity_out_id"])
+            if key not in existing_links:
+                existing_links.add(key)
+                link = dict(
+                    link, id=fields.gen_uuid(), created_at=now, updated_at=now
+                )
+                new_links.append(link)
+            result[index] = link
+
+        if len(new_links) > 0:
+            db.session.execute(insert(EntityLink.__table__).values(new_links))
+            EntityLink.commit()
+            events.emit_many(
+                "entity-link:new",
+                [
+                    {
+                        "entity_link_id": link["id"],
+                        "entity_in_id": link["entity_in_id"],
+                        "entity_out_id": link["entity_out_id"],
+                        "nb_occurences": link["nb_occurences"],
+                    }
+                    for link in new_links
+                ],
+                project_id=project_id,
+            )
+        return [fields.serialize_value(link) for link in result]
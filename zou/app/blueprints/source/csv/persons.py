@@ -7,6 +7,9 @@ from sqlalchemy.exc import IntegrityError
 
 
 class PersonsCsvImportResource(BaseCsvImportResource):
+
+    required_columns = ["First Name", "Last Name", "Email", "Phone"]
+
     def check_permissions(self):
         return permissions.check_admin_permissions()
 
@@ -1,125 +1,150 @@
-from flask import current_app
-
-from sqlalchemy.exc import IntegrityError
-
 from zou.app.blueprints.source.csv.base import BaseCsvProjectImportResource
 
 from zou.app.models.entity import Entity
 from zou.app.services import shots_service, projects_service
-from zou.app.utils import events
 
 
 class ShotsCsvImportResource(BaseCsvProjectImportResource):
+
+    required_columns = ["Sequence", "Name"]
+
     def prepare_import(self, project_id):
-        self.episodes = {}
-        self.sequences = {}
         self.descriptor_fields = self.get_descriptor_field_map(
             project_id, "Shot"
         )
         project = projects_service.get_project(project_id)
         self.is_tv_show = projects_service.is_tv_show(project)
+        self.shot_type_id = shots_service.get_shot_type()["id"]
 
-    def import_row(self, row, project_id):
-        if self.is_tv_show:
-            episode_name = row["Episode"]
-        sequence_name = row["Sequence"]
-        shot_name = row["Name"]
-        description = row.get("Description", "")
-        nb_frames = row.get("Nb Frames", None) or row.get("Frames", None)
-        data = {
-            "frame_in": row.get("Frame In", None) or row.get("In", None),
-            "frame_out": row.get("Frame Out", None) or row.get("Out", None),
-            "fps": row.get("FPS", None),
+        episode_type = shots_service.get_episode_type()
+        sequence_type = shots_service.get_sequence_type()
+        self.episodes = {
+            episode.name: str(episode.id)
+            for episode in Entity.get_all_by(
+                project_id=project_id, entity_type_id=episode_type["id"]
+            )
+        }
+        self.sequences = {
+            (
+                str(sequence.parent_id) if sequence.parent_id else None,
+                sequence.name,
+            ): str(sequence.id)
+            for sequence in Entity.get_all_by(
+                project_id=project_id, entity_type_id=sequence_type["id"]
+            )
         }
 
+    def get_sequence_id(self, project_id, episode_name, sequence_name):
+        episode_id = None
         if self.is_tv_show:
-            episode_key = "%s-%s" % (project_id, episode_name)
-            if episode_key not in self.episodes:
-                self.episodes[
-                    episode_key
-                ] = shots_service.get_or_create_episode(
-                    project_id, episode_name
-                )
+            if episode_name not in self.episodes:
+                self.episodes[episode_name] = \
+                    shots_service.get_or_create_episode(
+                        project_id, episode_name
+                    )["id"]
+            episode_id = self.episodes[episode_name]
 
-            sequence_key = "%s-%s-%s" % (
-                project_id,
-                episode_name,
-                sequence_name,
-            )
+        sequence_key = (episode_id, sequence_name)
+        if sequence_key not in self.sequences:
+            self.sequences[sequence_key] = \
+                shots_service.get_or_create_sequence(
+                    project_id, episode_id, sequence_name
+                )["id"]
+        return self.sequences[sequence_key]
+
+    def parse_row(self, row, project_id):
+        nb_frames = row.get("Nb Frames", None) or row.get("Frames", None)
+        if nb_frames is not None and len(nb_frames) > 0:
+            nb_frames = int(nb_frames)
         else:
-            sequence_key = "%s-%s" % (project_id, sequence_name)
+            nb_frames = None
 
-        if sequence_key not in self.sequences:
-            if self.is_tv_show:
-                episode = self.episodes[episode_key]
-                self.sequences[
-                    sequence_key
-                ] = shots_service.get_or_create_sequence(
-                    project_id, episode["id"], sequence_name
-                )
-            else:
-                self.sequences[
-                    sequence_key
-                ] = shots_service.get_or_create_sequence(
-                    project_id, None, sequence_name
-                )
-        sequence_id = self.get_id_from_cache(self.sequences, sequence_key)
-
-        shot_type = shots_service.get_shot_type()
-        entity = Entity.get_by(
-            name=shot_name,
-            project_id=project_id,
-            parent_id=sequence_id,
-            entity_type_id=shot_type["id"],
-        )
+        episode_name = None
+        if self.is_tv_show:
+            episode_name = row["Episode"]
+        return {
+            "name": row["Name"],
+            "parent_id": self.get_sequence_id(
+                project_id, episode_name, row["Sequence"]
+            ),
+            "description": row.get("Description", ""),
+            "nb_frames": nb_frames,
+            "data": {
+                "frame_in": row.get("Frame In", None) or row.get("In", None),
+                "frame_out":
+                    row.get("Frame Out", None) or row.get("Out", None),
+                "fps": row.get("FPS", None),
+            },
+        }
 
-        for name, field_name in self.descriptor_fields.items():
-            if name in row:
-                data[field_name] = row[name]
-            elif entity is not None and \
-                entity.data is not None and \
-                field_name in entity.data:
-                data[field_name] = entity.data[field_name]
+    def get_event_data(self, shot):
+        return {"shot_id": shot["id"]}
 
-        if entity is None:
+    def get_shot_map(self, project_id, shots):
+        """
+        Retrieve with a single query the shots of given chunk that already
+        exist. They are indexed by sequence id and name.
+        """
+        shot_map = {}
+        if len(shots) > 0:
+            query = (
+                Entity.query
+                .filter(Entity.project_id == project_id)
+                .filter(Entity.entity_type_id == self.shot_type_id)
+                .filter(Entity.parent_id.in_(
+                    set(shot["parent_id"] for shot in shots)
+                ))
+                .filter(Entity.name.in_(set(shot["name"] for shot in shots)))
+            )
+            for entity in query.all():
+                shot_map[(str(entity.parent_id), entity.name)] = entity
+        return shot_map
+
+    def import_rows(self, rows, project_id):
+        result = [None] * len(rows)
+        shots = {}
+        for (index, (line_number, row)) in enumerate(rows):
             try:
-                if nb_frames is None or len(nb_frames) == 0:
-                    entity = Entity.create(
-                        name=shot_name,
-                        description=description,
-                        project_id=project_id,
-                        parent_id=sequence_id,
-                        entity_type_id=shot_type["id"],
-                        data=data,
-                    )
-                else:
-                    entity = Entity.create(
-                        name=shot_name,
-                        description=description,
-                        project_id=project_id,
-                        parent_id=sequence_id,
-                        entity_type_id=shot_type["id"],
-                        nb_frames=nb_frames,
-                        data=data,
-                    )
-                events.emit(
-                    "shot:new",
-                    {"shot_id": str(entity.id)},
-                    project_id=project_id
+                shots[index] = (self.parse_row(row, project_id), row)
+            except KeyError:
+                raise
+            except Exception as e:
+                result[index] = self.get_row_error(line_number, e)
+
+        shot_map = self.get_shot_map(
+            project_id, [shot for (shot, _) in shots.values()]
+        )
+        new_shots = []
+        updated_shots = []
+        shot_ids = {}
+        for (index, (shot, row)) in shots.items():
+            key = (shot["parent_id"], shot["name"])
+            entity = shot_map.get(key, None)
+            shot["data"].update(self.get_descriptor_data(row, entity))
+            if entity is None:
+                entity = self.build_entity_row(
+                    project_id, self.shot_type_id, shot
                 )
-            except IntegrityError:
-                current_app.logger.error("Row import failed", exc_info=1)
-
-        elif self.is_update:
-            entity.update({
-                "description": description,
-                "nb_frames": nb_frames,
-                "data": data
-            })
-            events.emit(
-                "shot:update",
-                {"shot_id": str(entity.id)},
-                project_id=project_id
-            )
+                shot_map[key] = entity
+                new_shots.append(entity)
+            elif self.is_update and not isinstance(entity, dict):
+                for (field, value) in shot.items():
+                    setattr(entity, field, value)
+                updated_shots.append(entity)
+            if isinstance(entity, dict):
+                shot_ids[index] = str(entity["id"])
+            else:
+                shot_ids[index] = str(entity.id)
+
+        new_shot_ids = self.insert_entities(new_shots, "entity_uc")
+        Entity.commit()
 
-        return entity.serialize()
+        return self.build_import_result(
+            rows,
+            result,
+            shot_ids,
+            new_shot_ids,
+            set(str(entity.id) for entity in updated_shots),
+            project_id,
+            "shot",
+        )
@@ -602,7 +602,10 @@ class ProjectNotificationsResource(Resource, ArgsMixin):
         projects_service.get_project(project_id)
         page = self.get_page()
         return notifications_service.get_notifications_for_project(
-            project_id, page
+            project_id,
+            page,
+            cursor=self.get_cursor(),
+            approximate_total=self.get_approximate_total(),
         )
 
 
@@ -617,7 +620,12 @@ class ProjectTasksResource(Resource, ArgsMixin):
     def get(self, project_id):
         projects_service.get_project(project_id)
         page = self.get_page()
-        return tasks_service.get_tasks_for_project(project_id, page)
+        return tasks_service.get_tasks_for_project(
+            project_id,
+            page,
+            cursor=self.get_cursor(),
+            approximate_total=self.get_approximate_total(),
+        )
 
 
 class ProjectCommentsResource(Resource, ArgsMixin):
@@ -631,7 +639,12 @@ class ProjectCommentsResource(Resource, ArgsMixin):
     def get(self, project_id):
         projects_service.get_project(project_id)
         page = self.get_page()
-        return tasks_service.get_comments_for_project(project_id, page)
+        return tasks_service.get_comments_for_project(
+            project_id,
+            page,
+            cursor=self.get_cursor(),
+            approximate_total=self.get_approximate_total(),
+        )
 
 
 class ProjectPreviewFilesResource(Resource, ArgsMixin):
@@ -645,4 +658,9 @@ class ProjectPreviewFilesResource(Resource, ArgsMixin):
     def get(self, project_id):
         projects_service.get_project(project_id)
         page = self.get_page()
-        return files_service.get_preview_files_for_project(project_id, page)
+        return files_service.get_preview_files_for_project(
+            project_id,
+            page,
+            cursor=self.get_cursor(),
+            approximate_total=self.get_approximate_total(),
+        )
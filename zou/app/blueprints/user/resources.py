@@ -1,6 +1,6 @@
 import datetime
 
-from flask import request, abort
+from flask import request, abort, jsonify, Response
 from flask_restful import Resource, reqparse
 from flask_jwt_extended import jwt_required
 
@@ -416,9 +416,18 @@ class TimeSpentsResource(Resource):
 class ContextResource(Resource):
     """
     Return context required to run properly a full app connected to
-    the API (like the Kitsu web client).
+    the API (like the Kitsu web client). The response comes with an ETag:
+    if the client sends it back through If-None-Match and the context didn't
+    change, a 304 response is returned.
     """
 
     @jwt_required
     def get(self):
-        return user_service.get_context()
+        snapshot = user_service.get_current_context_snapshot()
+        if snapshot["etag"] in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = jsonify(snapshot["context"])
+        response.set_etag(snapshot["etag"])
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
@@ -1,5 +1,6 @@
 import os
 import datetime
+import socket
 
 from zou.app.utils import dbhelpers
 
@@ -22,7 +23,17 @@ MEMOIZE_DB_INDEX = 1
 KV_EVENTS_DB_INDEX = 2
 KV_JOB_DB_INDEX = 3
 
+MEMOIZE_LOCAL_CACHE_SIZE = int(os.getenv("MEMOIZE_LOCAL_CACHE_SIZE", 0))
+MEMOIZE_LOCAL_CACHE_TIMEOUT = int(os.getenv("MEMOIZE_LOCAL_CACHE_TIMEOUT", 60))
+
 ENABLE_JOB_QUEUE = os.getenv("ENABLE_JOB_QUEUE", "False").lower() == "true"
+# Movie previews are normalized by jobs sent to this queue. Use a dedicated
+# queue to bound the number of normalizations run at the same time on a node
+# (through the concurrency option of the worker consuming it).
+PREVIEW_JOB_QUEUE = os.getenv("PREVIEW_JOB_QUEUE", "celery")
+# Number of previews downloaded at the same time from the object storage
+# when a playlist is built.
+PLAYLIST_DOWNLOAD_WORKERS = int(os.getenv("PLAYLIST_DOWNLOAD_WORKERS", 4))
 
 JWT_BLACKLIST_ENABLED = True
 JWT_BLACKLIST_TOKEN_CHECKS = ["access", "refresh"]
@@ -63,6 +74,16 @@ PREVIEW_FOLDER = os.getenv(
 )
 TMP_DIR = os.getenv("TMP_DIR", os.path.join(os.sep, "tmp", "zou"))
 
+# When the event bus is enabled, events are appended to a Redis stream and
+# stored, published and handled by consumers (see `zou consume_events`).
+# Consumer names are made of EVENT_BUS_CONSUMER and of their process id.
+EVENT_BUS_ENABLED = os.getenv("EVENT_BUS_ENABLED", "False").lower() == "true"
+EVENT_BUS_MAX_LENGTH = int(os.getenv("EVENT_BUS_MAX_LENGTH", 1000000))
+EVENT_BUS_CONSUMER = os.getenv("EVENT_BUS_CONSUMER", socket.gethostname())
+# Events that can't be handled after this number of attempts are moved to a
+# dead-letter stream.
+EVENT_BUS_MAX_ATTEMPTS = int(os.getenv("EVENT_BUS_MAX_ATTEMPTS", 5))
+
 EVENT_STREAM_HOST = os.getenv("EVENT_STREAM_HOST", "localhost")
 EVENT_STREAM_PORT = os.getenv("EVENT_STREAM_PORT", 5001)
 EVENT_HANDLERS_FOLDER = os.getenv(
@@ -101,6 +122,12 @@ FS_S3_REGION = os.getenv("FS_S3_REGION")
 FS_S3_ENDPOINT = os.getenv("FS_S3_ENDPOINT")
 FS_S3_ACCESS_KEY = os.getenv("FS_S3_ACCESS_KEY")
 FS_S3_SECRET_KEY = os.getenv("FS_S3_SECRET_KEY")
+# Maximum size (in bytes) of the files downloaded from the object storage and
+# kept in TMP_DIR. Least recently used files are removed first by the
+# `zou evict_cache` command. Files used during the last FS_CACHE_GRACE_PERIOD
+# seconds are never removed. 0 means no limit.
+FS_CACHE_MAX_SIZE = int(os.getenv("FS_CACHE_MAX_SIZE", 10 * 1024 ** 3))
+FS_CACHE_GRACE_PERIOD = int(os.getenv("FS_CACHE_GRACE_PERIOD", 3600))
 
 LDAP_HOST = os.getenv("LDAP_HOST", "127.0.0.1")
 LDAP_PORT = os.getenv("LDAP_PORT", "389")
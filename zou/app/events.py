@@ -11,5 +11,13 @@ celery = Celery('zou', broker='redis://{}:{}/{}'.format(
     config.KEY_VALUE_STORE["port"],
     config.KV_JOB_DB_INDEX
 ))
+celery.conf.task_routes = {
+    "event_handlers.prepare_and_store_movie_task": {
+        "queue": config.PREVIEW_JOB_QUEUE
+    }
+}
+# Jobs can be long (movie normalization), don't let a worker reserve several
+# of them while other workers are idle.
+celery.conf.worker_prefetch_multiplier = 1
 
 import event_handlers
\ No newline at end of file
@@ -39,6 +39,21 @@ class ArgsMixin(object):
         options = request.args
         return int(options.get("page", "-1"))
 
+    def get_cursor(self):
+        """
+        Returns cursor requested by the user for keyset pagination. An empty
+        cursor requests the first page, None means no keyset pagination.
+        """
+        options = request.args
+        return options.get("cursor", None)
+
+    def get_approximate_total(self):
+        """
+        Returns approximate total parameter.
+        """
+        options = request.args
+        return options.get("approximate_total", "false") == "true"
+
     def get_force(self):
         """
         Returns force parameter.
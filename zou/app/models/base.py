@@ -1,8 +1,34 @@
+import copy
 import datetime
 
+from contextlib import contextmanager
+
 from sqlalchemy_utils import UUIDType
 from zou.app import db
-from zou.app.utils import fields
+from zou.app.utils import cache, fields
+
+IMPORT_BATCH_KEY = "import_batch"
+
+
+@contextmanager
+def import_batch():
+    """
+    Run the imports of the block in a single transaction: commits made by
+    the models only flush the session and cache invalidations are delayed.
+    Everything is commited at the end of the block, or rolled back if an
+    error occurs.
+    """
+    session = db.session()
+    session.info[IMPORT_BATCH_KEY] = set()
+    try:
+        yield
+        cache_tags = session.info.pop(IMPORT_BATCH_KEY)
+        session.commit()
+    except:
+        session.info.pop(IMPORT_BATCH_KEY, None)
+        session.rollback()
+        raise
+    cache.invalidate_tags(*cache_tags)
 
 
 class BaseMixin(object):
@@ -69,11 +95,12 @@ class BaseMixin(object):
         instance = cls(**kw)
         try:
             db.session.add(instance)
-            db.session.commit()
+            cls.commit()
         except:
             db.session.rollback()
             db.session.remove()
             raise
+        instance.invalidate_cache()
         return instance
 
     @classmethod
@@ -93,6 +120,7 @@ class BaseMixin(object):
         """
         result = cls.query.filter_by(**kw).delete()
         db.session.commit()
+        cache.invalidate_tags(cache.get_model_tag(cls.__tablename__))
         return result
 
     @classmethod
@@ -126,10 +154,17 @@ class BaseMixin(object):
     def create_from_import_list(cls, data_list):
         """
         Create a list of instances of the model based on data that comes from
-        the Zou API.
-        """
-        for data in data_list:
-            cls.create_from_import(data)
+        the Zou API. Existing instances are loaded with a single query and
+        the whole list is imported in a single transaction.
+        """
+        ids = [data["id"] for data in data_list if "id" in data]
+        with import_batch():
+            # Keep a reference to loaded instances, so cls.get retrieves
+            # them from the session identity map instead of querying them.
+            previous_instances = cls.query.filter(cls.id.in_(ids)).all()
+            for data in copy.deepcopy(data_list):
+                cls.create_from_import(data)
+        del previous_instances
 
     @classmethod
     def delete_from_import(cls, instance_id):
@@ -143,7 +178,35 @@ class BaseMixin(object):
 
     @classmethod
     def commit(cls):
-        db.session.commit()
+        """
+        Commit current transaction. During an import batch, changes are only
+        flushed: they will be commited at the end of the batch.
+        """
+        if IMPORT_BATCH_KEY in db.session.info:
+            db.session.flush()
+        else:
+            db.session.commit()
+
+    def get_cache_tags(self):
+        """
+        Return the cache tags that must be invalidated when current instance
+        changes: the tag of the instance and the tag of its table.
+        """
+        table_name = self.__tablename__
+        return [
+            cache.get_model_tag(table_name),
+            cache.get_model_tag(table_name, self.id),
+        ]
+
+    def invalidate_cache(self):
+        """
+        Invalidate all cached results that depend on current instance.
+        """
+        batch_cache_tags = db.session.info.get(IMPORT_BATCH_KEY, None)
+        if batch_cache_tags is not None:
+            batch_cache_tags.update(self.get_cache_tags())
+        else:
+            cache.invalidate_tags(*self.get_cache_tags())
 
     def save(self):
         """
@@ -153,24 +216,27 @@ class BaseMixin(object):
         try:
             self.updated_at = datetime.datetime.now()
             db.session.add(self)
-            db.session.commit()
+            self.commit()
         except:
             db.session.rollback()
             db.session.remove()
             raise
+        self.invalidate_cache()
 
     def delete(self):
         """
         Shorthand to delete an entry via the database session based on current
         instance id.
         """
+        cache_tags = self.get_cache_tags()
         try:
             db.session.delete(self)
-            db.session.commit()
+            self.commit()
         except:
             db.session.rollback()
             db.session.remove()
             raise
+        cache.invalidate_tags(*cache_tags)
 
     def delete_no_commit(self):
         """
@@ -190,11 +256,12 @@ class BaseMixin(object):
             for key, value in data.items():
                 setattr(self, key, value)
             db.session.add(self)
-            db.session.commit()
+            self.commit()
         except:
             db.session.rollback()
             db.session.remove()
             raise
+        self.invalidate_cache()
 
     def set_links(self, ids, LinkTable, field_left, field_right):
         for id in ids:
@@ -206,4 +273,4 @@ class BaseMixin(object):
                     kwargs={field_left: self.id, field_right: id}
                 )
                 db.session.add(link)
-        db.session.commit()
+        self.commit()
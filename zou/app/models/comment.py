@@ -93,6 +93,10 @@ class Comment(db.Model, BaseMixin, SerializerMixin):
     )
     attachment_files = db.relationship("AttachmentFile", backref="comment")
 
+    __table_args__ = (
+        db.Index("ix_comment_updated_at_id", "updated_at", "id"),
+    )
+
     def __repr__(self):
         return "<Comment of %s>" % self.object_id
 
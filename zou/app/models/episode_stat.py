@@ -0,0 +1,33 @@
+from sqlalchemy_utils import UUIDType
+
+from zou.app import db
+from zou.app.models.serializer import SerializerMixin
+from zou.app.models.base import BaseMixin
+
+
+class EpisodeStat(db.Model, BaseMixin, SerializerMixin):
+    """
+    Number of tasks and frames for a given project, episode, task type, task
+    status and retake count. This table is an aggregate of the task table
+    maintained by the stats service, that's why it doesn't declare foreign
+    keys: it can be rebuilt at any time from the tasks.
+    """
+
+    project_id = db.Column(UUIDType(binary=False), nullable=False, index=True)
+    episode_id = db.Column(UUIDType(binary=False), nullable=False, index=True)
+    task_type_id = db.Column(UUIDType(binary=False), nullable=False)
+    task_status_id = db.Column(UUIDType(binary=False), nullable=False)
+    retake_count = db.Column(db.Integer, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    frames = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "project_id",
+            "episode_id",
+            "task_type_id",
+            "task_status_id",
+            "retake_count",
+            name="episode_stat_uc",
+        ),
+    )
@@ -11,13 +11,37 @@ class ApiEvent(db.Model, BaseMixin, SerializerMixin):
     """
     Represent notable events occuring on database (asset creation,
     task assignation, etc.).
+
+    In production, the table is partitioned by month on the creation date
+    (see events_service.create_event_partitions).
+
+    The id of the transaction that stored the event is kept to read events
+    in commit order (see events_service.get_events_since).
     """
 
-    name = db.Column(db.String(80), nullable=False, index=True)
+    name = db.Column(db.String(80), nullable=False)
     user_id = db.Column(
         UUIDType(binary=False), db.ForeignKey("person.id"), index=True
     )
-    project_id = db.Column(
-        UUIDType(binary=False), db.ForeignKey("project.id"), index=True
-    )
+    project_id = db.Column(UUIDType(binary=False), db.ForeignKey("project.id"))
     data = db.Column(JSONB)
+    transaction_id = db.Column(
+        db.BigInteger,
+        nullable=False,
+        server_default=db.text("txid_current()"),
+    )
+
+    __table_args__ = (
+        db.Index("ix_api_event_updated_at_id", "updated_at", "id"),
+        db.Index("ix_api_event_created_at_id", "created_at", "id"),
+        db.Index(
+            "ix_api_event_project_id_created_at", "project_id", "created_at"
+        ),
+        db.Index("ix_api_event_name_created_at", "name", "created_at"),
+        db.Index(
+            "ix_api_event_transaction_id_created_at_id",
+            "transaction_id",
+            "created_at",
+            "id",
+        ),
+    )
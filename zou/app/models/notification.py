@@ -2,6 +2,7 @@ from sqlalchemy_utils import UUIDType, ChoiceType
 from sqlalchemy.inspection import inspect
 
 from zou.app import db
+from zou.app.utils import cache
 from zou.app.models.serializer import SerializerMixin
 from zou.app.utils.fields import serialize_value
 from zou.app.models.base import BaseMixin
@@ -54,6 +55,7 @@ class Notification(db.Model, BaseMixin, SerializerMixin):
             "type",
             name="notification_uc",
         ),
+        db.Index("ix_notification_updated_at_id", "updated_at", "id"),
     )
 
     def serialize(self, obj_type=None, relations=False):
@@ -65,6 +67,15 @@ class Notification(db.Model, BaseMixin, SerializerMixin):
         obj_dict["type"] = obj_type or type(self).__name__
         return obj_dict
 
+    def get_cache_tags(self):
+        """
+        User contexts embed the last notifications of their user, so a
+        notification change invalidates the context of its recipient.
+        """
+        return BaseMixin.get_cache_tags(self) + [
+            cache.get_model_tag("person_notifications", self.person_id)
+        ]
+
     @classmethod
     def create_from_import(cls, data):
         notification_type = ""
@@ -1,4 +1,4 @@
-from sqlalchemy_utils import UUIDType
+from sqlalchemy_utils import UUIDType, ChoiceType
 
 from zou.app import db
 from zou.app.models.serializer import SerializerMixin
@@ -6,6 +6,12 @@ from zou.app.models.base import BaseMixin
 
 from sqlalchemy.dialects.postgresql import JSONB
 
+STATUSES = [
+    ("processing", "Processing"),
+    ("ready", "Ready"),
+    ("broken", "Broken"),
+]
+
 
 class PreviewFile(db.Model, BaseMixin, SerializerMixin):
     """
@@ -21,6 +27,7 @@ class PreviewFile(db.Model, BaseMixin, SerializerMixin):
     description = db.Column(db.Text())
     path = db.Column(db.String(400))
     source = db.Column(db.String(40))
+    status = db.Column(ChoiceType(STATUSES), default="ready")
 
     annotations = db.Column(JSONB)
 
@@ -34,6 +41,7 @@ class PreviewFile(db.Model, BaseMixin, SerializerMixin):
 
     __table_args__ = (
         db.UniqueConstraint("name", "task_id", "revision", name="preview_uc"),
+        db.Index("ix_preview_file_updated_at_id", "updated_at", "id"),
     )
 
     shotgun_id = db.Column(db.Integer, unique=True)
@@ -99,7 +99,7 @@ class Project(db.Model, BaseMixin, SerializerMixin):
                     project_id=self.id, person_id=person_id
                 )
                 db.session.add(link)
-        db.session.commit()
+        self.commit()
 
     def set_task_types(self, task_type_ids):
         return self.set_links(
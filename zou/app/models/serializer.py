@@ -1,14 +1,70 @@
+import sqlalchemy as sa
 import sqlalchemy.orm as orm
+
+from sqlalchemy import event
 from sqlalchemy.inspection import inspect
 from sqlalchemy.orm.collections import InstrumentedList
+from sqlalchemy_utils import UUIDType
+
+from zou.app.utils import fields
 from zou.app.utils.fields import serialize_value
 
 
+def get_column_converter(column):
+    """
+    Return the function to use to serialize values of given column. Most
+    common types get a specialized function, others fallback on the generic
+    serialize_value.
+    """
+    column_type = column.type
+    if isinstance(column_type, UUIDType):
+        return fields.serialize_uuid
+    elif isinstance(column_type, sa.DateTime):
+        return fields.serialize_datetime
+    elif isinstance(column_type, sa.Date):
+        return fields.serialize_date
+    elif isinstance(column_type, (sa.String, sa.Integer, sa.Boolean)):
+        return fields.serialize_scalar
+    else:
+        return serialize_value
+
+
+def compile_serializer(model):
+    """
+    Build the list of attributes to serialize for given model. Each attribute
+    comes with a flag telling if it's a join and with the function that
+    converts its value. It avoids model introspection at serialization time.
+    """
+    attributes = []
+    for key, prop in inspect(model).attrs.items():
+        is_join = isinstance(
+            getattr(model, key).impl, orm.attributes.CollectionAttributeImpl
+        )
+        if isinstance(prop, orm.ColumnProperty) and len(prop.columns) == 1:
+            converter = get_column_converter(prop.columns[0])
+        else:
+            converter = serialize_value
+        attributes.append((key, is_join, converter))
+    return attributes
+
+
 class SerializerMixin(object):
     """
     Helpers to facilitate JSON serialization of models.
     """
 
+    @classmethod
+    def get_serializer(cls):
+        """
+        Return the serializer compiled for current model. It's compiled once
+        all mappers are configured, or on first use if needed.
+        """
+        serializer = cls.__dict__.get("_serializer", None)
+        if serializer is None:
+            serializer = compile_serializer(cls)
+            cls._serializer = serializer
+        return serializer
+
     def is_join(self, attr):
         return isinstance(
             getattr(self.__class__, attr).impl,
@@ -16,20 +72,10 @@ class SerializerMixin(object):
         )
 
     def serialize(self, obj_type=None, relations=False, ignores=[]):
-        attrs = inspect(self).attrs.keys()
-        attrs = [attr for attr in attrs if attr not in ignores]
         obj_dict = {}
-
-        if relations:
-            obj_dict = {
-                attr: serialize_value(getattr(self, attr)) for attr in attrs
-            }
-        else:
-            obj_dict = {
-                attr: serialize_value(getattr(self, attr))
-                for attr in attrs
-                if not self.is_join(attr)
-            }
+        for (attr, is_join, converter) in self.get_serializer():
+            if (relations or not is_join) and attr not in ignores:
+                obj_dict[attr] = converter(getattr(self, attr))
         obj_dict["type"] = obj_type or type(self).__name__
         return obj_dict
 
@@ -41,6 +87,28 @@ class SerializerMixin(object):
         ]
 
 
+def get_model_classes(base_class):
+    """
+    Return all subclasses of given class, recursively.
+    """
+    model_classes = []
+    for model_class in base_class.__subclasses__():
+        model_classes.append(model_class)
+        model_classes += get_model_classes(model_class)
+    return model_classes
+
+
+@event.listens_for(orm.Mapper, "after_configured")
+def compile_serializers():
+    """
+    Compile serializers of all models once their mappers are configured
+    (relations, including backrefs, are known at this point).
+    """
+    for model_class in get_model_classes(SerializerMixin):
+        if hasattr(model_class, "__mapper__"):
+            model_class._serializer = compile_serializer(model_class)
+
+
 class OutputFileSerializer(object):
     """
     Helpers to JSON serialization of OutputFile with ignore some fields.
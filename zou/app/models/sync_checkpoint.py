@@ -0,0 +1,20 @@
+from sqlalchemy_utils import UUIDType
+
+from zou.app import db
+from zou.app.models.serializer import SerializerMixin
+from zou.app.models.base import BaseMixin
+
+
+class SyncCheckpoint(db.Model, BaseMixin, SerializerMixin):
+    """
+    Progress of the import of a model from another instance, globally or for
+    a given project. It allows to resume an interrupted synchronisation where
+    it stopped: the last imported page or the cursor of the next page is
+    stored.
+    """
+
+    model_name = db.Column(db.String(80), nullable=False, index=True)
+    project_id = db.Column(UUIDType(binary=False), index=True)
+    page = db.Column(db.Integer, default=0)
+    cursor = db.Column(db.Text())
+    is_done = db.Column(db.Boolean, default=False)
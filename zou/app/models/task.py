@@ -3,6 +3,7 @@ from sqlalchemy.dialects.postgresql import JSONB
 from zou.app import db
 from zou.app.models.serializer import SerializerMixin
 from zou.app.models.base import BaseMixin
+from zou.app.utils import cache
 
 
 assignees_table = db.Table(
@@ -67,8 +68,18 @@ class Task(db.Model, BaseMixin, SerializerMixin):
         db.UniqueConstraint(
             "name", "project_id", "task_type_id", "entity_id", name="task_uc"
         ),
+        db.Index("ix_task_updated_at_id", "updated_at", "id"),
     )
 
+    def get_cache_tags(self):
+        """
+        Entity data embeds the data of its tasks, so a task change invalidates
+        its entity too.
+        """
+        return BaseMixin.get_cache_tags(self) + [
+            cache.get_model_tag("entity", self.entity_id)
+        ]
+
     def assignees_as_string(self):
         return ", ".join([x.full_name() for x in self.assignees])
 
@@ -1,6 +1,6 @@
 from sqlalchemy.exc import StatementError
 
-from zou.app.utils import events, fields, cache
+from zou.app.utils import events, fields, cache, streaming
 from zou.app.utils import query as query_utils
 
 from zou.app.models.entity import Entity
@@ -133,7 +133,16 @@ def get_assets_and_tasks(criterions={}, page=1):
     """
     Get all assets for given criterions with related tasks for each asset.
     """
-    asset_map = {}
+    return list(iter_assets_and_tasks(criterions))
+
+
+def iter_assets_and_tasks(criterions={}):
+    """
+    Generate assets for given criterions with related tasks for each asset.
+    Rows are read through a server-side cursor and ordered by asset, so each
+    asset is yielded as soon as all its rows are read.
+    """
+    asset_dict = None
     task_map = {}
 
     query = (
@@ -157,7 +166,7 @@ def get_assets_and_tasks(criterions={}, page=1):
             Task.last_comment_date,
             assignees_table.columns.person,
         )
-        .order_by(EntityType.name, Entity.name)
+        .order_by(EntityType.name, Entity.name, Entity.id)
     )
 
     if "id" in criterions:
@@ -192,15 +201,18 @@ def get_assets_and_tasks(criterions={}, page=1):
         task_due_date,
         task_last_comment_date,
         person_id,
-    ) in query.all():
+    ) in query.yield_per(streaming.STREAM_CHUNK_SIZE):
 
         if asset.source_id is None:
             source_id = ""
         else:
             source_id = str(asset.source_id)
 
-        if asset.id not in asset_map:
-            asset_map[asset.id] = {
+        if asset_dict is None or asset_dict["id"] != str(asset.id):
+            if asset_dict is not None:
+                yield asset_dict
+            task_map = {}
+            asset_dict = {
                 "id": str(asset.id),
                 "name": asset.name,
                 "preview_file_id": str(asset.preview_file_id or ""),
@@ -236,13 +248,13 @@ def get_assets_and_tasks(criterions={}, page=1):
                     "assignees": [],
                 }
                 task_map[task_id] = task_dict
-                asset_dict = asset_map[asset.id]
                 asset_dict["tasks"].append(task_dict)
 
             if person_id:
                 task_map[task_id]["assignees"].append(str(person_id))
 
-    return list(asset_map.values())
+    if asset_dict is not None:
+        yield asset_dict
 
 
 @cache.memoize_function(240)
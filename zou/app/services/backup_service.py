@@ -10,7 +10,7 @@ from zou.app.models.preview_file import PreviewFile
 from zou.app.models.project import Project
 
 from zou.app.stores import file_store
-from zou.app.utils import date_helpers
+from zou.app.utils import date_helpers, transfers
 
 from flask_fs.backends.local import LocalBackend
 
@@ -59,7 +59,9 @@ def store_db_backup(filename):
         file_store.add_file("dbbackup", filename, filename)
 
 
-def upload_preview_files_to_storage(days=None):
+def upload_preview_files_to_storage(
+    days=None, workers=transfers.TRANSFER_WORKERS
+):
     """
     Upload all thumbnail and original files for preview entries to object
     storage.
@@ -69,42 +71,63 @@ def upload_preview_files_to_storage(days=None):
         limit_date = date_helpers.get_date_from_now(int(days))
         query = query.filter(PreviewFile.updated_at >= limit_date)
 
-    for preview_file in query.all():
-        upload_preview(preview_file)
+    def get_transfers():
+        for preview_file in query.yield_per(500):
+            for transfer in get_preview_transfers(preview_file):
+                yield transfer
 
+    return transfers.run_transfers(get_transfers(), workers=workers)
 
-def upload_entity_thumbnail(entity):
+
+def get_storage_upload(file_path, prefix, ul_func, size_func, file_id):
     """
-    Upload thumbnail file for given entity to object storage.
+    Build the upload of given local file to object storage. It's skipped if
+    the stored file has the same size as the local one.
     """
-    preview_folder = os.getenv("PREVIEW_FOLDER", "/opt/zou/previews")
-    local = LocalBackend(
-        "local", {"root": os.path.join(preview_folder, "pictures")}
-    )
+    from zou.app import app
 
-    file_path = local.path("thumbnails-" + str(entity.id))
-    if entity.has_avatar:
-        file_store.add_picture("thumbnails", str(entity.id), file_path)
-        print("%s uploaded" % file_path)
+    def run():
+        with app.app_context():
+            ul_func(prefix, file_id, file_path)
+            return os.path.getsize(file_path)
 
+    def is_done():
+        with app.app_context():
+            try:
+                return size_func(prefix, file_id) == \
+                    os.path.getsize(file_path)
+            except Exception:
+                return False
 
-def upload_preview(preview_file):
+    return transfers.Transfer(file_path, run, is_done)
+
+
+def get_entity_thumbnail_transfer(entity):
     """
-    Upload all files link to preview file entry: orginal file and variants.
+    Build the upload of the thumbnail file of given entity to object storage.
     """
-    print("upload preview %s (%s)" % (preview_file.id, preview_file.extension))
-
-    preview_folder = os.getenv("PREVIEW_FOLDER", "/opt/zou/previews")
-    local_picture = LocalBackend(
-        "local", {"root": os.path.join(preview_folder, "pictures")}
-    )
-    local_movie = LocalBackend(
-        "local", {"root": os.path.join(preview_folder, "movies")}
-    )
-    local_file = LocalBackend(
-        "local", {"root": os.path.join(preview_folder, "files")}
+    return get_storage_upload(
+        local_picture.path("thumbnails-" + str(entity.id)),
+        "thumbnails",
+        file_store.add_picture,
+        file_store.get_picture_size,
+        str(entity.id),
     )
 
+
+def upload_entity_thumbnail(entity):
+    """
+    Upload thumbnail file for given entity to object storage.
+    """
+    if entity.has_avatar:
+        transfers.run_transfers([get_entity_thumbnail_transfer(entity)])
+
+
+def get_preview_transfers(preview_file):
+    """
+    Build the uploads of all local files linked to given preview file: original
+    file and variants.
+    """
     is_movie = preview_file.extension == "mp4"
     is_picture = preview_file.extension == "png"
     is_file = not is_movie and not is_picture
@@ -114,46 +137,63 @@ def upload_preview(preview_file):
     if is_picture:
         file_path = local_picture.path(file_key)
         ul_func = file_store.add_picture
-        exists_func = file_store.exists_picture
+        size_func = file_store.get_picture_size
     elif is_movie:
         file_path = local_movie.path(file_key)
         ul_func = file_store.add_movie
-        exists_func = file_store.exists_movie
+        size_func = file_store.get_movie_size
     elif is_file:
         file_path = local_file.path(file_key)
         ul_func = file_store.add_file
-        exists_func = file_store.exists_file
+        size_func = file_store.get_file_size
 
+    preview_transfers = []
     if is_movie or is_picture:
         for prefix in ["thumbnails", "thumbnails-square", "original"]:
             pic_file_path = local_picture.path(
-                "%s-%s" % (prefix, str(preview_file.id))
+                "%s-%s" % (prefix, preview_file_id)
             )
-            if os.path.exists(pic_file_path) and not file_store.exists_picture(
-                prefix, preview_file_id
-            ):
-                file_store.add_picture(prefix, preview_file_id, pic_file_path)
+            if os.path.exists(pic_file_path):
+                preview_transfers.append(get_storage_upload(
+                    pic_file_path,
+                    prefix,
+                    file_store.add_picture,
+                    file_store.get_picture_size,
+                    preview_file_id,
+                ))
+
+    if os.path.exists(file_path):
+        preview_transfers.append(get_storage_upload(
+            file_path, "previews", ul_func, size_func, preview_file_id
+        ))
+    return preview_transfers
 
-    prefix = "previews"
-    if os.path.exists(file_path) and not exists_func(prefix, preview_file_id):
-        ul_func(prefix, preview_file_id, file_path)
-    print("%s uploaded" % file_path)
+
+def upload_preview(preview_file):
+    """
+    Upload all files link to preview file entry: orginal file and variants.
+    """
+    print("upload preview %s (%s)" % (preview_file.id, preview_file.extension))
+    transfers.run_transfers(get_preview_transfers(preview_file))
 
 
-def upload_entity_thumbnails_to_storage(days=None):
+def upload_entity_thumbnails_to_storage(
+    days=None, workers=transfers.TRANSFER_WORKERS
+):
     """
     Upload all thumbnail files for non preview entries to object storage.
     """
-    upload_entity_thumbnails(Project, days)
-    upload_entity_thumbnails(Organisation, days)
-    upload_entity_thumbnails(Person, days)
+    def get_transfers():
+        for model in [Project, Organisation, Person]:
+            for entity in get_entities_to_upload(model, days):
+                yield get_entity_thumbnail_transfer(entity)
 
+    return transfers.run_transfers(get_transfers(), workers=workers)
 
-def upload_entity_thumbnails(model, days=None):
-    query = model.query
+
+def get_entities_to_upload(model, days=None):
+    query = model.query.filter_by(has_avatar=True)
     if days is not None:
         limit_date = date_helpers.get_date_from_now(int(days))
         query = query.filter(model.updated_at >= limit_date)
-
-    for entity in query.all():
-        upload_entity_thumbnail(entity)
+    return query.all()
@@ -1,4 +1,5 @@
 import datetime
+import functools
 import re
 
 from flask import current_app
@@ -11,7 +12,7 @@ from zou.app.models.comment import (
     mentions_table,
     preview_link_table
 )
-from zou.app.models.project import Project
+from zou.app.models.project import ProjectPersonLink
 
 from zou.app.services import (
     base_service,
@@ -31,6 +32,8 @@ from zou.app.utils import cache, events, fs, fields
 from zou.app.stores import file_store
 from zou.app import config
 
+import event_handlers
+
 
 def get_attachment_file_raw(attachment_file_id):
     return base_service.get_instance(
@@ -143,6 +146,20 @@ def _manage_status_change(task_status, task, comment):
 
 
 def _manage_subscriptions(task, comment, status_changed):
+    """
+    Create notifications and news related to given comment and send emails to
+    recipients. Use the job queue if it is activated, the comment is already
+    committed at this point.
+    """
+    if config.ENABLE_JOB_QUEUE:
+        event_handlers.manage_comment_subscriptions_task.delay(
+            task["id"], comment["id"], status_changed
+        )
+    else:
+        manage_comment_subscriptions(task, comment, status_changed)
+
+
+def manage_comment_subscriptions(task, comment, status_changed):
     notifications_service.create_notifications_for_task_and_comment(
         task, comment, change=status_changed
     )
@@ -151,6 +168,25 @@ def _manage_subscriptions(task, comment, status_changed):
     )
 
 
+def manage_comment_subscriptions_job(task_id, comment_id, status_changed):
+    """
+    Create notifications, news and emails for given comment. This function is
+    aimed at being run as a job in a job queue. It can be retried: persons
+    already notified and existing news are skipped.
+    """
+    from zou.app import app
+
+    with app.app_context():
+        try:
+            task = tasks_service.get_task_with_relations(task_id)
+            comment = Comment.get(comment_id).serialize(relations=True)
+            manage_comment_subscriptions(task, comment, status_changed)
+        except Exception as e:
+            current_app.logger.error(e, exc_info=1)
+            current_app.logger.error("Comment notifications failed.")
+            raise
+
+
 def new_comment(
     task_id, task_status_id, person_id, text,
     object_type="Task", files={}, checklist=[], created_at=""
@@ -195,18 +231,70 @@ def new_comment(
     return comment
 
 
+def get_team_names_cache_tags(team_names):
+    return [
+        cache.get_model_tag("project", team_names["project_id"]),
+        cache.get_model_tag("person"),
+    ]
+
+
+@cache.memoize_function(36000, tags=get_team_names_cache_tags)
+def get_team_names(project_id):
+    """
+    Return the full names of the members of given project team, with their
+    ids.
+    """
+    query = (
+        db.session.query(Person.id, Person.first_name, Person.last_name)
+        .join(ProjectPersonLink)
+        .filter(ProjectPersonLink.project_id == project_id)
+    )
+    return {
+        "project_id": str(project_id),
+        "team": [
+            [str(person_id), "%s %s" % (first_name, last_name)]
+            for (person_id, first_name, last_name) in query.all()
+        ],
+    }
+
+
+@functools.lru_cache(maxsize=128)
+def get_mention_matcher(full_names):
+    """
+    Compile a single regular expression matching a mention of any of given
+    full names. Longest names are tried first.
+    """
+    names = sorted(full_names, key=len, reverse=True)
+    return re.compile(
+        "@(%s)(?= |$)" % "|".join(re.escape(name) for name in names)
+    )
+
+
 def get_comment_mentions(object_id, text):
     """
     Check for people mention (@full name) in text and returns matching person
-    active records.
+    active records. The text is scanned once with a matcher built for the
+    project team.
     """
-    task = tasks_service.get_task_raw(object_id)
-    project = Project.get(task.project_id)
-    mentions = []
-    for person in project.team:
-        if re.search("@%s( |$)" % person.full_name(), text) is not None:
-            mentions.append(person)
-    return mentions
+    if "@" not in text:
+        return []
+
+    task = tasks_service.get_task(object_id)
+    team = get_team_names(task["project_id"])["team"]
+    if len(team) == 0:
+        return []
+
+    person_ids = {}
+    for (person_id, full_name) in team:
+        person_ids.setdefault(full_name, []).append(person_id)
+    matcher = get_mention_matcher(tuple(sorted(person_ids.keys())))
+
+    mentioned_ids = set()
+    for match in matcher.finditer(text):
+        mentioned_ids.update(person_ids[match.group(1)])
+    if len(mentioned_ids) == 0:
+        return []
+    return Person.query.filter(Person.id.in_(mentioned_ids)).all()
 
 
 def reset_mentions(comment):
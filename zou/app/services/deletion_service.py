@@ -1,36 +1,65 @@
 import datetime
-from sqlalchemy.exc import IntegrityError
 
+from flask import current_app
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
 
-from zou.app.models.comment import Comment
+from zou.app import db
+from zou.app.models.asset_instance import AssetInstance
+from zou.app.models.attachment_file import AttachmentFile
+from zou.app.models.build_job import BuildJob
+from zou.app.models.children_file import ChildrenFile
+from zou.app.models.comment import (
+    Comment,
+    acknowledgements_table,
+    mentions_table,
+    preview_link_table,
+)
+from zou.app.models.dependent_file import DependentFile
 from zou.app.models.desktop_login_log import DesktopLoginLog
-from zou.app.models.entity import Entity, EntityLink, EntityVersion
+from zou.app.models.entity import (
+    AssetInstanceLink,
+    Entity,
+    EntityLink,
+    EntityVersion,
+)
+from zou.app.models.episode_stat import EpisodeStat
 from zou.app.models.event import ApiEvent
 from zou.app.models.metadata_descriptor import MetadataDescriptor
 from zou.app.models.login_log import LoginLog
 from zou.app.models.milestone import Milestone
 from zou.app.models.notification import Notification
 from zou.app.models.news import News
-from zou.app.models.output_file import OutputFile
+from zou.app.models.output_file import OutputFile, dependent_table
 from zou.app.models.person import Person
 from zou.app.models.playlist import Playlist
 from zou.app.models.preview_file import PreviewFile
-from zou.app.models.project import Project
+from zou.app.models.project import (
+    Project,
+    ProjectAssetTypeLink,
+    ProjectPersonLink,
+    ProjectTaskStatusLink,
+    ProjectTaskTypeLink,
+)
 from zou.app.models.schedule_item import ScheduleItem
 from zou.app.models.search_filter import SearchFilter
 from zou.app.models.subscription import Subscription
-from zou.app.models.task import Task
+from zou.app.models.task import Task, assignees_table
 from zou.app.models.time_spent import TimeSpent
 from zou.app.models.working_file import WorkingFile
 
-from zou.app.utils import events, fields
+from zou.app.utils import cache, events, fields
 from zou.app.stores import file_store
 
+from zou.app.services import events_service
+
 from zou.app.services.exception import (
     CommentNotFoundException,
     ModelWithRelationsDeletionException,
 )
 
+PROJECT_FILE_BATCH_SIZE = 100
+
 
 def remove_comment(comment_id):
     comment = Comment.get(comment_id)
@@ -233,46 +262,254 @@ def remove_tasks_for_project_and_task_type(project_id, task_type_id):
     return task_ids
 
 
-def remove_project(project_id):
-    from zou.app.services import playlists_service
+def remove_project(project_id, progress=None):
+    """
+    Remove given project and all the data related to it. Data are removed
+    table by table, in dependency order, through set-based deletes run in a
+    single transaction. Files related to previews, attachments and playlist
+    builds are removed from the storage by batches once the transaction is
+    committed. Progress is reported to given function (logged by default).
+    """
+    if progress is None:
+        progress = log_project_deletion_progress
+
+    task_ids = select([Task.id]).where(Task.project_id == project_id)
+    entity_ids = select([Entity.id]).where(Entity.project_id == project_id)
+    comment_ids = select([Comment.id]).where(Comment.object_id.in_(task_ids))
+    playlist_ids = select([Playlist.id]).where(
+        Playlist.project_id == project_id
+    )
+    asset_instance_ids = select([AssetInstance.id]).where(
+        or_(
+            AssetInstance.asset_id.in_(entity_ids),
+            AssetInstance.entity_id.in_(entity_ids),
+            AssetInstance.scene_id.in_(entity_ids),
+            AssetInstance.target_asset_id.in_(entity_ids),
+        )
+    )
+    working_file_ids = select([WorkingFile.id]).where(
+        or_(
+            WorkingFile.task_id.in_(task_ids),
+            WorkingFile.entity_id.in_(entity_ids),
+        )
+    )
+    output_file_ids = select([OutputFile.id]).where(
+        or_(
+            OutputFile.source_file_id.in_(working_file_ids),
+            OutputFile.entity_id.in_(entity_ids),
+            OutputFile.temporal_entity_id.in_(entity_ids),
+            OutputFile.asset_instance_id.in_(asset_instance_ids),
+        )
+    )
+    dependent_file_ids = select([DependentFile.id]).where(
+        or_(
+            DependentFile.project_id == project_id,
+            DependentFile.source_output_file_id.in_(output_file_ids),
+            DependentFile.temporal_entity_id.in_(entity_ids),
+        )
+    )
 
-    tasks = Task.query.filter_by(project_id=project_id)
-    for task in tasks:
-        remove_task(task.id, force=True)
+    stored_files = _get_project_stored_files(
+        task_ids, comment_ids, playlist_ids
+    )
+    instance_tags = _get_project_instance_cache_tags(
+        task_ids, entity_ids, comment_ids
+    )
+
+    db.session.execute(
+        Entity.__table__.update()
+        .where(Entity.project_id == project_id)
+        .values(preview_file_id=None)
+    )
+    db.session.execute(
+        Comment.__table__.update()
+        .where(Comment.id.in_(comment_ids))
+        .values(preview_file_id=None)
+    )
+    deletions = [
+        (News, or_(
+            News.task_id.in_(task_ids),
+            News.comment_id.in_(comment_ids),
+        )),
+        (Notification, or_(
+            Notification.task_id.in_(task_ids),
+            Notification.comment_id.in_(comment_ids),
+        )),
+        (preview_link_table, preview_link_table.c.comment.in_(comment_ids)),
+        (mentions_table, mentions_table.c.comment.in_(comment_ids)),
+        (
+            acknowledgements_table,
+            acknowledgements_table.c.comment.in_(comment_ids)
+        ),
+        (AttachmentFile, AttachmentFile.comment_id.in_(comment_ids)),
+        (Comment, Comment.id.in_(comment_ids)),
+        (PreviewFile, PreviewFile.task_id.in_(task_ids)),
+        (dependent_table, or_(
+            dependent_table.c.output_file_id.in_(output_file_ids),
+            dependent_table.c.dependent_file_id.in_(dependent_file_ids),
+        )),
+        (DependentFile, DependentFile.id.in_(dependent_file_ids)),
+        (ChildrenFile, or_(
+            ChildrenFile.parent_file_id.in_(output_file_ids),
+            ChildrenFile.temporal_entity_id.in_(entity_ids),
+        )),
+        (OutputFile, OutputFile.id.in_(output_file_ids)),
+        (WorkingFile, WorkingFile.id.in_(working_file_ids)),
+        (Subscription, or_(
+            Subscription.task_id.in_(task_ids),
+            Subscription.entity_id.in_(entity_ids),
+        )),
+        (TimeSpent, TimeSpent.task_id.in_(task_ids)),
+        (assignees_table, assignees_table.c.task.in_(task_ids)),
+        (Task, Task.project_id == project_id),
+        (AssetInstanceLink, or_(
+            AssetInstanceLink.entity_id.in_(entity_ids),
+            AssetInstanceLink.asset_instance_id.in_(asset_instance_ids),
+        )),
+        (AssetInstance, AssetInstance.id.in_(asset_instance_ids)),
+        (EntityLink, or_(
+            EntityLink.entity_in_id.in_(entity_ids),
+            EntityLink.entity_out_id.in_(entity_ids),
+        )),
+        (EntityVersion, EntityVersion.entity_id.in_(entity_ids)),
+        (BuildJob, BuildJob.playlist_id.in_(playlist_ids)),
+        (Playlist, Playlist.project_id == project_id),
+        (ApiEvent, ApiEvent.project_id == project_id),
+        (EpisodeStat, EpisodeStat.project_id == project_id),
+        (MetadataDescriptor, MetadataDescriptor.project_id == project_id),
+        (Milestone, Milestone.project_id == project_id),
+        (ScheduleItem, ScheduleItem.project_id == project_id),
+        (SearchFilter, SearchFilter.project_id == project_id),
+        (Entity, Entity.project_id == project_id),
+        (ProjectPersonLink, ProjectPersonLink.project_id == project_id),
+        (ProjectAssetTypeLink, ProjectAssetTypeLink.project_id == project_id),
+        (ProjectTaskTypeLink, ProjectTaskTypeLink.project_id == project_id),
+        (
+            ProjectTaskStatusLink,
+            ProjectTaskStatusLink.project_id == project_id
+        ),
+        (Project, Project.id == project_id),
+    ]
 
-    query = EntityLink.query.join(
-        Entity, EntityLink.entity_in_id == Entity.id
-    ).filter(Entity.project_id == project_id)
-    for link in query:
-        link.delete_no_commit()
-    EntityLink.commit()
-
-    query = EntityVersion.query.join(
-        Entity, EntityVersion.entity_id == Entity.id
-    ).filter(Entity.project_id == project_id)
-    for version in query:
-        version.delete_no_commit()
-    EntityLink.commit()
-
-    playlists = Playlist.query.filter_by(project_id=project_id)
-    for playlist in playlists:
-        playlists_service.remove_playlist(playlist.id)
-
-    ApiEvent.delete_all_by(project_id=project_id)
-    Entity.delete_all_by(project_id=project_id)
-    MetadataDescriptor.delete_all_by(project_id=project_id)
-    Milestone.delete_all_by(project_id=project_id)
-    ScheduleItem.delete_all_by(project_id=project_id)
-    SearchFilter.delete_all_by(project_id=project_id)
-
-    for news in News.query.join(Task).filter_by(project_id=project_id).all():
-        news.delete_no_commit()
-    News.commit()
-    project = Project.get(project_id)
-    project.delete()
+    table_names = []
+    try:
+        for (model, condition) in deletions:
+            table = getattr(model, "__table__", model)
+            result = db.session.execute(table.delete().where(condition))
+            table_names.append(table.name)
+            progress(project_id, table.name, result.rowcount)
+        db.session.commit()
+    except:
+        db.session.rollback()
+        db.session.remove()
+        raise
+
+    cache.invalidate_tags(
+        *[cache.get_model_tag(table_name) for table_name in table_names]
+    )
+    cache.invalidate_tags(*instance_tags)
+    remove_project_stored_files(project_id, stored_files, progress)
+    events.emit("project:delete", {"project_id": project_id}, persist=False)
     return project_id
 
 
+def _get_project_instance_cache_tags(task_ids, entity_ids, comment_ids):
+    """
+    List the cache tags of the tasks, entities and comments of a project.
+    Cached results depending on a single instance are tagged with the
+    instance only, so these tags must be invalidated once the instances are
+    deleted. They are collected before the deletion.
+    """
+    tags = []
+    for (table_name, ids) in [
+        ("task", task_ids),
+        ("entity", entity_ids),
+        ("comment", comment_ids),
+    ]:
+        tags += [
+            cache.get_model_tag(table_name, str(instance_id))
+            for (instance_id,) in db.session.execute(ids)
+        ]
+    return tags
+
+
+def log_project_deletion_progress(project_id, step, count):
+    current_app.logger.info(
+        "Project %s deletion: %s (%s)" % (project_id, step, count)
+    )
+
+
+def _get_project_stored_files(task_ids, comment_ids, playlist_ids):
+    """
+    List files kept in the storage for the data of the project, as (type, id)
+    tuples. It must be run before the data are deleted.
+    """
+    stored_files = []
+    for (preview_file_id, extension) in db.session.query(
+        PreviewFile.id, PreviewFile.extension
+    ).filter(PreviewFile.task_id.in_(task_ids)):
+        if extension == "png":
+            stored_files.append(("picture", preview_file_id))
+        elif extension == "mp4":
+            stored_files.append(("movie", preview_file_id))
+        else:
+            stored_files.append(("file", preview_file_id))
+    stored_files += [
+        ("attachment", attachment_file_id)
+        for (attachment_file_id,) in db.session.query(AttachmentFile.id)
+        .filter(AttachmentFile.comment_id.in_(comment_ids))
+    ]
+    stored_files += [
+        ("build-job", build_job_id)
+        for (build_job_id,) in db.session.query(BuildJob.id)
+        .filter(BuildJob.playlist_id.in_(playlist_ids))
+    ]
+    return stored_files
+
+
+def remove_project_stored_files(project_id, stored_files, progress):
+    """
+    Remove from the storage given files, by batches of
+    PROJECT_FILE_BATCH_SIZE files.
+    """
+    for index in range(0, len(stored_files), PROJECT_FILE_BATCH_SIZE):
+        batch = stored_files[index:index + PROJECT_FILE_BATCH_SIZE]
+        for (file_type, file_id) in batch:
+            if file_type == "picture":
+                clear_picture_files(file_id)
+            elif file_type == "movie":
+                clear_movie_files(file_id)
+            elif file_type == "file":
+                clear_generic_files(file_id)
+            elif file_type == "attachment":
+                try:
+                    file_store.remove_file("attachments", file_id)
+                except:
+                    pass
+            else:
+                try:
+                    file_store.remove_movie("playlists", file_id)
+                except:
+                    pass
+        progress(project_id, "stored files", index + len(batch))
+
+
+def remove_project_job(project_id):
+    """
+    Remove given project. This function is aimed at being run as a job in a
+    job queue.
+    """
+    from zou.app import app
+
+    with app.app_context():
+        try:
+            remove_project(project_id)
+        except Exception as e:
+            current_app.logger.error(e, exc_info=1)
+            current_app.logger.error("Project deletion failed.")
+            raise
+
+
 def remove_person(person_id, force=True):
     person = Person.get(person_id)
     if force:
@@ -328,9 +565,12 @@ def remove_person(person_id, force=True):
 
 def remove_old_events(days_old=90):
     """
-    Remove events older than *days_old*.
+    Remove events older than *days_old*. When the event table is partitioned,
+    the partitions of the months before this date are dropped and only the
+    remaining old events are deleted one by one.
     """
-    limit_date = datetime.datetime.now() - datetime.timedelta(days=90)
+    limit_date = datetime.datetime.now() - datetime.timedelta(days=days_old)
+    events_service.remove_event_partitions(limit_date)
     ApiEvent.query.filter(ApiEvent.created_at < limit_date).delete()
     ApiEvent.commit()
 
@@ -32,7 +32,7 @@ def send_notification(person_id, subject, messages):
         userid = person["notifications_slack_userid"]
         token = organisation.get("chat_token_slack", "")
         if config.ENABLE_JOB_QUEUE:
-            event_handlers.send_to_slack_task.delay(chats.send_to_slack, token, userid, slack_message)
+            event_handlers.send_to_slack_task.delay(token, userid, slack_message)
         else:
             chats.send_to_slack(token, userid, slack_message)
 
@@ -1,6 +1,41 @@
+import datetime
+import re
+import time
+
+from flask import current_app
+from sqlalchemy import func, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from zou.app import db
 from zou.app.models.event import ApiEvent
 from zou.app.models.login_log import LoginLog
-from zou.app.utils import fields
+from zou.app.services.exception import WrongParameterException
+from zou.app.stores import event_bus_store
+from zou.app.utils import fields, query as query_utils
+
+import event_handlers
+
+
+FILE_EVENTS = (
+    "preview-file:add-file",
+    "organisation:set-thumbnail",
+    "person:set-thumbnail",
+    "project:set-thumbnail",
+)
+EVENT_PARTITION_PREFIX = "api_event_"
+EVENT_PARTITION_REGEX = re.compile(r"^api_event_(\d{4})_(\d{2})$")
+EVENT_DEFAULT_PARTITION = "api_event_default"
+# Key of the advisory lock taken while partitions are created, so concurrent
+# processes don't create the same partitions.
+EVENT_PARTITION_LOCK_ID = 4242001
+EVENT_PARTITION_LOCK_TIMEOUT = "5s"
+# Delay (in seconds) between two checks of the coming partitions in a given
+# process, and before retrying a failed check.
+EVENT_PARTITION_CHECK_INTERVAL = 24 * 3600
+EVENT_PARTITION_RETRY_INTERVAL = 5 * 60
+
+next_partition_check = 0
 
 
 def get_last_events(
@@ -14,7 +49,9 @@ def get_last_events(
     Return last 100 events published. If before parameter is set, it returns
     last 100 events before this date.
     """
-    query = ApiEvent.query.order_by(ApiEvent.created_at.desc())
+    query = build_events_query(only_files, project_id).order_by(
+        ApiEvent.created_at.desc()
+    )
 
     if after is not None:
         query = query.filter(ApiEvent.created_at > after)
@@ -22,28 +59,369 @@ def get_last_events(
     if before is not None:
         query = query.filter(ApiEvent.created_at < before)
 
+    events = query.limit(page_size).all()
+    return [serialize_event(event) for event in events]
+
+
+def get_events_since(
+    cursor=None,
+    after=None,
+    page_size=100,
+    only_files=False,
+    project_id=None
+):
+    """
+    Return the events published after the position stored in given cursor,
+    in commit order, with the cursor to use to get the following ones.
+    Without cursor, events are returned from the beginning or from the
+    *after* date. The returned cursor is always set, so it can be used to
+    poll new events.
+
+    Events are ordered by the id of the transaction that stored them. Only
+    events of transactions older than every running transaction are
+    returned: an event committed later can't be placed before the cursor,
+    so no event is skipped. Events of a running transaction are returned
+    once it is finished.
+    """
+    query = (
+        build_events_query(only_files, project_id)
+        .filter(
+            ApiEvent.transaction_id
+            < func.txid_snapshot_xmin(func.txid_current_snapshot())
+        )
+        .order_by(ApiEvent.transaction_id, ApiEvent.created_at, ApiEvent.id)
+    )
+
+    if cursor:
+        query = query.filter(
+            tuple_(ApiEvent.transaction_id, ApiEvent.created_at, ApiEvent.id)
+            > decode_event_cursor(cursor)
+        )
+    elif after is not None:
+        query = query.filter(ApiEvent.created_at > after)
+
+    events = query.limit(page_size).all()
+    if len(events) > 0:
+        cursor = encode_event_cursor(events[-1])
+    return {
+        "data": [serialize_event(event) for event in events],
+        "next_cursor": cursor,
+    }
+
+
+def encode_event_cursor(event):
+    """
+    Build an opaque cursor pointing to the position of given event in the
+    event log.
+    """
+    return "%s.%s" % (
+        event.transaction_id,
+        query_utils.encode_cursor(event.created_at, event.id),
+    )
+
+
+def decode_event_cursor(cursor):
+    """
+    Return the transaction id, the creation date and the id of the event
+    pointed by given cursor.
+    """
+    (transaction_id, position) = (cursor.split(".", 1) + [""])[:2]
+    if not transaction_id.isdigit():
+        raise WrongParameterException("Malformed cursor.")
+    (created_at, event_id) = query_utils.decode_cursor(position)
+    return (int(transaction_id), created_at, event_id)
+
+
+def build_events_query(only_files=False, project_id=None):
+    query = ApiEvent.query
+
     if only_files:
-        query = query.filter(ApiEvent.name.in_((
-            "preview-file:add-file",
-            "organisation:set-thumbnail",
-            "person:set-thumbnail",
-            "project:set-thumbnail",
-        )))
+        query = query.filter(ApiEvent.name.in_(FILE_EVENTS))
 
     if project_id is not None:
         query = query.filter(ApiEvent.project_id == project_id)
 
-    events = query.limit(page_size).all()
-    return [
-        fields.serialize_dict({
-            "id": event.id,
-            "created_at": event.created_at,
-            "name": event.name,
-            "user_id": event.user_id,
-            "data": event.data,
-        })
+    return query
+
+
+def serialize_event(event):
+    return fields.serialize_dict({
+        "id": event.id,
+        "created_at": event.created_at,
+        "name": event.name,
+        "user_id": event.user_id,
+        "data": event.data,
+    })
+
+
+def is_event_table_partitioned(connection=None):
+    """
+    Return True if the event table is partitioned by creation date.
+    """
+    if connection is None:
+        connection = db.session
+    return connection.execute(
+        "SELECT EXISTS ("
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = 'api_event')"
+    ).scalar()
+
+
+def get_month_start(date, months=0):
+    """
+    Return the first day of the month of given date, shifted of given number
+    of months.
+    """
+    month_index = date.year * 12 + date.month - 1 + months
+    return datetime.datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def get_event_partitions(connection=None):
+    """
+    Return the monthly partitions of the event table as a dict of their
+    first day, indexed by partition name.
+    """
+    if connection is None:
+        connection = db.session
+    query = connection.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'api_event'"
+    )
+    partitions = {}
+    for (table_name,) in query:
+        match = EVENT_PARTITION_REGEX.match(table_name)
+        if match is not None:
+            partitions[table_name] = datetime.datetime(
+                int(match.group(1)), int(match.group(2)), 1
+            )
+    return partitions
+
+
+def create_event_partitions(months_ahead=3):
+    """
+    Create the monthly partitions of the event table for the current month
+    and the following ones. Partitions are also created for the months of
+    the events stored in the default partition (events without a matching
+    partition), so they can be removed by dropping partitions too. It runs
+    in its own transaction. Return the names of created partitions.
+    """
+    with db.engine.begin() as connection:
+        if not is_event_table_partitioned(connection):
+            return []
+
+        connection.execute(
+            "SET LOCAL lock_timeout = '%s'" % EVENT_PARTITION_LOCK_TIMEOUT
+        )
+        connection.execute(
+            "SELECT pg_advisory_xact_lock(%s)" % EVENT_PARTITION_LOCK_ID
+        )
+        partitions = get_event_partitions(connection)
+        now = datetime.datetime.utcnow()
+        start = get_month_start(now)
+        first_default_date = connection.execute(
+            "SELECT min(created_at) FROM %s" % EVENT_DEFAULT_PARTITION
+        ).scalar()
+        if first_default_date is not None:
+            start = min(start, get_month_start(first_default_date))
+
+        created_partitions = []
+        last_start = get_month_start(now, months_ahead)
+        while start <= last_start:
+            end = get_month_start(start, 1)
+            table_name = "%s%s" % (
+                EVENT_PARTITION_PREFIX, start.strftime("%Y_%m")
+            )
+            if table_name not in partitions:
+                create_event_partition(connection, table_name, start, end)
+                created_partitions.append(table_name)
+            start = end
+    return created_partitions
+
+
+def create_event_partition(connection, table_name, start, end):
+    """
+    Create the partition of the event table for given range of dates. Postgres
+    refuses to create it while the default partition holds events of this
+    range. In that case the default partition is detached while these events
+    are moved to the new partition.
+    """
+    create_query = (
+        "CREATE TABLE %s PARTITION OF api_event "
+        "FOR VALUES FROM ('%s') TO ('%s')" % (
+            table_name, start.isoformat(), end.isoformat()
+        )
+    )
+    range_filter = "created_at >= :start AND created_at < :end"
+    has_default_events = connection.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM %s WHERE %s)"
+            % (EVENT_DEFAULT_PARTITION, range_filter)
+        ),
+        start=start,
+        end=end,
+    ).scalar()
+
+    if not has_default_events:
+        connection.execute(create_query)
+        return
+
+    columns = ", ".join(
+        column.name for column in ApiEvent.__table__.columns
+    )
+    connection.execute(
+        "ALTER TABLE api_event DETACH PARTITION %s" % EVENT_DEFAULT_PARTITION
+    )
+    connection.execute(create_query)
+    connection.execute(
+        text(
+            "INSERT INTO api_event (%s) SELECT %s FROM %s WHERE %s"
+            % (columns, columns, EVENT_DEFAULT_PARTITION, range_filter)
+        ),
+        start=start,
+        end=end,
+    )
+    connection.execute(
+        text("DELETE FROM %s WHERE %s" % (
+            EVENT_DEFAULT_PARTITION, range_filter
+        )),
+        start=start,
+        end=end,
+    )
+    connection.execute(
+        "ALTER TABLE api_event ATTACH PARTITION %s DEFAULT"
+        % EVENT_DEFAULT_PARTITION
+    )
+
+
+def check_event_partitions():
+    """
+    Create the coming partitions of the event table if they are missing. It
+    is run by the event log consumer, at most once a day for each process
+    (partitions are also created by the `create_event_partitions` and
+    `remove_old_data` commands). Errors are logged, they must not prevent
+    events from being stored. A failed check is retried a few minutes later.
+    """
+    global next_partition_check
+
+    now = time.time()
+    if now < next_partition_check:
+        return
+    try:
+        created_partitions = create_event_partitions()
+        if len(created_partitions) > 0:
+            current_app.logger.info(
+                "Event partitions created: %s" % ", ".join(created_partitions)
+            )
+        next_partition_check = now + EVENT_PARTITION_CHECK_INTERVAL
+    except Exception:
+        current_app.logger.error(
+            "Event partitions could not be created", exc_info=1
+        )
+        next_partition_check = now + EVENT_PARTITION_RETRY_INTERVAL
+
+
+def remove_event_partitions(limit_date):
+    """
+    Drop the monthly partitions of the event table that contain only events
+    created before given date. Return the names of dropped partitions.
+    """
+    if not is_event_table_partitioned():
+        return []
+
+    dropped_partitions = []
+    for (table_name, start) in sorted(get_event_partitions().items()):
+        if get_month_start(start, 1) <= limit_date:
+            db.session.execute("DROP TABLE %s" % table_name)
+            dropped_partitions.append(table_name)
+    db.session.commit()
+    return dropped_partitions
+
+
+def insert_events(rows):
+    """
+    Store given event rows with a single multi-row insert. The session is
+    rolled back if the insert fails.
+    """
+    try:
+        db.session.execute(
+            insert(ApiEvent.__table__).values(rows).on_conflict_do_nothing()
+        )
+        db.session.commit()
+    except:
+        db.session.rollback()
+        raise
+
+
+def store_events(events):
+    """
+    Store given events of the event bus in the event log with a single
+    multi-row insert. Events already stored are skipped, so a batch can be
+    replayed safely. If the batch is rejected by the database, events are
+    stored one by one and the ids of the events that can't be stored are
+    returned, to be retried later by the event bus.
+    """
+    rows = [
+        {
+            "id": event["id"],
+            "created_at": event["created_at"],
+            "updated_at": event["created_at"],
+            "name": event["name"],
+            "data": event["data"],
+            "user_id": event["user_id"],
+            "project_id": event["project_id"],
+        }
         for event in events
+        if event["persist"]
     ]
+    check_event_partitions()
+    if len(rows) == 0:
+        return []
+
+    try:
+        insert_events(rows)
+        return []
+    except (DataError, IntegrityError):
+        current_app.logger.warning(
+            "Event batch can't be stored, events are stored one by one",
+            exc_info=1,
+        )
+
+    failed_event_ids = []
+    for row in rows:
+        try:
+            insert_events([row])
+        except (DataError, IntegrityError):
+            current_app.logger.error(
+                "Event %s (%s) can't be stored" % (row["id"], row["name"]),
+                exc_info=1,
+            )
+            failed_event_ids.append(row["id"])
+    return failed_event_ids
+
+
+def dispatch_events(events):
+    """
+    Send given events of the event bus to the event handlers.
+    """
+    for event in events:
+        event_handlers.listen_event_task.delay(event["name"], event["data"])
+
+
+def consume_events(group, consumer=None):
+    """
+    Consume the events of the event bus for given group: the event log or
+    the event handlers.
+    """
+    handle_events = {
+        event_bus_store.EVENT_LOG_GROUP: store_events,
+        event_bus_store.EVENT_HANDLERS_GROUP: dispatch_events,
+    }[group]
+    event_bus_store.consume(
+        group, consumer or event_bus_store.get_consumer_name(), handle_events
+    )
 
 
 def create_login_log(person_id, ip_address, origin):
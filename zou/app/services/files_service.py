@@ -730,15 +730,22 @@ def get_project_from_preview_file(preview_file_id):
     return project.serialize()
 
 
-def get_preview_files_for_project(project_id, page=-1):
+def get_preview_files_for_project(
+    project_id, page=-1, cursor=None, approximate_total=False
+):
     """
-    Return all preview files for given project.
+    Return all preview files for given project. If a cursor is given, keyset
+    pagination is used instead of page based pagination.
     """
     query = (
         PreviewFile.query.join(Task)
         .filter(Task.project_id == project_id)
         .order_by(desc(PreviewFile.updated_at))
     )
+    if cursor is not None:
+        return query_utils.get_cursor_paginated_results(
+            query, PreviewFile, cursor, approximate_total=approximate_total
+        )
     return query_utils.get_paginated_results(query, page)
 
 
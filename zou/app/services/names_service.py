@@ -1,5 +1,9 @@
 import slugify
 
+from sqlalchemy.orm import aliased
+
+from zou.app.models.entity import Entity
+from zou.app.models.entity_type import EntityType
 from zou.app.models.organisation import Organisation
 from zou.app.services import (
     entities_service,
@@ -37,6 +41,67 @@ def get_full_entity_name(entity_id):
     return (name, episode_id)
 
 
+def get_full_entity_names(entity_ids):
+    """
+    Bulk version of get_full_entity_name. It returns a dict where keys are
+    given entity ids and values are (full name, episode id) tuples. Names
+    are computed from a single query that retrieves entities with their
+    type, their parent (sequence) and their grand parent (episode).
+    """
+    entity_ids = set(str(entity_id) for entity_id in entity_ids if entity_id)
+    if len(entity_ids) == 0:
+        return {}
+
+    shot_type = shots_service.get_shot_type()
+    Sequence = aliased(Entity, name="sequence")
+    Episode = aliased(Entity, name="episode")
+    query = (
+        Entity.query.join(EntityType, Entity.entity_type_id == EntityType.id)
+        .outerjoin(Sequence, Sequence.id == Entity.parent_id)
+        .outerjoin(Episode, Episode.id == Sequence.parent_id)
+        .filter(Entity.id.in_(entity_ids))
+        .with_entities(
+            Entity.id,
+            Entity.name,
+            Entity.entity_type_id,
+            Entity.source_id,
+            EntityType.name,
+            Sequence.name,
+            Episode.id,
+            Episode.name,
+        )
+    )
+
+    names = {}
+    for (
+        entity_id,
+        entity_name,
+        entity_type_id,
+        source_id,
+        entity_type_name,
+        sequence_name,
+        episode_id,
+        episode_name,
+    ) in query.all():
+        if shot_type is not None and str(entity_type_id) == shot_type["id"]:
+            if episode_id is None:
+                name = "%s / %s" % (sequence_name, entity_name)
+            else:
+                name = "%s / %s / %s" % (
+                    episode_name,
+                    sequence_name,
+                    entity_name,
+                )
+        else:
+            name = "%s / %s" % (entity_type_name, entity_name)
+            episode_id = source_id
+        names[str(entity_id)] = (
+            name,
+            str(episode_id) if episode_id is not None else None,
+        )
+    return names
+
+
 def get_preview_file_name(preview_file_id):
     """
     Build unique and human readable file name for preview downloads. The
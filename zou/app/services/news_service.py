@@ -32,8 +32,13 @@ def create_news(
 def create_news_for_task_and_comment(task, comment, change=False):
     """
     For given task and comment, create a news matching comment and change
-    that occured on the task.
+    that occured on the task. If a news already exists for this comment, it
+    is returned instead.
     """
+    existing_news = News.get_by(comment_id=comment["id"])
+    if existing_news is not None:
+        return existing_news.serialize()
+
     task = tasks_service.get_task(task["id"])
     news = create_news(
         comment_id=comment["id"],
@@ -127,6 +132,9 @@ def get_last_news_for_project(
     query = query.limit(page_size)
     query = query.offset(offset)
     news_list = query.all()
+    entity_names = names_service.get_full_entity_names(
+        [row[6] for row in news_list]
+    )
     result = []
 
     for (
@@ -140,8 +148,8 @@ def get_last_news_for_project(
         preview_file_extension,
         entity_preview_file_id,
     ) in news_list:
-        (full_entity_name, episode_id) = names_service.get_full_entity_name(
-            task_entity_id
+        (full_entity_name, episode_id) = entity_names.get(
+            str(task_entity_id), (None, None)
         )
 
         result.append(
@@ -1,5 +1,9 @@
+import datetime
+
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import StatementError
 
+from zou.app import db
 from zou.app.models.comment import Comment
 from zou.app.models.project import Project
 from zou.app.models.entity import Entity
@@ -10,7 +14,7 @@ from zou.app.models.task_type import TaskType
 
 from zou.app.services import emails_service, tasks_service
 from zou.app.services.exception import PersonNotFoundException
-from zou.app.utils import events, fields, query as query_utils
+from zou.app.utils import cache, events, fields, query as query_utils
 
 
 def create_notification(
@@ -37,110 +41,143 @@ def create_notification(
     return notification.serialize()
 
 
-def get_notification_recipients(task):
+def create_notifications(notifications):
     """
-    Get the list of notification recipients for given task: assignees and
-    every people who commented the task.
+    Create given notifications with a single multi-row insert. Notifications
+    that already exist are skipped. Return the created notifications.
     """
-    recipients = set()
-    comments = Comment.get_all_by(object_id=task["id"])
-    task_subscriptions = get_task_subscriptions(task)
-    sequence_subscriptions = get_sequence_subscriptions(task)
-
-    for assignee_id in task["assignees"]:
-        recipients.add(assignee_id)
-
-    for comment in comments:
-        recipients.add(str(comment.person_id))
-
-    for subscription in task_subscriptions:
-        recipients.add(str(subscription.person_id))
-
-    for subscription in sequence_subscriptions:
-        recipients.add(str(subscription.person_id))
-
-    return recipients
+    if len(notifications) == 0:
+        return []
 
-
-def get_task_subscriptions(task):
-    """
-    Return all notification subscriptions related to given task.
-    """
-    return Subscription.get_all_by(task_id=task["id"])
+    now = datetime.datetime.utcnow()
+    rows = [
+        dict(
+            notification,
+            id=fields.gen_uuid(),
+            created_at=now,
+            updated_at=now,
+        )
+        for notification in notifications
+    ]
+    query = (
+        insert(Notification.__table__)
+        .values(rows)
+        .on_conflict_do_nothing(constraint="notification_uc")
+        .returning(Notification.id)
+    )
+    notification_ids = [
+        notification_id for (notification_id,) in db.session.execute(query)
+    ]
+    Notification.commit()
+    if len(notification_ids) == 0:
+        return []
+
+    created_notifications = Notification.query.filter(
+        Notification.id.in_(notification_ids)
+    ).all()
+    cache.invalidate_tags(*set(
+        cache.get_model_tag("person_notifications", notification.person_id)
+        for notification in created_notifications
+    ))
+    return fields.serialize_list(created_notifications)
+
+
+def emit_notification_events(notifications, project_id):
+    events.emit_many(
+        "notification:new",
+        [
+            {
+                "notification_id": notification["id"],
+                "person_id": notification["person_id"],
+            }
+            for notification in notifications
+        ],
+        project_id=project_id,
+        persist=False,
+    )
 
 
-def get_sequence_subscriptions(task):
+def get_notification_recipients(task):
     """
-    Return all sequence subscriptions for given task. It returns something only
-    if the task is related to a shot of which the sequence has a subscription.
+    Get the list of notification recipients for given task: assignees and
+    every people who commented the task or subscribed to it or to its
+    sequence. Commenters and subscribers are retrieved with a single query.
     """
-    sequence_subscriptions = []
-    entity = Entity.get(task["entity_id"])
-    if entity is not None and entity.parent_id is not None:
-        sequence_subscriptions = Subscription.get_all_by(
-            task_type_id=task["task_type_id"], entity_id=entity.parent_id
+    recipients = set(task["assignees"])
+    commenters = db.session.query(Comment.person_id).filter(
+        Comment.object_id == task["id"]
+    )
+    task_subscribers = db.session.query(Subscription.person_id).filter(
+        Subscription.task_id == task["id"]
+    )
+    sequence_subscribers = (
+        db.session.query(Subscription.person_id)
+        .filter(Subscription.task_type_id == task["task_type_id"])
+        .filter(
+            Subscription.entity_id == db.session.query(Entity.parent_id)
+            .filter(Entity.id == task["entity_id"])
+            .as_scalar()
         )
-    return sequence_subscriptions
+    )
+    query = commenters.union(task_subscribers, sequence_subscribers)
+    for (person_id,) in query.all():
+        recipients.add(str(person_id))
+    return recipients
 
 
 def create_notifications_for_task_and_comment(task, comment, change=False):
     """
     For given task and comment, create a notification for every assignee
-    to the task and to every person participating to this task.
+    to the task and to every person participating to this task. All
+    notifications are inserted at once. Persons who were already notified
+    about this comment are skipped, so it can be run again safely.
     """
     recipient_ids = get_notification_recipients(task)
-    recipient_ids.remove(comment["person_id"])
+    recipient_ids.discard(comment["person_id"])
     author_id = comment["person_id"]
     task = tasks_service.get_task(comment["object_id"])
 
-    for recipient_id in recipient_ids:
+    notifications = [
+        {
+            "read": False,
+            "change": change,
+            "person_id": recipient_id,
+            "author_id": author_id,
+            "comment_id": comment["id"],
+            "task_id": task["id"],
+            "type": "comment",
+        }
+        for recipient_id in recipient_ids
+    ] + [
+        {
+            "read": False,
+            "change": False,
+            "person_id": recipient_id,
+            "author_id": author_id,
+            "comment_id": comment["id"],
+            "task_id": task["id"],
+            "type": "mention",
+        }
+        for recipient_id in set(
+            str(mention_id) for mention_id in comment["mentions"]
+        )
+        if recipient_id != author_id
+    ]
+    notifications = create_notifications(notifications)
+
+    for notification in notifications:
         try:
-            notification = create_notification(
-                recipient_id,
-                comment_id=comment["id"],
-                author_id=author_id,
-                task_id=task["id"],
-                read=False,
-                change=change,
-                type="comment",
-            )
-            emails_service.send_comment_notification(
-                recipient_id, author_id, comment, task
-            )
-            events.emit(
-                "notification:new",
-                {
-                    "notification_id": notification["id"],
-                    "person_id": recipient_id,
-                },
-                project_id=task["project_id"],
-                persist=False
-            )
+            if notification["notification_type"] == "mention":
+                emails_service.send_mention_notification(
+                    notification["person_id"], author_id, comment, task
+                )
+            else:
+                emails_service.send_comment_notification(
+                    notification["person_id"], author_id, comment, task
+                )
         except PersonNotFoundException:
             pass
-
-    for recipient_id in comment["mentions"]:
-        if recipient_id != comment["person_id"]:
-            notification = create_notification(
-                recipient_id,
-                comment_id=comment["id"],
-                author_id=comment["person_id"],
-                task_id=comment["object_id"],
-                type="mention",
-            )
-            emails_service.send_mention_notification(
-                recipient_id, author_id, comment, task
-            )
-            events.emit(
-                "notification:new",
-                {
-                    "notification_id": notification["id"],
-                    "person_id": recipient_id,
-                },
-                project_id=task["project_id"],
-                persist=False,
-            )
-
+    emit_notification_events(notifications, task["project_id"])
     return recipient_ids
 
 
@@ -151,27 +188,27 @@ def reset_notifications_for_mentions(comment):
     comment.
     """
     Notification.delete_all_by(type="mention", comment_id=comment["id"])
-    notifications = []
     task = tasks_service.get_task(comment["object_id"])
     author_id = comment["person_id"]
-    for recipient_id in comment["mentions"]:
-        notification = create_notification(
-            recipient_id,
-            comment_id=comment["id"],
-            author_id=author_id,
-            task_id=comment["object_id"],
-            type="mention",
+    notifications = create_notifications([
+        {
+            "read": False,
+            "change": False,
+            "person_id": recipient_id,
+            "author_id": author_id,
+            "comment_id": comment["id"],
+            "task_id": comment["object_id"],
+            "type": "mention",
+        }
+        for recipient_id in set(
+            str(mention_id) for mention_id in comment["mentions"]
         )
+    ])
+    for notification in notifications:
         emails_service.send_mention_notification(
-            recipient_id, author_id, comment, task
-        )
-        notifications.append(notification)
-        events.emit(
-            "notification:new",
-            {"notification_id": notification["id"], "person_id": recipient_id},
-            project_id=task["project_id"],
-            persist=False,
+            notification["person_id"], author_id, comment, task
         )
+    emit_notification_events(notifications, task["project_id"])
     return notifications
 
 
@@ -344,13 +381,20 @@ def get_subscriptions_for_project(project_id):
     return fields.serialize_list(subscriptions)
 
 
-def get_notifications_for_project(project_id, page=0):
+def get_notifications_for_project(
+    project_id, page=0, cursor=None, approximate_total=False
+):
     """
-    Return all notifications for given project.
+    Return all notifications for given project. If a cursor is given, keyset
+    pagination is used instead of page based pagination.
     """
     query = (
         Notification.query.join(Task)
         .filter(Task.project_id == project_id)
         .order_by(Notification.updated_at.desc())
     )
+    if cursor is not None:
+        return query_utils.get_cursor_paginated_results(
+            query, Notification, cursor, approximate_total=approximate_total
+        )
     return query_utils.get_paginated_results(query, page)
@@ -1,8 +1,10 @@
+import hashlib
 import os
+
+from concurrent.futures import ThreadPoolExecutor
 from operator import itemgetter
 from slugify import slugify
 
-from shutil import copyfile
 from zipfile import ZipFile
 
 from flask import current_app
@@ -18,7 +20,7 @@ from zou.app.models.preview_file import PreviewFile
 from zou.app.models.task import Task
 from zou.app.models.task_type import TaskType
 
-from zou.app.utils import fields, movie_utils, events
+from zou.app.utils import fields, fs, movie_utils, events
 from zou.app.utils import query as query_utils
 
 from zou.app.services import (
@@ -334,9 +336,9 @@ def get_playlist(playlist_id):
     return get_playlist_raw(playlist_id).serialize()
 
 
-def retrieve_playlist_tmp_files(playlist, only_movies=False):
+def get_playlist_preview_files(playlist, only_movies=False):
     """
-    Retrieve all files for a given playlist into the temporary folder.
+    Return preview files listed in given playlist, in playlist order.
     """
     preview_files = []
     for entity in playlist["shots"]:
@@ -353,43 +355,84 @@ def retrieve_playlist_tmp_files(playlist, only_movies=False):
                 not only_movies
             ):
                 preview_files.append(preview_file)
+    return preview_files
 
-    file_paths = []
-    for preview_file in preview_files:
-        prefix = "original"
-        if preview_file["extension"] == "mp4":
-            get_path_func = file_store.get_local_movie_path
-            open_func = file_store.open_movie
-            prefix = "previews"
-        elif preview_file["extension"] == "png":
-            get_path_func = file_store.get_local_picture_path
-            open_func = file_store.open_picture
-        else:
-            get_path_func = file_store.get_local_file_path
-            open_func = file_store.open_file
 
-        if config.FS_BACKEND == "local":
-            file_path = get_path_func(
-                prefix, preview_file["id"]
-            )
-        else:
-            file_path = os.path.join(
-                config.TMP_DIR,
-                "cache-previews-%s.%s" % (
-                    preview_file["id"],
-                    preview_file["extension"]
-                ),
+def retrieve_playlist_tmp_files(playlist, only_movies=False):
+    """
+    Retrieve all files for a given playlist into the temporary folder.
+    """
+    preview_files = get_playlist_preview_files(playlist, only_movies)
+    return retrieve_preview_files(preview_files)
+
+
+def retrieve_preview_files(preview_files):
+    """
+    Make given preview files available on the local file system. It returns a
+    list of (file path, file name) tuples, in the preview files order. With
+    an object storage, files are downloaded in parallel. Returned files must
+    not be modified because they can be the stored files themselves.
+    """
+    file_names = [
+        names_service.get_preview_file_name(preview_file["id"])
+        for preview_file in preview_files
+    ]
+
+    if config.FS_BACKEND == "local" or len(preview_files) < 2:
+        file_paths = [
+            get_preview_file_path(preview_file)
+            for preview_file in preview_files
+        ]
+    else:
+        app = current_app._get_current_object()
+
+        def retrieve_file(preview_file):
+            with app.app_context():
+                return get_preview_file_path(preview_file)
+
+        unique_preview_files = {
+            preview_file["id"]: preview_file for preview_file in preview_files
+        }
+        with ThreadPoolExecutor(
+            max_workers=config.PLAYLIST_DOWNLOAD_WORKERS
+        ) as executor:
+            paths = dict(
+                zip(
+                    unique_preview_files.keys(),
+                    executor.map(
+                        retrieve_file, unique_preview_files.values()
+                    ),
+                )
             )
-            if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
-                with open(file_path, "wb") as tmp_file:
-                    for chunk in open_func(prefix, preview_file["id"]):
-                        tmp_file.write(chunk)
+        file_paths = [
+            paths[preview_file["id"]] for preview_file in preview_files
+        ]
+    return list(zip(file_paths, file_names))
+
 
-        file_name = names_service.get_preview_file_name(preview_file["id"])
-        tmp_file_path = os.path.join(config.TMP_DIR, file_name)
-        copyfile(file_path, tmp_file_path)
-        file_paths.append((tmp_file_path, file_name))
-    return file_paths
+def get_preview_file_path(preview_file):
+    """
+    Return the local path of the file related to given preview file.
+    """
+    prefix = "original"
+    if preview_file["extension"] == "mp4":
+        get_path_func = file_store.get_local_movie_path
+        open_func = file_store.open_movie
+        prefix = "previews"
+    elif preview_file["extension"] == "png":
+        get_path_func = file_store.get_local_picture_path
+        open_func = file_store.open_picture
+    else:
+        get_path_func = file_store.get_local_file_path
+        open_func = file_store.open_file
+    return fs.get_file_path(
+        config,
+        get_path_func,
+        open_func,
+        prefix,
+        preview_file["id"],
+        preview_file["extension"],
+    )
 
 
 def build_playlist_zip_file(playlist):
@@ -409,17 +452,27 @@ def build_playlist_zip_file(playlist):
 def build_playlist_movie_file(playlist, app=None):
     """
     Build a movie for all files for a given playlist into the temporary folder.
+    Built movies are cached by content: if the same previews were already
+    concatenated with the same settings, the cached movie is used directly.
     """
     job = start_build_job(playlist)
     project = projects_service.get_project(playlist["project_id"])
-    tmp_file_paths = retrieve_playlist_tmp_files(playlist, only_movies=True)
-    movie_file_path = get_playlist_movie_file_path(playlist, job)
+    preview_files = get_playlist_preview_files(playlist, only_movies=True)
     (width, height) = shots_service.get_preview_dimensions(project)
     fps = shots_service.get_preview_fps(project)
-
-    result = movie_utils.build_playlist_movie(
-        tmp_file_paths, movie_file_path, width, height, fps
+    movie_file_path = get_playlist_movie_cache_file_path(
+        preview_files, width, height, fps
     )
+
+    if os.path.exists(movie_file_path) and \
+       os.path.getsize(movie_file_path) > 0:
+        result = {"success": True}
+    else:
+        tmp_file_paths = retrieve_preview_files(preview_files)
+        result = build_playlist_movie_cache_file(
+            tmp_file_paths, movie_file_path, width, height, fps
+        )
+
     if result["success"] == True:
         if os.path.exists(movie_file_path):
             file_store.add_movie("playlists", job["id"], movie_file_path)
@@ -435,6 +488,27 @@ def build_playlist_movie_file(playlist, app=None):
     return job
 
 
+def build_playlist_movie_cache_file(
+    tmp_file_paths, movie_file_path, width, height, fps
+):
+    """
+    Build the playlist movie into a temporary file of the cache folder. The
+    cache file is replaced by the built movie only when the build succeeded,
+    so a failed or interrupted build never leaves a partial movie in the
+    cache and concurrent identical builds don't write to the same file.
+    """
+    part_file_path = get_playlist_movie_part_file_path(movie_file_path)
+    try:
+        result = movie_utils.build_playlist_movie(
+            tmp_file_paths, part_file_path, width, height, fps
+        )
+        if result["success"] and os.path.exists(part_file_path):
+            os.replace(part_file_path, movie_file_path)
+    finally:
+        fs.rm_file(part_file_path)
+    return result
+
+
 def start_build_job(playlist):
     """
     clients that a new job is running.
@@ -538,6 +612,30 @@ def get_playlist_zip_file_path(playlist):
     return os.path.join(config.TMP_DIR, zip_file_name)
 
 
+def get_playlist_movie_cache_file_path(preview_files, width, height, fps):
+    """
+    Build file path for the movie built from given preview files with given
+    settings. The name is a digest of the ordered preview file ids and of
+    the settings, so identical builds share the same file.
+    """
+    digest = hashlib.sha1()
+    for preview_file in preview_files:
+        digest.update(preview_file["id"].encode("utf-8"))
+        digest.update(str(preview_file["updated_at"]).encode("utf-8"))
+    digest.update(("%s:%s:%s" % (width, height, fps)).encode("utf-8"))
+    movie_file_name = "cache-playlist-movies-%s.mp4" % digest.hexdigest()
+    return os.path.join(config.TMP_DIR, movie_file_name)
+
+
+def get_playlist_movie_part_file_path(movie_file_path):
+    """
+    Build a unique temporary file path, located next to given movie file, to
+    build the movie into. The extension is kept for ffmpeg.
+    """
+    (root, extension) = os.path.splitext(movie_file_path)
+    return "%s.%s.part%s" % (root, fields.gen_uuid(), extension)
+
+
 def get_build_job_raw(build_job_id):
     """
     Return given build job as active record.
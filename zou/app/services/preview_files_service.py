@@ -0,0 +1,111 @@
+"""
+Processing of uploaded preview files. Movie normalization takes a long time,
+so it can be delegated to the job queue instead of being run while the upload
+request is processed.
+"""
+import os
+
+from flask import current_app
+
+from zou.app.stores import file_store
+from zou.app.services import files_service, shots_service, tasks_service
+from zou.app.utils import events, movie_utils, thumbnail as thumbnail_utils
+
+
+def save_variants(preview_file_id, original_tmp_path):
+    """
+    Build variants of a picture file and save them in the main storage.
+    """
+    variants = thumbnail_utils.generate_preview_variants(
+        original_tmp_path, preview_file_id
+    )
+    variants.append(("original", original_tmp_path))
+    for (name, path) in variants:
+        file_store.add_picture(name, preview_file_id, path)
+        os.remove(path)
+    return variants
+
+
+def prepare_and_store_movie(preview_file_id, uploaded_movie_path):
+    """
+    Normalize uploaded movie, store it, then build thumbnails from its first
+    frame and store them too. The uploaded movie is removed once processed.
+    """
+    project = files_service.get_project_from_preview_file(preview_file_id)
+    fps = shots_service.get_preview_fps(project)
+    (width, height) = shots_service.get_preview_dimensions(project)
+    try:
+        normalized_movie_path = movie_utils.normalize_movie(
+            uploaded_movie_path, fps=fps, width=width, height=height
+        )
+    finally:
+        os.remove(uploaded_movie_path)
+
+    try:
+        file_store.add_movie(
+            "previews", preview_file_id, normalized_movie_path
+        )
+        original_tmp_path = movie_utils.generate_thumbnail(
+            normalized_movie_path
+        )
+    finally:
+        os.remove(normalized_movie_path)
+    return save_variants(preview_file_id, original_tmp_path)
+
+
+def prepare_and_store_movie_job(preview_file_id, uploaded_movie_path):
+    """
+    Process an uploaded movie and update the status of the preview file
+    accordingly. This function is aimed at being run as a job in a job queue.
+    The uploaded movie must be stored on a file system shared with the API
+    (usually the TMP_DIR of the current node).
+    """
+    from zou.app import app
+
+    with app.app_context():
+        try:
+            prepare_and_store_movie(preview_file_id, uploaded_movie_path)
+        except Exception as e:
+            current_app.logger.error(e, exc_info=1)
+            current_app.logger.error("Normalization failed.")
+            files_service.update_preview_file(
+                preview_file_id, {"status": "broken"}
+            )
+            raise
+        files_service.update_preview_file(
+            preview_file_id, {"status": "ready"}
+        )
+        emit_app_preview_event(preview_file_id)
+
+
+def emit_app_preview_event(preview_file_id):
+    """
+    Emit an event, each time a preview is added.
+    """
+    preview_file = files_service.get_preview_file(preview_file_id)
+    comment = tasks_service.get_comment_by_preview_file_id(preview_file_id)
+    task = tasks_service.get_task(preview_file["task_id"])
+    comment_id = None
+    events.emit(
+        "preview-file:update", {"preview_file_id": preview_file["id"]},
+        project_id=task["project_id"]
+    )
+
+    if comment is not None:
+        comment_id = comment["id"]
+        events.emit(
+            "comment:update",
+            {"comment_id": comment_id},
+            project_id=task["project_id"]
+        )
+        events.emit(
+            "preview-file:add-file",
+            {
+                "comment_id": comment_id,
+                "task_id": preview_file["task_id"],
+                "preview_file_id": preview_file["id"],
+                "revision": preview_file["revision"],
+                "extension": preview_file["extension"],
+            },
+            project_id=task["project_id"]
+        )
@@ -21,6 +21,7 @@ from sqlalchemy.orm.exc import ObjectDeletedError
 
 
 def clear_project_cache(project_id):
+    cache.invalidate_tags(cache.get_model_tag("project", project_id))
     cache.cache.delete_memoized(get_project, project_id)
     cache.cache.delete_memoized(get_project_with_relations, project_id)
     cache.cache.delete_memoized(get_project_by_name)
@@ -191,7 +192,14 @@ def get_project_raw(project_id):
     return project
 
 
-@cache.memoize_function(240)
+def get_project_cache_tags(project):
+    """
+    Return cache tags for given serialized project.
+    """
+    return [cache.get_model_tag("project", project["id"])]
+
+
+@cache.memoize_function(36000, tags=get_project_cache_tags)
 def get_project(project_id):
     """
     Get project matching given id, as a dict. Raises an exception if project is
@@ -200,7 +208,7 @@ def get_project(project_id):
     return get_project_raw(project_id).serialize()
 
 
-@cache.memoize_function(240)
+@cache.memoize_function(36000, tags=get_project_cache_tags)
 def get_project_with_relations(project_id):
     """
     Get project matching given id, as a dict. Raises an exception if project is
@@ -7,7 +7,8 @@ from zou.app.utils import (
     cache,
     events,
     fields,
-    query as query_utils
+    query as query_utils,
+    streaming
 )
 
 from zou.app.models.entity import Entity, EntityLink, EntityVersion
@@ -35,11 +36,16 @@ from zou.app.services.exception import (
 
 
 def clear_shot_cache(shot_id):
+    cache.invalidate_tags(cache.get_model_tag("entity", shot_id))
     cache.cache.delete_memoized(get_shot, shot_id)
     cache.cache.delete_memoized(get_shot_with_relations, shot_id)
     cache.cache.delete_memoized(get_full_shot, shot_id)
 
 
+def clear_project_episodes_cache(project_id):
+    cache.invalidate_tags(cache.get_model_tag("project_episodes", project_id))
+
+
 def get_temporal_entity_type_by_name(name):
     entity_type = entities_service.get_entity_type_by_name(name)
     if entity_type is None:
@@ -200,8 +206,17 @@ def get_shots_and_tasks(criterions={}):
     """
     Get all shots for given criterions with related tasks for each shot.
     """
+    return list(iter_shots_and_tasks(criterions))
+
+
+def iter_shots_and_tasks(criterions={}):
+    """
+    Generate shots for given criterions with related tasks for each shot.
+    Rows are read through a server-side cursor and ordered by shot, so each
+    shot is yielded as soon as all its rows are read.
+    """
     shot_type = get_shot_type()
-    shot_map = {}
+    shot_dict = None
     task_map = {}
 
     Sequence = aliased(Entity, name="sequence")
@@ -235,6 +250,7 @@ def get_shots_and_tasks(criterions={}):
             Project.name,
         )
         .filter(Entity.entity_type_id == shot_type["id"])
+        .order_by(Episode.name, Sequence.name, Entity.name, Entity.id)
     )
     if "id" in criterions:
         query = query.filter(Entity.id == criterions["id"])
@@ -270,14 +286,16 @@ def get_shots_and_tasks(criterions={}):
         person_id,
         project_id,
         project_name,
-    ) in query.all():
+    ) in query.yield_per(streaming.STREAM_CHUNK_SIZE):
         shot_id = str(shot.id)
 
         shot.data = shot.data or {}
 
-        if shot_id not in shot_map:
-
-            shot_map[shot_id] = fields.serialize_dict({
+        if shot_dict is None or shot_dict["id"] != shot_id:
+            if shot_dict is not None:
+                yield shot_dict
+            task_map = {}
+            shot_dict = fields.serialize_dict({
                 "canceled": shot.canceled,
                 "data": shot.data,
                 "description": shot.description,
@@ -320,13 +338,13 @@ def get_shots_and_tasks(criterions={}):
                     "assignees": [],
                 })
                 task_map[task_id] = task_dict
-                shot_dict = shot_map[shot_id]
                 shot_dict["tasks"].append(task_dict)
 
             if person_id:
                 task_map[task_id]["assignees"].append(str(person_id))
 
-    return list(shot_map.values())
+    if shot_dict is not None:
+        yield shot_dict
 
 
 def get_shot_raw(shot_id):
@@ -361,7 +379,23 @@ def get_shot_with_relations(shot_id):
     return get_shot_raw(shot_id).serialize(obj_type="Shot", relations=True)
 
 
-@cache.memoize_function(120)
+def get_full_shot_cache_tags(shot):
+    """
+    Return cache tags for given full shot: the shot, its parents, its project
+    and its tasks.
+    """
+    tags = [
+        cache.get_model_tag("entity", shot["id"]),
+        cache.get_model_tag("entity", shot["sequence_id"]),
+        cache.get_model_tag("project", shot["project_id"]),
+    ]
+    if shot["episode_id"] is not None:
+        tags.append(cache.get_model_tag("entity", shot["episode_id"]))
+    tags += [cache.get_model_tag("task", task["id"]) for task in shot["tasks"]]
+    return tags
+
+
+@cache.memoize_function(36000, tags=get_full_shot_cache_tags)
 def get_full_shot(shot_id):
     """
     Return given shot as a dictionary with extra data like project and
@@ -615,6 +649,7 @@ def get_or_create_episode(project_id, name):
             entity_type_id=episode_type["id"], project_id=project_id, name=name
         )
         episode.save()
+        clear_project_episodes_cache(project_id)
     return episode.serialize()
 
 
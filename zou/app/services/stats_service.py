@@ -1,9 +1,15 @@
 import copy
-from sqlalchemy import func
+import datetime
+
+from sqlalchemy import event, func, literal, or_
+from sqlalchemy.dialects.postgresql import insert
 
 from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import get_history
 
+from zou.app import db
 from zou.app.models.entity import Entity
+from zou.app.models.episode_stat import EpisodeStat
 from zou.app.models.comment import Comment
 from zou.app.models.preview_file import PreviewFile
 from zou.app.models.project import Project
@@ -13,6 +19,7 @@ from zou.app.models.task_status import TaskStatus
 from zou.app.services import (
     user_service
 )
+from zou.app.utils import fields
 
 
 DEFAULT_RETAKE_STATS = {
@@ -32,6 +39,18 @@ DEFAULT_RETAKE_STATS = {
     }
 }
 
+# Fields of tasks and entities which impact the episode stats.
+TASK_STATS_FIELDS = [
+    "entity_id",
+    "project_id",
+    "retake_count",
+    "task_status_id",
+    "task_type_id",
+]
+ENTITY_STATS_FIELDS = ["nb_frames", "parent_id", "project_id"]
+STATS_SESSION_KEY = "episode_stats_changes"
+STATS_PENDING_SESSION_KEY = "episode_stats_pending_tasks"
+
 
 def get_main_stats():
     return {
@@ -53,7 +72,10 @@ def get_episode_stats_for_project(project_id, only_assigned=False):
     """
 
     results = {}
-    episode_counts = _get_episode_counts(project_id, only_assigned)
+    if only_assigned:
+        episode_counts = _get_episode_counts(project_id, only_assigned)
+    else:
+        episode_counts = _get_episode_stat_counts(project_id)
     for data in episode_counts:
         add_entry_to_stats(results, *data)
         add_entry_to_all_stats(results, *data)
@@ -96,6 +118,35 @@ def _get_episode_counts(project_id, only_assigned=False):
     return query.all()
 
 
+def _get_episode_stat_counts(project_id):
+    """
+    Same as _get_episode_counts but read from the episode stat table.
+    """
+    return (
+        db.session.query(
+            EpisodeStat.project_id,
+            EpisodeStat.episode_id,
+            EpisodeStat.task_type_id,
+            EpisodeStat.task_status_id,
+            TaskStatus.short_name,
+            TaskStatus.color,
+            func.sum(EpisodeStat.count),
+            func.sum(EpisodeStat.frames),
+        )
+        .join(TaskStatus, TaskStatus.id == EpisodeStat.task_status_id)
+        .filter(EpisodeStat.project_id == project_id)
+        .group_by(
+            EpisodeStat.project_id,
+            EpisodeStat.episode_id,
+            EpisodeStat.task_type_id,
+            EpisodeStat.task_status_id,
+            TaskStatus.short_name,
+            TaskStatus.color,
+        )
+        .all()
+    )
+
+
 def add_entry_to_stats(
     results,
     project_id,
@@ -232,7 +283,10 @@ def get_episode_retake_stats_for_project(project_id, only_assigned=False):
     results = {
         "all": {"all":  copy.deepcopy(DEFAULT_RETAKE_STATS)}
     }
-    query = _get_retake_stats_query(project_id, only_assigned)
+    if only_assigned:
+        query = _get_retake_stats_query(project_id, only_assigned)
+    else:
+        query = _get_retake_stat_counts_query(project_id)
     for (
         episode_id,
         nb_frames,
@@ -240,6 +294,7 @@ def get_episode_retake_stats_for_project(project_id, only_assigned=False):
         retake_count,
         is_done,
         is_retake,
+        count,
     ) in query.all():
         episode_id = str(episode_id)
         task_type_id = str(task_type_id)
@@ -252,7 +307,8 @@ def get_episode_retake_stats_for_project(project_id, only_assigned=False):
             is_retake,
             is_done,
             retake_count,
-            nb_frames
+            nb_frames,
+            count
         )
     return results
 
@@ -268,6 +324,7 @@ def _get_retake_stats_query(project_id, only_assigned):
             Task.retake_count,
             TaskStatus.is_done,
             TaskStatus.is_retake,
+            literal(1),
         )
         .join(Project, Project.id == Task.project_id)
         .join(Entity, Entity.id == Task.entity_id)
@@ -281,6 +338,26 @@ def _get_retake_stats_query(project_id, only_assigned):
     return query
 
 
+def _get_retake_stat_counts_query(project_id):
+    """
+    Same as _get_retake_stats_query but read from the episode stat table: each
+    row gives the number of tasks and frames for a retake count.
+    """
+    return (
+        db.session.query(
+            EpisodeStat.episode_id,
+            EpisodeStat.frames,
+            EpisodeStat.task_type_id,
+            EpisodeStat.retake_count,
+            TaskStatus.is_done,
+            TaskStatus.is_retake,
+            EpisodeStat.count,
+        )
+        .join(TaskStatus, TaskStatus.id == EpisodeStat.task_status_id)
+        .filter(EpisodeStat.project_id == project_id)
+    )
+
+
 def _init_entries(results, episode_id, task_type_id):
     if episode_id not in results:
         results[episode_id] = {"all": copy.deepcopy(DEFAULT_RETAKE_STATS)}
@@ -298,8 +375,13 @@ def _add_stats(
     is_retake,
     is_done,
     retake_count,
-    nb_frames
+    nb_frames,
+    count=1
 ):
+    """
+    Add given number of tasks to the retake stats. nb_frames is the total of
+    frames of these tasks.
+    """
     for (key1, key2) in [
         ("all", "all"),
         ("all", task_type_id),
@@ -309,13 +391,13 @@ def _add_stats(
         if results[key1][key2]["max_retake_count"] < retake_count:
             results[key1][key2]["max_retake_count"] = retake_count
         if is_retake:
-            results[key1][key2]["retake"]["count"] += 1
+            results[key1][key2]["retake"]["count"] += count
             results[key1][key2]["retake"]["frames"] += nb_frames or 0
         elif is_done:
-            results[key1][key2]["done"]["count"] += 1
+            results[key1][key2]["done"]["count"] += count
             results[key1][key2]["done"]["frames"] += nb_frames or 0
         else:
-            results[key1][key2]["other"]["count"] += 1
+            results[key1][key2]["other"]["count"] += count
             results[key1][key2]["other"]["frames"] += nb_frames or 0
 
     if retake_count > 0:
@@ -330,7 +412,317 @@ def _add_stats(
                         "count": 0,
                         "frames": 0
                     }
-                results[key1][key2]["evolution"][take_number]["count"] += 1
+                results[key1][key2]["evolution"][take_number]["count"] += \
+                    count
                 results[key1][key2]["evolution"][take_number]["frames"] += \
                     nb_frames or 0
     return results
+
+
+def _get_episode_stat_rows(project_id, episode_ids=None):
+    """
+    Compute from the task table the rows of the episode stat table for given
+    project. Restrict the computation to given episodes if any.
+    """
+    Sequence = aliased(Entity, name="sequence")
+    Episode = aliased(Entity, name="episode")
+    retake_count = func.coalesce(Task.retake_count, 0)
+    query = (
+        db.session.query(
+            Episode.id,
+            Task.task_type_id,
+            Task.task_status_id,
+            retake_count,
+            func.count(Task.id),
+            func.sum(Entity.nb_frames),
+        )
+        .join(Entity, Entity.id == Task.entity_id)
+        .join(Sequence, Sequence.id == Entity.parent_id)
+        .join(Episode, Episode.id == Sequence.parent_id)
+        .filter(Task.project_id == project_id)
+        .group_by(
+            Episode.id,
+            Task.task_type_id,
+            Task.task_status_id,
+            retake_count,
+        )
+    )
+    if episode_ids is not None:
+        query = query.filter(Episode.id.in_(episode_ids))
+
+    return [
+        {
+            "project_id": project_id,
+            "episode_id": episode_id,
+            "task_type_id": task_type_id,
+            "task_status_id": task_status_id,
+            "retake_count": task_retake_count,
+            "count": count,
+            "frames": frames or 0,
+        }
+        for (
+            episode_id,
+            task_type_id,
+            task_status_id,
+            task_retake_count,
+            count,
+            frames,
+        ) in query.all()
+    ]
+
+
+def refresh_episode_stats(project_id, episode_ids=None):
+    """
+    Replace rows of the episode stat table for given project (and given
+    episodes if any) with values computed from the task table. It doesn't
+    commit the session. The stat table is locked against concurrent updates
+    until the commit, so pending changes of other transactions are applied
+    before or after the refresh, never lost.
+    """
+    table = EpisodeStat.__table__
+    db.session.execute("LOCK TABLE episode_stat IN SHARE ROW EXCLUSIVE MODE")
+    query = table.delete().where(table.c.project_id == project_id)
+    if episode_ids is not None:
+        query = query.where(table.c.episode_id.in_(episode_ids))
+    db.session.execute(query)
+
+    rows = _get_episode_stat_rows(project_id, episode_ids)
+    if len(rows) > 0:
+        db.session.execute(table.insert(), rows)
+    return rows
+
+
+def rebuild_project_stats(project_id=None):
+    """
+    Rebuild the episode stat table for given project or for all projects if
+    no project is given.
+    """
+    if project_id is None:
+        project_ids = [project.id for project in Project.query.all()]
+    else:
+        project_ids = [project_id]
+
+    for project_id in project_ids:
+        refresh_episode_stats(project_id)
+        db.session.commit()
+    return project_ids
+
+
+def _has_changes(instance, fields):
+    return any(get_history(instance, field).has_changes() for field in fields)
+
+
+def _get_task_stat_keys(session, task_ids, lock_parents=False):
+    """
+    Return, for each given task, the key of the episode stat row it counts
+    in and its number of frames. Tasks outside of episodes are ignored. If
+    lock_parents is True, the shot, sequence and episode of each task are
+    locked against changes until the end of the transaction.
+    """
+    if len(task_ids) == 0:
+        return []
+
+    Sequence = aliased(Entity, name="sequence")
+    Episode = aliased(Entity, name="episode")
+    query = (
+        session.query(
+            Task.project_id,
+            Episode.id,
+            Task.task_type_id,
+            Task.task_status_id,
+            Task.retake_count,
+            Entity.nb_frames,
+        )
+        .join(Entity, Entity.id == Task.entity_id)
+        .join(Sequence, Sequence.id == Entity.parent_id)
+        .join(Episode, Episode.id == Sequence.parent_id)
+        .filter(Task.id.in_(task_ids))
+    )
+    if lock_parents:
+        query = query.with_for_update(
+            read=True, of=[Entity, Sequence, Episode]
+        )
+    return [
+        (
+            (
+                str(project_id),
+                str(episode_id),
+                str(task_type_id),
+                str(task_status_id),
+                retake_count or 0,
+            ),
+            nb_frames or 0,
+        )
+        for (
+            project_id,
+            episode_id,
+            task_type_id,
+            task_status_id,
+            retake_count,
+            nb_frames,
+        ) in query.all()
+    ]
+
+
+def _lock_stats_tasks(session, task_ids, entity_ids):
+    """
+    Lock given entities, then given tasks and the tasks of given entities and
+    of their children. Return the ids of locked tasks. Entities are always
+    locked before tasks, so concurrent transactions don't deadlock and
+    compute their changes from the stats of each other.
+    """
+    if len(entity_ids) > 0:
+        session.query(Entity.id).filter(
+            Entity.id.in_(entity_ids)
+        ).order_by(Entity.id).with_for_update(key_share=True).all()
+
+    Sequence = aliased(Entity, name="sequence")
+    criterions = []
+    if len(task_ids) > 0:
+        criterions.append(Task.id.in_(task_ids))
+    if len(entity_ids) > 0:
+        criterions += [
+            Task.entity_id.in_(entity_ids),
+            Entity.parent_id.in_(entity_ids),
+            Sequence.parent_id.in_(entity_ids),
+        ]
+    if len(criterions) == 0:
+        return set()
+
+    query = (
+        session.query(Task.id)
+        .outerjoin(Entity, Entity.id == Task.entity_id)
+        .outerjoin(Sequence, Sequence.id == Entity.parent_id)
+        .filter(or_(*criterions))
+        .order_by(Task.id)
+        .with_for_update(key_share=True, of=Task)
+    )
+    return set(task_id for (task_id,) in query.all())
+
+
+def _add_episode_stats_deltas(session, task_stat_keys, sign=1):
+    deltas = session.info.setdefault(STATS_SESSION_KEY, {})
+    for (key, nb_frames) in task_stat_keys:
+        delta = deltas.setdefault(key, [0, 0])
+        delta[0] += sign
+        delta[1] += sign * nb_frames
+
+
+@event.listens_for(db.session, "before_flush")
+def collect_episode_stats_changes(session, flush_context, instances):
+    """
+    Remove from the episode stats the tasks that are about to be changed or
+    deleted, and the tasks of changed shots, sequences and episodes. They
+    are added back with their new values once flushed.
+    """
+    task_ids = set()
+    entity_ids = set()
+    for instance in session.dirty | session.deleted:
+        if isinstance(instance, Task):
+            if instance in session.dirty and \
+               not _has_changes(instance, TASK_STATS_FIELDS):
+                continue
+            task_ids.add(instance.id)
+        elif isinstance(instance, Entity):
+            if instance in session.dirty and \
+               not _has_changes(instance, ENTITY_STATS_FIELDS):
+                continue
+            entity_ids.add(instance.id)
+
+    task_ids = _lock_stats_tasks(session, task_ids, entity_ids)
+    if len(task_ids) > 0:
+        _add_episode_stats_deltas(
+            session, _get_task_stat_keys(session, task_ids), -1
+        )
+        session.info.setdefault(STATS_PENDING_SESSION_KEY, set()).update(
+            task_ids
+        )
+
+
+@event.listens_for(db.session, "after_flush")
+def add_episode_stats_changes(session, flush_context):
+    """
+    Add to the episode stats the new tasks and the tasks removed before the
+    flush, with their new values.
+    """
+    new_task_ids = [
+        instance.id for instance in session.new if isinstance(instance, Task)
+    ]
+    add_new_tasks_to_episode_stats(new_task_ids, session=session)
+    task_ids = session.info.pop(STATS_PENDING_SESSION_KEY, set())
+    _add_episode_stats_deltas(session, _get_task_stat_keys(session, task_ids))
+
+
+def add_new_tasks_to_episode_stats(task_ids, session=None):
+    """
+    Count given new tasks in the episode stats when the current transaction
+    is committed. Tasks created without the ORM (bulk inserts) must be
+    declared through this function.
+    """
+    if session is None:
+        session = db.session()
+    _add_episode_stats_deltas(
+        session, _get_task_stat_keys(session, task_ids, lock_parents=True)
+    )
+
+
+@event.listens_for(db.session, "before_commit")
+def apply_episode_stats_changes(session):
+    """
+    Apply to the episode stat table the changes of the current transaction,
+    as increments of the rows, so concurrent transactions only wait for each
+    other when they change the same rows. It's done before the commit to keep
+    the stats consistent with the tasks. Rows left empty are removed.
+    """
+    session.flush()
+    deltas = session.info.pop(STATS_SESSION_KEY, {})
+    now = datetime.datetime.utcnow()
+    rows = [
+        {
+            "id": fields.gen_uuid(),
+            "created_at": now,
+            "updated_at": now,
+            "project_id": project_id,
+            "episode_id": episode_id,
+            "task_type_id": task_type_id,
+            "task_status_id": task_status_id,
+            "retake_count": retake_count,
+            "count": count,
+            "frames": frames,
+        }
+        for (
+            (
+                project_id,
+                episode_id,
+                task_type_id,
+                task_status_id,
+                retake_count,
+            ),
+            (count, frames),
+        ) in sorted(deltas.items())
+        if count != 0 or frames != 0
+    ]
+    if len(rows) == 0:
+        return
+
+    table = EpisodeStat.__table__
+    query = insert(table).values(rows)
+    query = query.on_conflict_do_update(
+        constraint="episode_stat_uc",
+        set_={
+            "count": table.c.count + query.excluded.count,
+            "frames": table.c.frames + query.excluded.frames,
+            "updated_at": now,
+        },
+    ).returning(table.c.id, table.c.count)
+    empty_row_ids = [
+        row_id for (row_id, count) in session.execute(query) if count <= 0
+    ]
+    if len(empty_row_ids) > 0:
+        session.execute(table.delete().where(table.c.id.in_(empty_row_ids)))
+
+
+@event.listens_for(db.session, "after_rollback")
+def clear_episode_stats_changes(session):
+    session.info.pop(STATS_SESSION_KEY, None)
+    session.info.pop(STATS_PENDING_SESSION_KEY, None)
@@ -1,8 +1,13 @@
+import collections
+import copy
 import datetime
+import itertools
 import logging
 import os
 import sys
 
+from concurrent.futures import ThreadPoolExecutor
+
 import gazu
 import sqlalchemy
 
@@ -25,6 +30,7 @@ from zou.app.models.project import Project
 from zou.app.models.project_status import ProjectStatus
 from zou.app.models.schedule_item import ScheduleItem
 from zou.app.models.subscription import Subscription
+from zou.app.models.sync_checkpoint import SyncCheckpoint
 from zou.app.models.search_filter import SearchFilter
 from zou.app.models.task import Task
 from zou.app.models.task_status import TaskStatus
@@ -34,7 +40,7 @@ from zou.app.models.time_spent import TimeSpent
 from zou.app.services import deletion_service, tasks_service
 from zou.app.stores import file_store
 from flask_fs.backends.local import LocalBackend
-from zou.app.utils import events
+from zou.app.utils import events, transfers
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -44,6 +50,8 @@ console_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 
 
+SYNC_WORKERS = 4
+
 preview_folder = os.getenv("PREVIEW_FOLDER", "/opt/zou/previews")
 local_picture = LocalBackend(
     "local", {"root": os.path.join(preview_folder, "pictures")}
@@ -221,19 +229,21 @@ def run_listeners(event_client):
         run_listeners(event_client)
 
 
-def run_main_data_sync(project=None):
+def run_main_data_sync(project=None, workers=SYNC_WORKERS):
     """
     Retrieve and import all cross-projects data from target instance.
     """
     for event in main_events:
         path = event_name_model_path_map[event]
         model = event_name_model_map[event]
-        sync_entries(path, model, project=project)
+        sync_entries(path, model, project=project, workers=workers)
 
 
-def run_project_data_sync(project=None):
+def run_project_data_sync(project=None, workers=SYNC_WORKERS):
     """
     Retrieve and import all data related to projects from target instance.
+    The progress is stored for each model and project, an interrupted sync
+    restarts where it stopped.
     """
     if project:
         projects = [gazu.project.get_project_by_name(project)]
@@ -244,7 +254,7 @@ def run_project_data_sync(project=None):
         for event in project_events:
             path = event_name_model_path_map[event]
             model = event_name_model_map[event]
-            sync_project_entries(project, path, model)
+            sync_project_entries(project, path, model, workers=workers)
         sync_entity_thumbnails(project, "assets")
         sync_entity_thumbnails(project, "shots")
         logger.info("Sync of %s complete." % project["name"])
@@ -331,18 +341,167 @@ def sync_event(event):
         model.delete_from_import(instance_id)
 
 
-def sync_entries(model_name, model, project=None):
+def get_checkpoint(model_name, project_id=None):
+    """
+    Return the sync progress of given model for given project. It is created
+    if it doesn't exist yet.
+    """
+    checkpoint = SyncCheckpoint.get_by(
+        model_name=model_name, project_id=project_id
+    )
+    if checkpoint is None:
+        checkpoint = SyncCheckpoint.create(
+            model_name=model_name,
+            project_id=project_id,
+            page=0,
+            is_done=False,
+        )
+    return checkpoint
+
+
+def clear_checkpoints():
+    """
+    Remove all stored sync progress, next sync will start from scratch.
+    """
+    return SyncCheckpoint.delete_all_by()
+
+
+def import_page(model, instances):
+    """
+    Import a page of instances in a single transaction. If it fails, instances
+    are imported one by one, so only the faulty ones are skipped.
+    """
+    try:
+        model.create_from_import_list(instances)
+    except sqlalchemy.exc.IntegrityError:
+        logger.error("An error occured, page imported entry by entry.")
+        for instance in instances:
+            try:
+                model.create_from_import(copy.deepcopy(instance))
+            except sqlalchemy.exc.IntegrityError:
+                logger.error("An error occured", exc_info=1)
+    return len(instances)
+
+
+def fetch_pages(paths, workers=SYNC_WORKERS):
+    """
+    Fetch given paths from target instance with a pool of workers and
+    generate results in the order of the paths. At most `workers` requests
+    are running while a page is imported.
+    """
+    paths = iter(paths)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = collections.deque(
+            executor.submit(gazu.client.fetch_all, path)
+            for path in itertools.islice(paths, workers)
+        )
+        while len(futures) > 0:
+            results = futures.popleft().result()
+            for path in itertools.islice(paths, 1):
+                futures.append(executor.submit(gazu.client.fetch_all, path))
+            yield results
+
+
+def sync_pages(model, path_pattern, checkpoint, workers=SYNC_WORKERS):
+    """
+    Import all pages of a paginated route, starting after the last page
+    stored in the checkpoint. The first page gives the number of pages, then
+    next pages are fetched concurrently.
+    """
+    page = (checkpoint.page or 0) + 1
+    results = gazu.client.fetch_all(path_pattern % page)
+    total = import_page(model, results["data"])
+    checkpoint.update({"page": page})
+
+    paths = [
+        path_pattern % next_page
+        for next_page in range(page + 1, results["nb_pages"] + 1)
+    ]
+    for (page, results) in enumerate(
+        fetch_pages(paths, workers), page + 1
+    ):
+        total += import_page(model, results["data"])
+        checkpoint.update({"page": page})
+    return total
+
+
+def sync_pages_until_empty(
+    model, path_pattern, checkpoint, workers=SYNC_WORKERS
+):
+    """
+    Import pages of a paginated route that doesn't give the number of pages,
+    until an empty page is met. Pages are fetched concurrently.
+    """
+    total = 0
+    first_page = (checkpoint.page or 0) + 1
+    paths = (path_pattern % page for page in itertools.count(first_page))
+    for (page, results) in enumerate(
+        fetch_pages(paths, workers), first_page
+    ):
+        if len(results) == 0:
+            break
+        total += import_page(model, results)
+        checkpoint.update({"page": page})
+    return total
+
+
+def sync_cursor_pages(
+    model, path_pattern, page_path_pattern, checkpoint, workers=SYNC_WORKERS
+):
+    """
+    Import all pages of a cursor paginated route, starting from the cursor
+    stored in the checkpoint. Cursors make fetches sequential, but the next
+    page is fetched while the current one is imported. Target instances that
+    don't support cursors return all entries or the first page of the route:
+    next pages are then imported with page based requests.
+    """
+    if checkpoint.page:
+        return sync_pages(model, page_path_pattern, checkpoint, workers)
+
+    total = 0
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(
+            gazu.client.fetch_all, path_pattern % (checkpoint.cursor or "")
+        )
+        while future is not None:
+            results = future.result()
+            if isinstance(results, list):
+                return import_page(model, results)
+            elif "next_cursor" not in results:
+                total = import_page(model, results["data"])
+                checkpoint.update({"page": 1})
+                if results["nb_pages"] > 1:
+                    total += sync_pages(
+                        model, page_path_pattern, checkpoint, workers
+                    )
+                return total
+
+            cursor = results["next_cursor"]
+            future = None
+            if cursor is not None:
+                future = executor.submit(
+                    gazu.client.fetch_all, path_pattern % cursor
+                )
+            total += import_page(model, results["data"])
+            checkpoint.update({"cursor": cursor})
+    return total
+
+
+def sync_entries(model_name, model, project=None, workers=SYNC_WORKERS):
     """
     Retrieve cross-projects data from target instance.
     """
-    instances = []
+    checkpoint = get_checkpoint(model_name)
+    if checkpoint.is_done:
+        logger.info("%s already synced." % model_name)
+        return
 
+    total = 0
     if model_name in ["organisations", "persons"]:
         path = model_name + "?relations=true"
         if model_name == "persons":
             path += "&with_pass_hash=true"
-        instances = gazu.client.fetch_all(path)
-        model.create_from_import_list(instances)
+        total = import_page(model, gazu.client.fetch_all(path))
     elif project:
         project = gazu.project.get_project_by_name(project)
         if model_name == 'projects':
@@ -353,32 +512,28 @@ def sync_entries(model_name, model, project=None):
             )
         else:
             instances = gazu.client.fetch_all(model_name)
-        model.create_from_import_list(instances)
+        total = import_page(model, instances)
     else:
-        page = 1
-        init = True
-        results = {"nb_pages": 2}
-        while init or results["nb_pages"] >= page:
-            results = gazu.client.fetch_all(
-                "%s?relations=true&page=%d" % (model_name, page)
-            )
-            instances += results["data"]
-            page += 1
-            init = False
-            model.create_from_import_list(results["data"])
+        total = sync_pages(
+            model,
+            model_name + "?relations=true&page=%d",
+            checkpoint,
+            workers=workers,
+        )
 
-    logger.info("%s %s synced." % (len(instances), model_name))
+    checkpoint.update({"is_done": True})
+    logger.info("%s %s synced." % (total, model_name))
 
 
-def sync_project_entries(project, model_name, model):
+def sync_project_entries(project, model_name, model, workers=SYNC_WORKERS):
     """
     Retrieve all project data from target instance.
     """
-    instances = []
-    page = 1
-    init = True
-    results = {"nb_pages": 2}
-    result_length = 1
+    checkpoint = get_checkpoint(model_name, project["id"])
+    if checkpoint.is_done:
+        logger.info("    %s already synced." % model_name)
+        return
+
     if model_name not in [
         "tasks",
         "comments",
@@ -388,43 +543,35 @@ def sync_project_entries(project, model_name, model):
         "preview-files",
     ]:  # not much data we retrieve all in a single request.
         path = "projects/%s/%s" % (project["id"], model_name)
-        results = gazu.client.fetch_all(path)
-        instances += results
-        try:
-            model.create_from_import_list(instances)
-        except sqlalchemy.exc.IntegrityError:
-            logger.error("An error occured", exc_info=1)
+        total = import_page(model, gazu.client.fetch_all(path))
 
     elif model_name == "news":
-        while init or result_length > 0:
-            path = "projects/%s/%s?page=%d" % (project["id"], model_name, page)
-            results = gazu.client.fetch_all(path)
-            instances += results
-            try:
-                model.create_from_import_list(results)
-            except sqlalchemy.exc.IntegrityError:
-                logger.error("An error occured", exc_info=1)
-            result_length = len(results)
-            page += 1
-            init = False
-
-    else:  # Lot of data, we retrieve all through paginated requests.
-        while init or results["nb_pages"] >= page:
-            path = "projects/%s/%s?page=%d" % (project["id"], model_name, page)
-            if model_name == "playlists":
-                path = "projects/%s/playlists/all?page=%d" % (
-                    project["id"],
-                    page,
-                )
-            results = gazu.client.fetch_all(path)
-            instances += results["data"]
-            try:
-                model.create_from_import_list(results["data"])
-            except sqlalchemy.exc.IntegrityError:
-                logger.error("An error occured", exc_info=1)
-            page += 1
-            init = False
-    logger.info("    %s %s synced." % (len(instances), model_name))
+        total = sync_pages_until_empty(
+            model,
+            "projects/%s/%s?page=%%d" % (project["id"], model_name),
+            checkpoint,
+            workers=workers,
+        )
+
+    elif model_name == "playlists":
+        total = sync_pages(
+            model,
+            "projects/%s/playlists/all?page=%%d" % project["id"],
+            checkpoint,
+            workers=workers,
+        )
+
+    else:  # Lot of data, we retrieve all through cursor paginated requests.
+        total = sync_cursor_pages(
+            model,
+            "projects/%s/%s?cursor=%%s" % (project["id"], model_name),
+            "projects/%s/%s?page=%%d" % (project["id"], model_name),
+            checkpoint,
+            workers=workers,
+        )
+
+    checkpoint.update({"is_done": True})
+    logger.info("    %s %s synced." % (total, model_name))
 
 
 def sync_entity_thumbnails(project, model_name):
@@ -635,71 +782,104 @@ def get_retrieve_thumbnail(model_name):
     return retrieve_thumbnail
 
 
-def download_entity_thumbnails_from_storage():
+def download_entity_thumbnails_from_storage(
+    workers=transfers.TRANSFER_WORKERS
+):
     """
     Download all thumbnail files for non preview entries from object storage
     and store them locally.
     """
-    for project in Project.query.all():
-        download_entity_thumbnail(project)
-    for organisation in Organisation.query.all():
-        download_entity_thumbnail(organisation)
-    for person in Person.query.all():
-        download_entity_thumbnail(person)
+    def get_transfers():
+        for model in [Project, Organisation, Person]:
+            for entity in model.query.filter_by(has_avatar=True).all():
+                yield get_entity_thumbnail_transfer(entity)
+
+    return transfers.run_transfers(get_transfers(), workers=workers)
 
 
-def download_preview_files_from_storage():
+def download_preview_files_from_storage(workers=transfers.TRANSFER_WORKERS):
     """
     Download all thumbnail and original files for preview entries from object
     storage and store them locally.
     """
-    for preview_file in PreviewFile.query.all():
-        download_preview(preview_file)
+    query = PreviewFile.query
 
+    def get_transfers():
+        for preview_file in query.yield_per(500):
+            for transfer in get_preview_transfers(preview_file):
+                yield transfer
 
-def download_entity_thumbnail(entity):
+    return transfers.run_transfers(
+        get_transfers(),
+        workers=workers,
+        total=get_preview_transfer_count(query),
+    )
+
+
+def get_preview_transfer_count(query):
     """
-    Download thumbnail file for given entity from object storage and store it
-    locally.
+    Return the number of transfers built for the preview files of given
+    query: one for each preview file, plus one for each picture variant of
+    movies and pictures.
     """
-    local = LocalBackend(
-        "local", {"root": os.path.join(preview_folder, "pictures")}
-    )
+    nb_preview_files = query.count()
+    nb_previews_with_variants = query.filter(
+        PreviewFile.extension.in_(["mp4", "png"])
+    ).count()
+    return nb_preview_files + 3 * nb_previews_with_variants
 
-    file_path = local.path("thumbnails-" + str(entity.id))
-    dirname = os.path.dirname(file_path)
-    if entity.has_avatar:
+
+def get_storage_download(file_path, prefix, dl_func, size_func, file_id):
+    """
+    Build the transfer of a file from object storage to given local path.
+    It's skipped if the local file has the same size as the stored one.
+    """
+    def run():
+        dirname = os.path.dirname(file_path)
         if not os.path.exists(dirname):
             os.makedirs(dirname)
-        with open(file_path, "wb") as tmp_file:
-            for chunk in file_store.open_picture("thumbnails", str(entity.id)):
+        tmp_file_path = file_path + ".tmp"
+        with open(tmp_file_path, "wb") as tmp_file:
+            for chunk in dl_func(prefix, file_id):
                 tmp_file.write(chunk)
+        os.rename(tmp_file_path, file_path)
+        return os.path.getsize(file_path)
+
+    def is_done():
+        return os.path.exists(file_path) and \
+            os.path.getsize(file_path) == size_func(prefix, file_id)
+
+    return transfers.Transfer(file_path, run, is_done)
+
+
+def get_entity_thumbnail_transfer(entity):
+    """
+    Build the download of the thumbnail file of given entity from object
+    storage.
+    """
+    return get_storage_download(
+        local_picture.path("thumbnails-" + str(entity.id)),
+        "thumbnails",
+        file_store.open_picture,
+        file_store.get_picture_size,
+        str(entity.id),
+    )
 
 
-def download_file(file_path, prefix, dl_func, preview_file_id):
+def download_entity_thumbnail(entity):
     """
-    Download preview file for given preview from object storage and store it
+    Download thumbnail file for given entity from object storage and store it
     locally.
     """
-    dirname = os.path.dirname(file_path)
-    if not os.path.exists(dirname):
-        os.makedirs(dirname)
-    try:
-        with open(file_path, "wb") as tmp_file:
-            for chunk in dl_func(prefix, preview_file_id):
-                tmp_file.write(chunk)
-        print("%s downloaded" % file_path)
-    except:
-        pass
+    if entity.has_avatar:
+        transfers.run_transfers([get_entity_thumbnail_transfer(entity)])
 
 
-def download_preview(preview_file):
+def get_preview_transfers(preview_file):
     """
-    Download all files link to preview file entry: orginal file and variants.
+    Build the downloads of all files linked to given preview file from object
+    storage: original file and variants.
     """
-    print(
-        "download preview %s (%s)" % (preview_file.id, preview_file.extension)
-    )
     is_movie = preview_file.extension == "mp4"
     is_picture = preview_file.extension == "png"
     is_file = not is_movie and not is_picture
@@ -708,48 +888,80 @@ def download_preview(preview_file):
     file_key = "previews-%s" % preview_file_id
     if is_file:
         file_path = local_file.path(file_key)
-        dl_func = file_store.open_picture
+        dl_func = file_store.open_file
+        size_func = file_store.get_file_size
     elif is_movie:
         file_path = local_movie.path(file_key)
         dl_func = file_store.open_movie
+        size_func = file_store.get_movie_size
     else:
         file_path = local_picture.path(file_key)
-        dl_func = file_store.open_file
+        dl_func = file_store.open_picture
+        size_func = file_store.get_picture_size
 
+    preview_transfers = []
     if is_movie or is_picture:
         for prefix in ["thumbnails", "thumbnails-square", "original"]:
-            pic_dl_func = file_store.open_picture
             pic_file_path = local_picture.path(
-                "%s-%s" % (prefix, str(preview_file.id))
+                "%s-%s" % (prefix, preview_file_id)
             )
-            download_file(pic_file_path, prefix, pic_dl_func, preview_file_id)
+            preview_transfers.append(get_storage_download(
+                pic_file_path,
+                prefix,
+                file_store.open_picture,
+                file_store.get_picture_size,
+                preview_file_id,
+            ))
+    preview_transfers.append(get_storage_download(
+        file_path, "previews", dl_func, size_func, preview_file_id
+    ))
+    return preview_transfers
+
 
-    download_file(file_path, "previews", dl_func, preview_file_id)
+def download_preview(preview_file):
+    """
+    Download all files link to preview file entry: orginal file and variants.
+    """
+    print(
+        "download preview %s (%s)" % (preview_file.id, preview_file.extension)
+    )
+    transfers.run_transfers(get_preview_transfers(preview_file))
 
 
-def download_files_from_another_instance(project=None):
+def download_files_from_another_instance(
+    project=None, workers=transfers.TRANSFER_WORKERS
+):
     """
     Download all files from target instance.
     """
-    download_thumbnails_from_another_instance("person")
-    download_thumbnails_from_another_instance("organisation")
-    download_thumbnails_from_another_instance("project", project=project)
+    download_thumbnails_from_another_instance("person", workers=workers)
+    download_thumbnails_from_another_instance("organisation", workers=workers)
+    download_thumbnails_from_another_instance(
+        "project", project=project, workers=workers
+    )
 
+    query = PreviewFile.query
     if project:
         project_dict = gazu.project.get_project_by_name(project)
-        preview_files = PreviewFile \
-            .query \
-            .join(Task) \
-            .filter(Task.project_id == project_dict["id"]) \
-            .all()
-    else:
-        preview_files = PreviewFile.query.all()
-
-    for preview_file in preview_files:
-        download_preview_from_another_instance(preview_file)
+        query = query.join(Task).filter(Task.project_id == project_dict["id"])
+
+    def get_transfers():
+        for preview_file in query.yield_per(500):
+            for transfer in get_preview_transfers_from_another_instance(
+                preview_file
+            ):
+                yield transfer
+
+    return transfers.run_transfers(
+        get_transfers(),
+        workers=workers,
+        total=get_preview_transfer_count(query),
+    )
 
 
-def download_thumbnails_from_another_instance(model_name, project=None):
+def download_thumbnails_from_another_instance(
+    model_name, project=None, workers=transfers.TRANSFER_WORKERS
+):
     """
     Download all thumbnails from target instance for given model.
     """
@@ -761,81 +973,115 @@ def download_thumbnails_from_another_instance(model_name, project=None):
         project = gazu.project.get_project_by_name(project)
         instances = model.query.filter_by(id=project.get('id'))
 
-    for instance in instances:
-        if instance.has_avatar:
-            download_thumbnail_from_another_instance(model_name, instance.id)
+    return transfers.run_transfers(
+        [
+            get_thumbnail_transfer_from_another_instance(
+                model_name, instance.id
+            )
+            for instance in instances
+            if instance.has_avatar
+        ],
+        workers=workers,
+    )
 
 
-def download_thumbnail_from_another_instance(model_name, model_id):
+def get_thumbnail_transfer_from_another_instance(model_name, model_id):
     """
-    Download into the local storage the thumbnail for a given model instance.
+    Build the download of the thumbnail of given model instance from target
+    instance. It's skipped if the thumbnail is already stored.
     """
     from zou.app import app
-    with app.app_context():
-        file_path = "/tmp/thumbnails-%s.png" % str(model_id)
-        path = "/pictures/thumbnails/%ss/%s.png" % (model_name, model_id)
-        try:
-                gazu.client.download(path, file_path)
-                file_store.add_picture("thumbnails", model_id, file_path)
-                os.remove(file_path)
-                print("%s downloaded" % file_path)
-        except Exception as e:
-            print(e)
-            print("%s download failed" % file_path)
-        return path
 
+    path = "/pictures/thumbnails/%ss/%s.png" % (model_name, model_id)
 
-def download_preview_from_another_instance(preview_file):
+    def run():
+        with app.app_context():
+            file_path = "/tmp/thumbnails-%s.png" % str(model_id)
+            gazu.client.download(path, file_path)
+            size = os.path.getsize(file_path)
+            file_store.add_picture("thumbnails", model_id, file_path)
+            os.remove(file_path)
+            return size
+
+    def is_done():
+        with app.app_context():
+            return file_store.exists_picture("thumbnails", model_id)
+
+    return transfers.Transfer(path, run, is_done)
+
+
+def download_thumbnail_from_another_instance(model_name, model_id):
     """
-    Download all files link to preview file entry: orginal file and variants.
+    Download into the local storage the thumbnail for a given model instance.
     """
-
-    from zou.app import app
-    print(
-        "download preview %s (%s)" % (preview_file.id, preview_file.extension)
+    transfer = get_thumbnail_transfer_from_another_instance(
+        model_name, model_id
     )
+    transfers.run_transfers([transfer])
+    return transfer.name
+
+
+def get_preview_transfers_from_another_instance(preview_file):
+    """
+    Build the downloads of all files linked to given preview file from target
+    instance: original file and variants. Files already stored are skipped.
+    """
     is_movie = preview_file.extension == "mp4"
     is_picture = preview_file.extension == "png"
     is_file = not is_movie and not is_picture
 
     preview_file_id = str(preview_file.id)
-    save_func = file_store.add_file
-    with app.app_context():
-        if is_file:
-            save_func = file_store.add_file
-            exists_func = file_store.exists_file
-        elif is_movie:
-            save_func = file_store.add_movie
-            exists_func = file_store.exists_movie
-        else:
-            save_func = file_store.add_picture
-            exists_func = file_store.exists_picture
-
-        if is_movie or is_picture:
-            for prefix in ["thumbnails", "thumbnails-square", "original"]:
-                if not exists_func(prefix, preview_file_id):
-                    download_file_from_another_instance(
-                        file_store.add_picture,
-                        prefix,
-                        preview_file_id,
-                        preview_file.extension
-                    )
-        if not exists_func("previews", preview_file_id):
-            download_file_from_another_instance(
-                save_func,
-                "previews",
+    if is_file:
+        save_func = file_store.add_file
+        exists_func = file_store.exists_file
+    elif is_movie:
+        save_func = file_store.add_movie
+        exists_func = file_store.exists_movie
+    else:
+        save_func = file_store.add_picture
+        exists_func = file_store.exists_picture
+
+    preview_transfers = []
+    if is_movie or is_picture:
+        for prefix in ["thumbnails", "thumbnails-square", "original"]:
+            preview_transfers.append(get_instance_download(
+                file_store.add_picture,
+                file_store.exists_picture,
+                prefix,
                 preview_file_id,
-                preview_file.extension
-            )
+                preview_file.extension,
+            ))
+    preview_transfers.append(get_instance_download(
+        save_func,
+        exists_func,
+        "previews",
+        preview_file_id,
+        preview_file.extension,
+    ))
+    return preview_transfers
 
 
-def download_file_from_another_instance(
-    save_func, prefix, preview_file_id, extension
+def download_preview_from_another_instance(preview_file):
+    """
+    Download all files link to preview file entry: orginal file and variants.
+    """
+    print(
+        "download preview %s (%s)" % (preview_file.id, preview_file.extension)
+    )
+    transfers.run_transfers(
+        get_preview_transfers_from_another_instance(preview_file)
+    )
+
+
+def get_instance_download(
+    save_func, exists_func, prefix, preview_file_id, extension
 ):
     """
-    Download preview file for given preview from object storage and store it
-    locally.
+    Build the download of a preview file from target instance to the object
+    storage.
     """
+    from zou.app import app
+
     if prefix == "previews":
         if extension == "mp4":
             path = "/movies/original/preview-files/%s.mp4" % preview_file_id
@@ -852,12 +1098,18 @@ def download_file_from_another_instance(
             path_prefix,
             preview_file_id
         )
-    try:
-        file_path = "/tmp/%s.%s" % (preview_file_id, extension)
-        gazu.client.download(path, file_path)
-        save_func(prefix, preview_file_id, file_path)
-        os.remove(file_path)
-        print("%s (%s) downloaded" % (file_path, prefix))
-    except Exception as e:
-        print(e)
-        print("%s download failed" % file_path)
+
+    def run():
+        with app.app_context():
+            file_path = "/tmp/%s-%s.%s" % (prefix, preview_file_id, extension)
+            gazu.client.download(path, file_path)
+            size = os.path.getsize(file_path)
+            save_func(prefix, preview_file_id, file_path)
+            os.remove(file_path)
+            return size
+
+    def is_done():
+        with app.app_context():
+            return exists_func(prefix, preview_file_id)
+
+    return transfers.Transfer(path, run, is_done)
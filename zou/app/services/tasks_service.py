@@ -2,6 +2,7 @@ import collections
 import datetime
 import uuid
 
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import StatementError, IntegrityError, DataError
 from sqlalchemy.orm import aliased
 
@@ -22,7 +23,7 @@ from zou.app.models.news import News
 from zou.app.models.person import Person
 from zou.app.models.preview_file import PreviewFile
 from zou.app.models.project import Project
-from zou.app.models.task import Task
+from zou.app.models.task import Task, assignees_table
 from zou.app.models.task_type import TaskType
 from zou.app.models.task_status import TaskStatus
 from zou.app.models.time_spent import TimeSpent
@@ -50,6 +51,8 @@ from zou.app.services import (
     comments_service
 )
 
+TASK_INSERT_BATCH_SIZE = 1000
+
 
 def clear_task_status_cache(task_status_id):
     cache.cache.delete_memoized(get_task_statuses)
@@ -61,6 +64,7 @@ def clear_task_type_cache(task_type_id):
 
 
 def clear_task_cache(task_id):
+    cache.invalidate_tags(cache.get_model_tag("task", task_id))
     cache.cache.delete_memoized(get_task, task_id)
     cache.cache.delete_memoized(get_task_with_relations, task_id)
     cache.cache.delete_memoized(get_full_task, task_id)
@@ -183,7 +187,39 @@ def get_task_raw(task_id):
     return task
 
 
-@cache.memoize_function(120)
+def get_task_cache_tags(task):
+    """
+    Return cache tags for given serialized task.
+    """
+    return [cache.get_model_tag("task", task["id"])]
+
+
+def get_full_task_cache_tags(task):
+    """
+    Return cache tags for given full task: the task itself and all the models
+    it embeds.
+    """
+    tags = [
+        cache.get_model_tag("task", task["id"]),
+        cache.get_model_tag("task_type", task["task_type_id"]),
+        cache.get_model_tag("task_status", task["task_status_id"]),
+        cache.get_model_tag("project", task["project_id"]),
+        cache.get_model_tag("entity", task["entity_id"]),
+        cache.get_model_tag("entity_type", task["entity_type"]["id"]),
+    ]
+    if task["assigner_id"] is not None:
+        tags.append(cache.get_model_tag("person", task["assigner_id"]))
+    tags += [
+        cache.get_model_tag("person", person["id"])
+        for person in task["persons"]
+    ]
+    for key in ["sequence", "episode"]:
+        if key in task:
+            tags.append(cache.get_model_tag("entity", task[key]["id"]))
+    return tags
+
+
+@cache.memoize_function(36000, tags=get_task_cache_tags)
 def get_task(task_id):
     """
     Get task matching given id as a dictionary.
@@ -191,7 +227,7 @@ def get_task(task_id):
     return get_task_raw(task_id).serialize()
 
 
-@cache.memoize_function(120)
+@cache.memoize_function(36000, tags=get_task_cache_tags)
 def get_task_with_relations(task_id):
     """
     Get task matching given id as a dictionary.
@@ -301,7 +337,8 @@ def _get_entity_task_query():
 
 def _convert_rows_to_detailed_tasks(rows, relations=False):
     results = []
-    for entry in rows:
+    task_dicts = serialize_tasks_with_relations([entry[0] for entry in rows])
+    for (task, entry) in zip(task_dicts, rows):
         (
             task_object,
             project_name,
@@ -311,7 +348,6 @@ def _convert_rows_to_detailed_tasks(rows, relations=False):
             entity_name,
         ) = entry
 
-        task = get_task_with_relations(str(task_object.id))
         task["project_name"] = project_name
         task["task_type_name"] = task_type_name
         task["task_status_name"] = task_status_name
@@ -589,8 +625,11 @@ def get_person_tasks(person_id, projects, is_done=None):
     else:
         query = query.filter(TaskStatus.is_done == False)
 
+    rows = query.all()
+    task_dicts = serialize_tasks_with_relations([row[0] for row in rows])
+
     tasks = []
-    for (
+    for task_dict, (
         task,
         project_name,
         project_has_avatar,
@@ -608,7 +647,7 @@ def get_person_tasks(person_id, projects, is_done=None):
         task_type_color,
         task_status_color,
         task_status_short_name,
-    ) in query.all():
+    ) in zip(task_dicts, rows):
         if entity_preview_file_id is None:
             entity_preview_file_id = ""
 
@@ -618,7 +657,6 @@ def get_person_tasks(person_id, projects, is_done=None):
         if episode_id is None:
             episode_id = entity_source_id
 
-        task_dict = get_task_with_relations(str(task.id))
         task_dict.update(
             {
                 "project_name": project_name,
@@ -676,8 +714,12 @@ def get_person_tasks(person_id, projects, is_done=None):
 
 def create_tasks(task_type, entities):
     """
-    Create a new task for given task type and for each entity.
+    Create a new task for given task type and for each entity. Tasks are
+    inserted with multi-row inserts in a single transaction, entities that
+    already have a task of this type are skipped.
     """
+    from zou.app.services import stats_service
+
     task_status = get_todo_status()
     current_user_id = None
     try:
@@ -685,39 +727,80 @@ def create_tasks(task_type, entities):
     except RuntimeError:
         pass
 
-    tasks = []
+    existing_entity_ids = set()
+    entity_ids = [entity["id"] for entity in entities]
+    if len(entity_ids) > 0:
+        existing_tasks = (
+            db.session.query(Task.entity_id)
+            .filter(Task.task_type_id == task_type["id"])
+            .filter(Task.entity_id.in_(entity_ids))
+            .all()
+        )
+        existing_entity_ids = set(
+            str(entity_id) for (entity_id,) in existing_tasks
+        )
+
+    now = datetime.datetime.utcnow()
+    rows = []
     for entity in entities:
-        existing_task = Task.query \
-            .filter_by(
-                entity_id=entity["id"],
-                task_type_id=task_type["id"]
-            ) \
-            .scalar()
-        if existing_task is None:
-            task = Task.create_no_commit(
-                name="main",
-                duration=0,
-                estimation=0,
-                completion_rate=0,
-                start_date=None,
-                end_date=None,
-                due_date=None,
-                real_start_date=None,
-                project_id=entity["project_id"],
-                task_type_id=task_type["id"],
-                task_status_id=task_status["id"],
-                entity_id=entity["id"],
-                assigner_id=current_user_id,
-                assignees=[],
-            )
-            tasks.append(task)
+        if entity["id"] not in existing_entity_ids:
+            existing_entity_ids.add(entity["id"])
+            rows.append({
+                "id": fields.gen_uuid(),
+                "created_at": now,
+                "updated_at": now,
+                "name": "main",
+                "duration": 0,
+                "estimation": 0,
+                "completion_rate": 0,
+                "project_id": entity["project_id"],
+                "task_type_id": task_type["id"],
+                "task_status_id": task_status["id"],
+                "entity_id": entity["id"],
+                "assigner_id": current_user_id,
+            })
+
+    task_ids = []
+    project_ids = set()
+    for index in range(0, len(rows), TASK_INSERT_BATCH_SIZE):
+        query = (
+            insert(Task.__table__)
+            .values(rows[index:index + TASK_INSERT_BATCH_SIZE])
+            .on_conflict_do_nothing(constraint="task_uc")
+            .returning(Task.id, Task.project_id)
+        )
+        batch_task_ids = []
+        for (task_id, project_id) in db.session.execute(query):
+            batch_task_ids.append(task_id)
+            project_ids.add(str(project_id))
+        stats_service.add_new_tasks_to_episode_stats(batch_task_ids)
+        task_ids += batch_task_ids
     Task.commit()
 
-    task_dicts = []
-    for task in tasks:
-        task_dict = _finalize_task_creation(task_type, task_status, task)
-        task_dicts.append(task_dict)
-
+    tasks = []
+    for index in range(0, len(task_ids), TASK_INSERT_BATCH_SIZE):
+        tasks += Task.query.filter(
+            Task.id.in_(task_ids[index:index + TASK_INSERT_BATCH_SIZE])
+        ).all()
+    positions = {task_id: index for (index, task_id) in enumerate(task_ids)}
+    tasks.sort(key=lambda task: positions[task.id])
+
+    cache.invalidate_tags(*set(
+        cache.get_model_tag("entity", task.entity_id) for task in tasks
+    ))
+    task_dicts = [
+        _build_task_dict(task_type, task_status, task) for task in tasks
+    ]
+    for project_id in project_ids:
+        events.emit_many(
+            "task:new",
+            [
+                {"task_id": task_dict["id"]}
+                for task_dict in task_dicts
+                if task_dict["project_id"] == project_id
+            ],
+            project_id=project_id
+        )
     return task_dicts
 
 
@@ -755,6 +838,16 @@ def create_task(task_type, entity, name="main"):
 
 
 def _finalize_task_creation(task_type, task_status, task):
+    task_dict = _build_task_dict(task_type, task_status, task)
+    events.emit(
+        "task:new",
+        {"task_id": task.id},
+        project_id=task_dict["project_id"]
+    )
+    return task_dict
+
+
+def _build_task_dict(task_type, task_status, task):
     task_dict = task.serialize()
     task_dict["assignees"] = []
     task_dict.update(
@@ -769,11 +862,6 @@ def _finalize_task_creation(task_type, task_status, task):
             "task_type_priority": task_type["priority"],
         }
     )
-    events.emit(
-        "task:new",
-        {"task_id": task.id},
-        project_id=task_dict["project_id"]
-    )
     return task_dict
 
 
@@ -1098,15 +1186,26 @@ def add_preview_file_to_comment(comment_id, person_id, task_id, revision=0):
     return preview_file.serialize()
 
 
-def get_comments_for_project(project_id, page=0):
+def get_comments_for_project(
+    project_id, page=0, cursor=None, approximate_total=False
+):
     """
-    Return all comments for given project.
+    Return all comments for given project. If a cursor is given, keyset
+    pagination is used instead of page based pagination.
     """
     query = (
         Comment.query.join(Task, Task.id == Comment.object_id)
         .filter(Task.project_id == project_id)
         .order_by(Comment.updated_at.desc())
     )
+    if cursor is not None:
+        return query_utils.get_cursor_paginated_results(
+            query,
+            Comment,
+            cursor,
+            relations=True,
+            approximate_total=approximate_total,
+        )
     return query_utils.get_paginated_results(query, page, relations=True)
 
 
@@ -1118,17 +1217,78 @@ def get_time_spents_for_project(project_id, page=0):
     return query_utils.get_paginated_results(query, page)
 
 
-def get_tasks_for_project(project_id, page=0):
+def get_tasks_for_project(
+    project_id, page=0, cursor=None, approximate_total=False
+):
     """
-    Return all tasks for given project.
+    Return all tasks for given project. If a cursor is given, keyset
+    pagination is used instead of page based pagination.
     """
     query = Task.query.filter(Task.project_id == project_id).order_by(
         Task.updated_at.desc()
     )
+    if cursor is not None:
+        return query_utils.get_cursor_paginated_results(
+            query,
+            Task,
+            cursor,
+            relations=True,
+            approximate_total=approximate_total,
+        )
     return query_utils.get_paginated_results(query, page, relations=True)
 
 
-@cache.memoize_function(120)
+def get_tasks_with_relations(task_ids):
+    """
+    Get tasks matching given ids as dictionaries, including their assignees.
+    Tasks and assignees are loaded with one query each, whatever the number
+    of tasks is.
+    """
+    if len(task_ids) == 0:
+        return []
+
+    try:
+        tasks = Task.query.filter(Task.id.in_(task_ids)).all()
+    except StatementError:
+        raise TaskNotFoundException()
+    return serialize_tasks_with_relations(tasks)
+
+
+def serialize_tasks_with_relations(tasks):
+    """
+    Serialize given task active records like task.serialize(relations=True)
+    does, but with a single query to retrieve all assignees.
+    """
+    assignee_map = get_assignee_map([task.id for task in tasks])
+    results = []
+    for task in tasks:
+        task_dict = task.serialize()
+        task_dict["assignees"] = assignee_map.get(str(task.id), [])
+        results.append(task_dict)
+    return results
+
+
+def get_assignee_map(task_ids):
+    """
+    Return a dict where keys are task ids and values are the list of the ids
+    of the persons assigned to the task.
+    """
+    assignee_map = {}
+    if len(task_ids) == 0:
+        return assignee_map
+
+    query = db.session.query(
+        assignees_table.columns.task, assignees_table.columns.person
+    ).filter(assignees_table.columns.task.in_(task_ids))
+    for (task_id, person_id) in query.all():
+        task_id = str(task_id)
+        if task_id not in assignee_map:
+            assignee_map[task_id] = []
+        assignee_map[task_id].append(str(person_id))
+    return assignee_map
+
+
+@cache.memoize_function(36000, tags=get_full_task_cache_tags)
 def get_full_task(task_id):
     task = get_task_with_relations(task_id)
     task_type = get_task_type(task["task_type_id"])
@@ -1,13 +1,21 @@
+import hashlib
+import json
+
 from sqlalchemy.orm import aliased
 
-from zou.app.models.comment import Comment
+from zou.app import db
+from zou.app.models.comment import (
+    Comment,
+    mentions_table,
+    preview_link_table,
+)
 from zou.app.models.entity import Entity
 from zou.app.models.entity_type import EntityType
 from zou.app.models.notification import Notification
-from zou.app.models.project import Project
+from zou.app.models.project import Project, ProjectPersonLink
 from zou.app.models.project_status import ProjectStatus
 from zou.app.models.search_filter import SearchFilter
-from zou.app.models.task import Task
+from zou.app.models.task import Task, assignees_table
 from zou.app.models.task_type import TaskType
 
 from zou.app.services import (
@@ -26,6 +34,18 @@ from zou.app.services.exception import (
 )
 from zou.app.utils import cache, fields, permissions
 
+CONTEXT_TABLES = [
+    "custom_action",
+    "entity_type",
+    "metadata_descriptor",
+    "person",
+    "project",
+    "project_status",
+    "search_filter",
+    "task_status",
+    "task_type",
+]
+
 
 def clear_filter_cache(user_id):
     cache.cache.delete_memoized(get_user_filters, user_id)
@@ -292,16 +312,56 @@ def get_projects(name=None):
     return fields.serialize_value(query.all())
 
 
+def get_permission_context():
+    """
+    Return the permission context of the current request: current user id and
+    the ids of projects for which the user is part of the team. It is built
+    once per request so access checks don't query the database again.
+    """
+    permission_context = permissions.get_permission_context()
+    if permission_context is None:
+        current_user = persons_service.get_current_user()
+        project_ids = (
+            db.session.query(ProjectPersonLink.project_id)
+            .filter(ProjectPersonLink.person_id == current_user["id"])
+            .all()
+        )
+        permission_context = permissions.set_permission_context({
+            "person_id": current_user["id"],
+            "project_ids": set(str(row[0]) for row in project_ids),
+            "entity_ids": None,
+        })
+    return permission_context
+
+
+def get_assigned_entity_ids():
+    """
+    Return the ids of the entities for which the current user has a task
+    assigned. They are loaded on first call only and kept in the permission
+    context.
+    """
+    permission_context = get_permission_context()
+    if permission_context["entity_ids"] is None:
+        entity_ids = (
+            db.session.query(Task.entity_id)
+            .join(assignees_table, assignees_table.c.task == Task.id)
+            .filter(
+                assignees_table.c.person == permission_context["person_id"]
+            )
+            .distinct()
+            .all()
+        )
+        permission_context["entity_ids"] = set(
+            str(row[0]) for row in entity_ids
+        )
+    return permission_context["entity_ids"]
+
+
 def check_working_on_entity(entity_id):
     """
     Return True if user has task assigned which is related to given entity.
     """
-    current_user = persons_service.get_current_user_raw()
-    query = Task.query.filter(Task.assignees.contains(current_user)).filter(
-        Task.entity_id == entity_id
-    )
-
-    if query.first() is None:
+    if str(entity_id) not in get_assigned_entity_ids():
         raise permissions.PermissionDenied
 
     return True
@@ -311,8 +371,10 @@ def check_person_access(person_id):
     """
     Return True if user is admin or is matching given person id.
     """
-    current_user = persons_service.get_current_user()
-    if permissions.has_admin_permissions() or current_user["id"] == person_id:
+    if (
+        permissions.has_admin_permissions() or
+        get_permission_context()["person_id"] == str(person_id)
+    ):
         return True
     else:
         raise permissions.PermissionDenied
@@ -326,12 +388,7 @@ def check_belong_to_project(project_id):
     if project_id is None:
         return False
 
-    project = projects_service.get_project_with_relations(str(project_id))
-    current_user = persons_service.get_current_user()
-    if current_user["id"] in project["team"]:
-        return True
-    else:
-        return False
+    return str(project_id) in get_permission_context()["project_ids"]
 
 
 def check_project_access(project_id):
@@ -363,14 +420,7 @@ def check_entity_access(entity_id):
     """
     is_allowed = not permissions.has_vendor_permissions()
     if not is_allowed:
-        nb_tasks = (
-            Task
-            .query
-            .filter(Task.entity_id == entity_id)
-            .filter(build_assignee_filter())
-            .count()
-        )
-        if nb_tasks == 0:
+        if str(entity_id) not in get_assigned_entity_ids():
             raise permissions.PermissionDenied
         is_allowed = True
     return is_allowed
@@ -541,6 +591,12 @@ def get_last_notifications(notification_id=None):
         query = query.filter(Notification.id == notification_id)
 
     notifications = query.limit(100).all()
+    entity_names = names_service.get_full_entity_names(
+        [row[7] for row in notifications]
+    )
+    comment_ids = [row[4] for row in notifications if row[4] is not None]
+    mention_map = _build_mention_map_for_comments(comment_ids)
+    preview_map = _build_first_preview_map_for_comments(comment_ids)
 
     for (
         notification,
@@ -552,16 +608,14 @@ def get_last_notifications(notification_id=None):
         comment_text,
         task_entity_id,
     ) in notifications:
-        (full_entity_name, episode_id) = names_service.get_full_entity_name(
-            task_entity_id
+        (full_entity_name, episode_id) = entity_names.get(
+            str(task_entity_id), (None, None)
         )
         preview_file_id = None
         mentions = []
         if comment_id is not None:
-            comment = Comment.get(comment_id)
-            if len(comment.previews) > 0:
-                preview_file_id = comment.previews[0].id
-            mentions = comment.mentions or []
+            preview_file_id = preview_map.get(str(comment_id), None)
+            mentions = mention_map.get(str(comment_id), [])
 
         result.append(
             fields.serialize_dict(
@@ -591,6 +645,39 @@ def get_last_notifications(notification_id=None):
     return result
 
 
+def _build_mention_map_for_comments(comment_ids):
+    """
+    Return a dict where keys are given comment ids and values are the list
+    of ids of the persons mentioned in the comment. It requires a single
+    query.
+    """
+    mention_map = {}
+    if len(comment_ids) > 0:
+        query = db.session.query(mentions_table).filter(
+            mentions_table.c.comment.in_(comment_ids)
+        )
+        for mention in query.all():
+            mention_map.setdefault(str(mention.comment), []).append(
+                str(mention.person)
+            )
+    return mention_map
+
+
+def _build_first_preview_map_for_comments(comment_ids):
+    """
+    Return a dict where keys are given comment ids and values are the id
+    of the first preview linked to the comment. It requires a single query.
+    """
+    preview_map = {}
+    if len(comment_ids) > 0:
+        query = db.session.query(preview_link_table).filter(
+            preview_link_table.c.comment.in_(comment_ids)
+        )
+        for link in query.all():
+            preview_map.setdefault(str(link.comment), link.preview_file)
+    return preview_map
+
+
 def mark_notifications_as_read():
     """
     Mark all recent notifications for current_user as read. It is useful
@@ -709,3 +796,50 @@ def get_context():
         "task_status": task_status_list,
         "search_filters": search_filters,
     }
+
+
+def get_context_cache_tags(snapshot):
+    """
+    Return the cache tags a context snapshot depends on: the tables it is
+    built from, the episodes of its projects (for their first episode), the
+    notifications of its user and the comments they embed.
+    """
+    tags = [
+        cache.get_model_tag(table_name)
+        for table_name in CONTEXT_TABLES
+    ]
+    for project in snapshot["context"]["projects"]:
+        tags.append(cache.get_model_tag("project_episodes", project["id"]))
+    tags.append(
+        cache.get_model_tag("person_notifications", snapshot["person_id"])
+    )
+    for notification in snapshot["context"]["notifications"]:
+        if notification["comment_id"] is not None:
+            tags.append(
+                cache.get_model_tag("comment", notification["comment_id"])
+            )
+    return tags
+
+
+@cache.memoize_function(600, tags=get_context_cache_tags)
+def get_context_snapshot(person_id):
+    """
+    Return the context of given user with a hash of its content. The
+    snapshot is kept in cache until one of the models it depends on changes.
+    Given person must be the current user.
+    """
+    context = get_context()
+    content = json.dumps(context, sort_keys=True, default=str)
+    return {
+        "person_id": person_id,
+        "etag": hashlib.sha1(content.encode("utf-8")).hexdigest(),
+        "context": context,
+    }
+
+
+def get_current_context_snapshot():
+    """
+    Return the context snapshot of the current user.
+    """
+    current_user = persons_service.get_current_user()
+    return get_context_snapshot(current_user["id"])
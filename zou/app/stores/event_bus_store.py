@@ -0,0 +1,279 @@
+"""
+Durable event bus based on a Redis stream. Emitted events are appended to the
+stream and read by consumer groups (event log persistence, event stream,
+event handlers). Each group receives every event. An entry is acknowledged
+once it is processed. Entries read but not acknowledged are replayed by
+their consumer, or claimed by another consumer of the group when they stay
+pending too long. Entries that still can't be handled after a few
+attempts are moved to a dead-letter stream of the group.
+"""
+import json
+import logging
+import os
+import redis
+import time
+
+from zou.app import config
+
+host = config.KEY_VALUE_STORE["host"]
+port = config.KEY_VALUE_STORE["port"]
+redis_db = config.KV_EVENTS_DB_INDEX
+
+STREAM_NAME = "zou:events"
+# Entries a group failed to handle too many times, and the number of failed
+# attempts of each entry.
+DEAD_LETTER_STREAM_NAME = "zou:events:dead-letter:%s"
+ATTEMPTS_KEY = "zou:events:attempts:%s"
+# Groups consuming the bus: event log persistence, event stream (socket.io)
+# and event handlers.
+EVENT_LOG_GROUP = "event-log"
+EVENT_STREAM_GROUP = "event-stream"
+EVENT_HANDLERS_GROUP = "event-handlers"
+# Entries pending for more than this delay (ms) are given to another consumer.
+STALE_ENTRY_DELAY = 60000
+
+logger = logging.getLogger(__name__)
+
+event_bus = None
+
+
+def init():
+    """
+    Initialize the connection to the key value store used for the event bus.
+    The bus stays disabled if it's not configured or if the store can't be
+    reached.
+    """
+    global event_bus
+
+    if not config.EVENT_BUS_ENABLED:
+        return None
+
+    try:
+        event_bus = redis.StrictRedis(
+            host=host, port=port, db=redis_db, decode_responses=True
+        )
+        event_bus.get("test")
+        for group in [
+            EVENT_LOG_GROUP,
+            EVENT_STREAM_GROUP,
+            EVENT_HANDLERS_GROUP,
+        ]:
+            create_group(group)
+    except redis.ConnectionError:
+        event_bus = None
+
+    return event_bus
+
+
+def is_enabled():
+    return event_bus is not None
+
+
+def get_consumer_name():
+    """
+    Return the default consumer name of the current process. The process id
+    is added to the configured name, so the consumers running on the same
+    host don't share their entries.
+    """
+    return "%s-%s" % (config.EVENT_BUS_CONSUMER, os.getpid())
+
+
+def build_entry(event):
+    return {
+        key: json.dumps(value)
+        for (key, value) in event.items()
+    }
+
+
+def parse_entry(entry):
+    return {key: json.loads(value) for (key, value) in entry.items()}
+
+
+def publish(events):
+    """
+    Append given events to the stream with a single round trip. Events are
+    dicts of JSON serializable values. The stream is trimmed to keep
+    approximately EVENT_BUS_MAX_LENGTH entries.
+    """
+    pipeline = event_bus.pipeline(transaction=False)
+    for event in events:
+        pipeline.xadd(
+            STREAM_NAME,
+            build_entry(event),
+            maxlen=config.EVENT_BUS_MAX_LENGTH,
+            approximate=True,
+        )
+    return pipeline.execute()
+
+
+def create_group(group):
+    """
+    Create given consumer group if it doesn't exist. It receives the events
+    published after its creation.
+    """
+    try:
+        event_bus.xgroup_create(STREAM_NAME, group, id="$", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def read(group, consumer, count=100, block=None, pending=False):
+    """
+    Return the next entries for given consumer as a list of (entry id,
+    event) tuples. If pending is True, the entries already delivered to this
+    consumer but not acknowledged are returned instead.
+    """
+    result = event_bus.xreadgroup(
+        group,
+        consumer,
+        {STREAM_NAME: "0" if pending else ">"},
+        count=count,
+        block=block,
+    )
+    entries = []
+    for (_, stream_entries) in result or []:
+        for (entry_id, entry) in stream_entries:
+            if entry:
+                entries.append((entry_id, parse_entry(entry)))
+    return entries
+
+
+def claim_stale_entries(group, consumer, min_idle_time, count=100):
+    """
+    Give to given consumer the entries of the group that stayed pending for
+    more than min_idle_time milliseconds, most likely because their consumer
+    died. They are returned by the next read of pending entries.
+    """
+    pending_entries = event_bus.xpending_range(
+        STREAM_NAME, group, "-", "+", count
+    )
+    entry_ids = [
+        entry["message_id"]
+        for entry in pending_entries
+        if entry["time_since_delivered"] >= min_idle_time and
+        entry["consumer"] != consumer
+    ]
+    if len(entry_ids) > 0:
+        event_bus.xclaim(
+            STREAM_NAME, group, consumer, min_idle_time, entry_ids
+        )
+    return entry_ids
+
+
+def ack(group, entry_ids):
+    if len(entry_ids) > 0:
+        event_bus.xack(STREAM_NAME, group, *entry_ids)
+
+
+def record_failures(group, entries, max_attempts):
+    """
+    Count a failed attempt for given entries. Entries that reached
+    max_attempts are moved to the dead-letter stream of the group and
+    acknowledged, the other ones stay pending to be replayed. Return the ids
+    of moved entries.
+    """
+    attempts_key = ATTEMPTS_KEY % group
+    pipeline = event_bus.pipeline(transaction=False)
+    for (entry_id, _) in entries:
+        pipeline.hincrby(attempts_key, entry_id, 1)
+    attempts = pipeline.execute()
+
+    dead_entries = [
+        (entry_id, event)
+        for ((entry_id, event), nb_attempts) in zip(entries, attempts)
+        if nb_attempts >= max_attempts
+    ]
+    if len(dead_entries) > 0:
+        pipeline = event_bus.pipeline(transaction=False)
+        for (entry_id, event) in dead_entries:
+            logger.error(
+                "Event %s (%s) can't be handled by %s, it is moved to the "
+                "dead-letter stream" % (entry_id, event.get("name"), group)
+            )
+            pipeline.xadd(DEAD_LETTER_STREAM_NAME % group, build_entry(event))
+        pipeline.execute()
+        dead_entry_ids = [entry_id for (entry_id, _) in dead_entries]
+        ack(group, dead_entry_ids)
+    return [entry_id for (entry_id, _) in dead_entries]
+
+
+def clear_failures(group, entry_ids):
+    if len(entry_ids) > 0:
+        event_bus.hdel(ATTEMPTS_KEY % group, *entry_ids)
+
+
+def consume_batch(
+    group,
+    consumer,
+    handle_events,
+    count=100,
+    block=None,
+    min_idle_time=STALE_ENTRY_DELAY,
+    max_attempts=None,
+):
+    """
+    Give the next batch of events of given group to handle_events and
+    acknowledge them once it returns. Entries left pending by this consumer
+    or claimed from stale consumers are handled first. Return the number of
+    handled events.
+
+    handle_events can return the ids of the events it couldn't handle. They
+    stay pending and are replayed until max_attempts is reached, then they
+    are moved to the dead-letter stream. If it raises an error, the whole
+    batch stays pending.
+    """
+    if max_attempts is None:
+        max_attempts = config.EVENT_BUS_MAX_ATTEMPTS
+    claim_stale_entries(group, consumer, min_idle_time, count)
+    entries = read(group, consumer, count, pending=True)
+    if len(entries) == 0:
+        entries = read(group, consumer, count, block=block)
+    if len(entries) > 0:
+        failed_event_ids = set(
+            handle_events([event for (_, event) in entries]) or []
+        )
+        failed_entries = [
+            (entry_id, event)
+            for (entry_id, event) in entries
+            if event.get("id") in failed_event_ids
+        ]
+        handled_entry_ids = [
+            entry_id
+            for (entry_id, event) in entries
+            if event.get("id") not in failed_event_ids
+        ]
+        ack(group, handled_entry_ids)
+        clear_failures(group, handled_entry_ids)
+        if len(failed_entries) > 0:
+            dead_entry_ids = record_failures(
+                group, failed_entries, max_attempts
+            )
+            clear_failures(group, dead_entry_ids)
+    return len(entries)
+
+
+def consume(group, consumer, handle_events, count=100, block=5000):
+    """
+    Consume events of given group forever. When handling a batch fails, it
+    stays pending and is replayed after a short delay.
+    """
+    create_group(group)
+    while True:
+        try:
+            consume_batch(group, consumer, handle_events, count, block)
+        except Exception:
+            logger.error("Events of %s can't be handled" % group, exc_info=1)
+            time.sleep(1)
+
+
+def clear():
+    if event_bus is not None:
+        event_bus.delete(STREAM_NAME)
+        for group in [
+            EVENT_LOG_GROUP,
+            EVENT_STREAM_GROUP,
+            EVENT_HANDLERS_GROUP,
+        ]:
+            event_bus.delete(DEAD_LETTER_STREAM_NAME % group)
+            event_bus.delete(ATTEMPTS_KEY % group)
@@ -1,13 +1,16 @@
 import os
-import io
+import threading
 import flask_fs as fs
 
+from flask_fs.errors import FileNotFound
 from flask_fs.backends.local import LocalBackend
 from flask_fs.backends.swift import SwiftBackend
 from flask_fs.backends.s3 import S3Backend
 
 from zou.app import app
 
+READ_CHUNK_SIZE = 1024 * 1024
+
 
 def read(self, filename):
     with self.open(filename, "rb") as f:
@@ -30,39 +33,47 @@ def init_swift(self, name, config):
     """
     Hack needed because Flask FS backend supports only swift 1.0 authentication.
     """
-    import swiftclient
-
     super(SwiftBackend, self).__init__(name, config)
-    version = "3"
-    if "2.0" in config.authurl:
-        version = "2.0"
-    self.conn = swiftclient.Connection(
-        user=config.user,
-        key=config.key,
-        authurl=config.authurl,
-        auth_version=version,
-        os_options={
-            "tenant_name": config.tenant_name,
-            "region_name": config.region_name,
-        },
-    )
+    self.swift_config = config
+    self.thread_local = threading.local()
     self.conn.put_container(self.name)
 
 
+def get_swift_connection(self):
+    """
+    Return the Swift connection of the current thread. A connection is not
+    thread safe (it re-authenticates by mutating itself), so each thread
+    builds its own one.
+    """
+    import swiftclient
+
+    conn = getattr(self.thread_local, "conn", None)
+    if conn is None:
+        config = self.swift_config
+        version = "3"
+        if "2.0" in config.authurl:
+            version = "2.0"
+        conn = swiftclient.Connection(
+            user=config.user,
+            key=config.key,
+            authurl=config.authurl,
+            auth_version=version,
+            os_options={
+                "tenant_name": config.tenant_name,
+                "region_name": config.region_name,
+            },
+        )
+        self.thread_local.conn = conn
+    return conn
+
+
 def init_s3(self, name, config):
     import boto3
 
     super(S3Backend, self).__init__(name, config)
-    self.session = boto3.session.Session()
+    self.s3_config = config
     self.s3config = boto3.session.Config(signature_version='s3v4')
-
-    self.s3 = self.session.resource('s3',
-                                    config=self.s3config,
-                                    endpoint_url=config.endpoint,
-                                    region_name=config.region,
-                                    aws_access_key_id=config.access_key,
-                                    aws_secret_access_key=config.secret_key)
-    self.bucket = self.s3.Bucket(name)
+    self.thread_local = threading.local()
 
     try:
         self.bucket.create(
@@ -74,6 +85,92 @@ def init_s3(self, name, config):
         pass
 
 
+def get_s3_resources(self):
+    """
+    Return the S3 resource and bucket of the current thread. Boto3 sessions
+    and resources must not be shared between threads, so each thread builds
+    its own ones.
+    """
+    import boto3
+
+    resources = getattr(self.thread_local, "resources", None)
+    if resources is None:
+        config = self.s3_config
+        session = boto3.session.Session()
+        s3 = session.resource('s3',
+                              config=self.s3config,
+                              endpoint_url=config.endpoint,
+                              region_name=config.region,
+                              aws_access_key_id=config.access_key,
+                              aws_secret_access_key=config.secret_key)
+        resources = (s3, s3.Bucket(self.name))
+        self.thread_local.resources = resources
+    return resources
+
+
+def get_range_header(start, end):
+    """
+    Build HTTP Range header value for given bytes (end is inclusive).
+    """
+    if end is None:
+        return "bytes=%d-" % start
+    else:
+        return "bytes=%d-%d" % (start, end)
+
+
+def read_chunks_local(self, filename, start=None, end=None):
+    """
+    Read given file chunk by chunk. If start is set, only bytes from start to
+    end (inclusive) are read.
+    """
+    with open(self.path(filename), "rb") as f:
+        remaining = None
+        if start is not None:
+            f.seek(start)
+            if end is not None:
+                remaining = end - start + 1
+        while remaining is None or remaining > 0:
+            size = READ_CHUNK_SIZE
+            if remaining is not None:
+                size = min(size, remaining)
+                remaining -= size
+            chunk = f.read(size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def read_chunks_swift(self, filename, start=None, end=None):
+    headers = {}
+    if start is not None:
+        headers["Range"] = get_range_header(start, end)
+    _, chunks = self.conn.get_object(
+        self.name, filename, resp_chunk_size=READ_CHUNK_SIZE, headers=headers
+    )
+    return chunks
+
+
+def read_chunks_s3(self, filename, start=None, end=None):
+    kwargs = {}
+    if start is not None:
+        kwargs["Range"] = get_range_header(start, end)
+    body = self.bucket.Object(filename).get(**kwargs)["Body"]
+    return body.iter_chunks(READ_CHUNK_SIZE)
+
+
+def get_size_local(self, filename):
+    return os.path.getsize(self.path(filename))
+
+
+def get_size_swift(self, filename):
+    headers = self.conn.head_object(self.name, filename)
+    return int(headers["content-length"])
+
+
+def get_size_s3(self, filename):
+    return self.bucket.Object(filename).content_length
+
+
 def clear_bucket(bucket):
     for filename in bucket.list_files():
         os.remove(os.path.join(bucket.root, filename))
@@ -81,22 +178,41 @@ def clear_bucket(bucket):
 
 LocalBackend.read = read
 LocalBackend.path = path
+LocalBackend.read_chunks = read_chunks_local
+LocalBackend.get_size = get_size_local
 SwiftBackend.__init__ = init_swift
+SwiftBackend.conn = property(get_swift_connection)
+SwiftBackend.read_chunks = read_chunks_swift
+SwiftBackend.get_size = get_size_swift
 S3Backend.__init__ = init_s3
+S3Backend.s3 = property(lambda self: get_s3_resources(self)[0])
+S3Backend.bucket = property(lambda self: get_s3_resources(self)[1])
+S3Backend.read_chunks = read_chunks_s3
+S3Backend.get_size = get_size_s3
 
 
 def make_key(prefix, id):
     return "%s-%s" % (prefix, id)
 
 
-def make_read_generator(bucket, key):
-    read_stream = bucket.read(key)
+def make_read_generator(bucket, key, start=None, end=None):
+    """
+    Return a generator streaming the stored file chunk by chunk, without
+    loading the whole file in memory. If start is set, only bytes from start
+    to end (inclusive) are read (end can be None to read until the end).
+    """
+    if not bucket.exists(key):
+        raise FileNotFound(key)
+    return bucket.backend.read_chunks(key, start, end)
 
-    def read_generator(read_stream):
-        for chunk in io.BytesIO(read_stream):
-            yield chunk
 
-    return read_generator(read_stream)
+def get_size(bucket, key):
+    """
+    Return the size in bytes of the stored file.
+    """
+    if not bucket.exists(key):
+        raise FileNotFound(key)
+    return bucket.backend.get_size(key)
 
 
 def make_storage(bucket):
@@ -132,9 +248,14 @@ def get_picture(prefix, id):
     return pictures.read(key)
 
 
-def open_picture(prefix, id):
+def open_picture(prefix, id, start=None, end=None):
+    key = make_key(prefix, id)
+    return make_read_generator(pictures, key, start, end)
+
+
+def get_picture_size(prefix, id):
     key = make_key(prefix, id)
-    return make_read_generator(pictures, key)
+    return get_size(pictures, key)
 
 
 def read_picture(prefix, id):
@@ -167,9 +288,14 @@ def get_movie(prefix, id):
     return movies.read(key)
 
 
-def open_movie(prefix, id):
+def open_movie(prefix, id, start=None, end=None):
     key = make_key(prefix, id)
-    return make_read_generator(movies, key)
+    return make_read_generator(movies, key, start, end)
+
+
+def get_movie_size(prefix, id):
+    key = make_key(prefix, id)
+    return get_size(movies, key)
 
 
 def read_movie(prefix, id):
@@ -202,9 +328,14 @@ def get_file(prefix, id):
     return files.read(key)
 
 
-def open_file(prefix, id):
+def open_file(prefix, id, start=None, end=None):
+    key = make_key(prefix, id)
+    return make_read_generator(files, key, start, end)
+
+
+def get_file_size(prefix, id):
     key = make_key(prefix, id)
-    return make_read_generator(files, key)
+    return get_size(files, key)
 
 
 def read_file(prefix, id):
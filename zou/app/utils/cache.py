@@ -2,6 +2,17 @@
 This module is a wrapper for flask_caching. It configures it and rename
 the memoize function. The aim with that cache is to minimize the requests
 made on the target database.
+
+Memoized results can be tagged with the models they depend on (see
+`get_model_tag`). When a tagged model changes, the tag is invalidated and every
+cached result depending on it is considered stale, whatever its timeout is.
+Tags are invalidated automatically when a model is saved, updated or deleted
+and when an event related to a model is emitted.
+
+Tag versions are revisions of a global clock, incremented at each
+invalidation. The clock is read before a result is computed: if one of its
+tags was invalidated meanwhile, the result may be built from outdated rows
+and it is stored as stale.
 """
 import redis
 
@@ -12,6 +23,15 @@ from zou.app import config
 
 cache = None
 
+TAG_VERSION_PREFIX = "tag-revision:"
+TAG_CLOCK_KEY = "tag-revision-clock"
+# Version stored for tags invalidated while a result was computed. It never
+# matches a real version.
+STALE_TAG_VERSION = -1
+# Tag versions must live at least as long as the longest tagged memoize
+# timeout. An expired version only makes the related entries stale.
+TAG_VERSION_TIMEOUT = 36000
+
 try:
     redis_cache = redis.StrictRedis(
         host=config.KEY_VALUE_STORE["host"],
@@ -20,21 +40,151 @@ try:
         decode_responses=True,
     )
     redis_cache.get("test")
-    cache = Cache(
-        config={
-            "CACHE_TYPE": "redis",
-            "CACHE_REDIS_HOST": config.KEY_VALUE_STORE["host"],
-            "CACHE_REDIS_PORT": config.KEY_VALUE_STORE["port"],
-            "CACHE_REDIS_DB": config.MEMOIZE_DB_INDEX,
-        }
-    )
+    cache_config = {
+        "CACHE_TYPE": "redis",
+        "CACHE_REDIS_HOST": config.KEY_VALUE_STORE["host"],
+        "CACHE_REDIS_PORT": config.KEY_VALUE_STORE["port"],
+        "CACHE_REDIS_DB": config.MEMOIZE_DB_INDEX,
+    }
+    # An in-process LRU can be put in front of Redis to save network round
+    # trips on hot lookups.
+    if config.MEMOIZE_LOCAL_CACHE_SIZE > 0:
+        cache_config.update(
+            {
+                "CACHE_TYPE": "zou.app.utils.cache_backends.two_tier_redis",
+                "CACHE_LOCAL_SIZE": config.MEMOIZE_LOCAL_CACHE_SIZE,
+                "CACHE_LOCAL_TIMEOUT": config.MEMOIZE_LOCAL_CACHE_TIMEOUT,
+            }
+        )
+    cache = Cache(config=cache_config)
 
 # This is needed to run tests which. This way they do not require a Redis
 # instance to work properly
 except redis.ConnectionError:
     cache = Cache(config={"CACHE_TYPE": "simple"})
 
-memoize_function = cache.memoize
+
+def memoize_function(timeout, tags=None):
+    """
+    Memoize decorated function for given timeout (in seconds). If tags are
+    given, the cached result is dropped as soon as one of these tags is
+    invalidated. Tags can be a list of strings or a function that receives the
+    function result and returns the list of tags it depends on.
+    """
+    if tags is None:
+        return cache.memoize(timeout)
+
+    def decorator(f):
+        @cache.memoize(timeout)
+        @wraps(f)
+        def tagged_function(*args, **kwargs):
+            started_at = get_tag_clock()
+            result = f(*args, **kwargs)
+            if callable(tags):
+                result_tags = tags(result)
+            else:
+                result_tags = tags
+            versions = get_tag_versions(
+                result_tags,
+                create=True,
+                timeout=max(timeout, TAG_VERSION_TIMEOUT),
+                created_version=started_at,
+            )
+            for (tag, version) in versions.items():
+                if version is None or version > started_at:
+                    versions[tag] = STALE_TAG_VERSION
+            return {"result": result, "tags": versions}
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            entry = tagged_function(*args, **kwargs)
+            if not is_fresh(entry["tags"]):
+                cache.delete_memoized(tagged_function, *args, **kwargs)
+                entry = tagged_function(*args, **kwargs)
+            return entry["result"]
+
+        # Allow the use of cache.delete_memoized on the decorated function.
+        decorated_function.uncached = tagged_function.uncached
+        decorated_function.cache_timeout = tagged_function.cache_timeout
+        decorated_function.make_cache_key = tagged_function.make_cache_key
+        return decorated_function
+
+    return decorator
+
+
+def get_model_tag(table_name, instance_id=None):
+    """
+    Return the tag related to given model instance. If no instance id is
+    given, the tag related to the whole table is returned.
+    """
+    if instance_id is None:
+        return table_name
+    else:
+        return "%s:%s" % (table_name, instance_id)
+
+
+def get_tag_clock():
+    """
+    Return the current revision of the tag clock.
+    """
+    return cache.get(TAG_CLOCK_KEY) or 0
+
+
+def get_tag_versions(
+    tags, create=False, timeout=TAG_VERSION_TIMEOUT, created_version=None
+):
+    """
+    Return a dict with current version of each given tag. When create flag is
+    set, tags that don't have a version yet get created_version (current
+    clock revision by default), unless they are invalidated meanwhile.
+    Generated versions expire after given timeout (in seconds).
+    """
+    tags = [tag for tag in set(tags) if tag is not None]
+    if len(tags) == 0:
+        return {}
+
+    keys = [TAG_VERSION_PREFIX + tag for tag in tags]
+    versions = dict(zip(tags, cache.get_many(*keys)))
+    missing_tags = [
+        tag for (tag, version) in versions.items() if version is None
+    ]
+    if create and len(missing_tags) > 0:
+        if created_version is None:
+            created_version = get_tag_clock()
+        for tag in missing_tags:
+            cache.add(
+                TAG_VERSION_PREFIX + tag, created_version, timeout=timeout
+            )
+        versions.update(
+            zip(
+                missing_tags,
+                cache.get_many(
+                    *[TAG_VERSION_PREFIX + tag for tag in missing_tags]
+                ),
+            )
+        )
+    return versions
+
+
+def is_fresh(tag_versions):
+    """
+    Return True if none of given tags were invalidated since given versions
+    were retrieved.
+    """
+    return get_tag_versions(tag_versions.keys()) == tag_versions
+
+
+def invalidate_tags(*tags):
+    """
+    Invalidate all cached results that depend on given tags: they get the
+    next revision of the tag clock as version.
+    """
+    keys = [TAG_VERSION_PREFIX + tag for tag in set(tags) if tag is not None]
+    if len(keys) > 0:
+        version = cache.cache.inc(TAG_CLOCK_KEY)
+        cache.set_many(
+            {key: version for key in keys}, timeout=TAG_VERSION_TIMEOUT
+        )
 
 
 def invalidate(*args):
@@ -0,0 +1,218 @@
+"""
+Custom backends for the memoization cache.
+
+The two-tier backend keeps a bounded in-process LRU in front of Redis. Values
+are kept in their serialized form, so every hit returns a fresh copy, like a
+Redis hit does. Workers notify each other of every write through Redis
+pub/sub, which keeps local copies coherent across workers.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+from collections import OrderedDict
+
+from flask_caching.backends.rediscache import RedisCache
+
+INVALIDATION_CHANNEL = "zou-memoize-invalidation"
+
+
+class LocalLRUCache(object):
+    """
+    Thread safe, size bounded LRU storing values with an expiration date.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key, None)
+            if entry is None:
+                return None
+            (expires_at, value) = entry
+            if expires_at < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        if timeout <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.time() + timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class TwoTierRedisCache(RedisCache):
+    """
+    Redis cache with a per-worker LRU in front of it. Local entries live at
+    most `local_timeout` seconds, which bounds staleness if an invalidation
+    message is lost.
+    """
+
+    def __init__(self, local_size=1000, local_timeout=60, **kwargs):
+        super(TwoTierRedisCache, self).__init__(**kwargs)
+        self.local_cache = LocalLRUCache(local_size)
+        self.local_timeout = local_timeout
+        self.source_id = str(uuid.uuid4())
+        self.listener_pid = None
+        self.listener_lock = threading.Lock()
+
+    def get(self, key):
+        self._ensure_listener()
+        dump = self.local_cache.get(key)
+        if dump is None:
+            pipe = self._read_clients.pipeline(transaction=False)
+            pipe.get(self.key_prefix + key)
+            pipe.pttl(self.key_prefix + key)
+            (dump, ttl) = pipe.execute()
+            self._set_local(key, dump, ttl)
+        return self.load_object(dump)
+
+    def get_many(self, *keys):
+        self._ensure_listener()
+        dumps = [self.local_cache.get(key) for key in keys]
+        missing_keys = [key for key, dump in zip(keys, dumps) if dump is None]
+        if len(missing_keys) > 0:
+            pipe = self._read_clients.pipeline(transaction=False)
+            for key in missing_keys:
+                pipe.get(self.key_prefix + key)
+                pipe.pttl(self.key_prefix + key)
+            results = pipe.execute()
+            missing_dumps = {}
+            for index, key in enumerate(missing_keys):
+                (dump, ttl) = results[index * 2:index * 2 + 2]
+                self._set_local(key, dump, ttl)
+                missing_dumps[key] = dump
+            dumps = [
+                missing_dumps[key] if dump is None else dump
+                for key, dump in zip(keys, dumps)
+            ]
+        return [self.load_object(dump) for dump in dumps]
+
+    def set(self, key, value, timeout=None):
+        result = super(TwoTierRedisCache, self).set(key, value, timeout)
+        self._invalidate(key)
+        return result
+
+    def add(self, key, value, timeout=None):
+        result = super(TwoTierRedisCache, self).add(key, value, timeout)
+        self._invalidate(key)
+        return result
+
+    def set_many(self, mapping, timeout=None):
+        result = super(TwoTierRedisCache, self).set_many(mapping, timeout)
+        self._invalidate(*dict(mapping).keys())
+        return result
+
+    def delete(self, key):
+        result = super(TwoTierRedisCache, self).delete(key)
+        self._invalidate(key)
+        return result
+
+    def delete_many(self, *keys):
+        result = super(TwoTierRedisCache, self).delete_many(*keys)
+        self._invalidate(*keys)
+        return result
+
+    def clear(self):
+        result = super(TwoTierRedisCache, self).clear()
+        self.local_cache.clear()
+        self._publish({"source": self.source_id, "clear": True})
+        return result
+
+    def inc(self, key, delta=1):
+        result = super(TwoTierRedisCache, self).inc(key, delta)
+        self._invalidate(key)
+        return result
+
+    def dec(self, key, delta=1):
+        result = super(TwoTierRedisCache, self).dec(key, delta)
+        self._invalidate(key)
+        return result
+
+    def _set_local(self, key, dump, ttl):
+        """
+        Store given serialized value locally. It never outlives its Redis
+        counterpart (ttl is in milliseconds, -1 means no expiration).
+        """
+        if dump is None or ttl == -2:
+            return
+        timeout = self.local_timeout
+        if ttl >= 0:
+            timeout = min(timeout, ttl / 1000.0)
+        self.local_cache.set(key, dump, timeout)
+
+    def _invalidate(self, *keys):
+        if len(keys) > 0:
+            self.local_cache.delete(*keys)
+            self._publish({"source": self.source_id, "keys": list(keys)})
+
+    def _publish(self, message):
+        self._write_client.publish(INVALIDATION_CHANNEL, json.dumps(message))
+
+    def _handle_message(self, message):
+        try:
+            data = json.loads(message["data"])
+        except (TypeError, ValueError):
+            return
+        if data.get("source", None) == self.source_id:
+            return
+        if data.get("clear", False):
+            self.local_cache.clear()
+        else:
+            self.local_cache.delete(*data.get("keys", []))
+
+    def _ensure_listener(self):
+        """
+        Start the thread listening to invalidation messages. It is started
+        lazily and once per process, because workers are forked after the
+        application is loaded.
+        """
+        pid = os.getpid()
+        if self.listener_pid == pid:
+            return
+        with self.listener_lock:
+            if self.listener_pid != pid:
+                self.local_cache.clear()
+                pubsub = self._write_client.pubsub(
+                    ignore_subscribe_messages=True
+                )
+                pubsub.subscribe(
+                    **{INVALIDATION_CHANNEL: self._handle_message}
+                )
+                pubsub.run_in_thread(sleep_time=1, daemon=True)
+                self.listener_pid = pid
+
+
+def two_tier_redis(app, config, args, kwargs):
+    """
+    Flask-Caching factory for the two-tier backend.
+    """
+    kwargs.update(
+        dict(
+            host=config.get("CACHE_REDIS_HOST", "localhost"),
+            port=config.get("CACHE_REDIS_PORT", 6379),
+            db=config.get("CACHE_REDIS_DB", 0),
+            local_size=config.get("CACHE_LOCAL_SIZE", 1000),
+            local_timeout=config.get("CACHE_LOCAL_TIMEOUT", 60),
+        )
+    )
+    return TwoTierRedisCache(*args, **kwargs)
@@ -6,15 +6,18 @@ import datetime
 
 
 from ldap3 import Server, Connection, ALL, NTLM, SIMPLE
-from zou.app.utils import thumbnail as thumbnail_utils
+from zou.app import config
+from zou.app.utils import fs, thumbnail as thumbnail_utils
 from zou.app.stores import auth_tokens_store, file_store
 from zou.app.services import (
     assets_service,
     backup_service,
     deletion_service,
+    events_service,
     persons_service,
     projects_service,
     shots_service,
+    stats_service,
     sync_service,
     tasks_service,
 )
@@ -317,16 +320,22 @@ def import_data_from_another_instance(
     login,
     password,
     project=None,
-    with_events=False
+    with_events=False,
+    workers=sync_service.SYNC_WORKERS,
+    reset=False,
 ):
     """
     Retrieve and save all the data from another API instance. It doesn't
-    change the IDs.
+    change the IDs. An interrupted import is resumed where it stopped, unless
+    reset is set.
     """
+    if reset:
+        sync_service.clear_checkpoints()
     sync_service.init(target, login, password)
     # sync_service.run_main_data_sync(project=project)
-    sync_service.run_project_data_sync(project=project)
+    sync_service.run_project_data_sync(project=project, workers=workers)
     # sync_service.run_other_sync(project=project)
+    sync_service.clear_checkpoints()
 
 
 def run_sync_change_daemon(event_target, target, login, password, logs_dir):
@@ -389,18 +398,38 @@ def import_last_file_changes_from_another_instance(
     print("Last files syncing ended.")
 
 
-def import_files_from_another_instance(target, login, password, project=None):
+def import_files_from_another_instance(
+    target, login, password, project=None, workers=8
+):
     """
     Retrieve and save all the data related most recent events from another API
     instance. It doesn't change the IDs.
     """
     sync_service.init(target, login, password)
-    sync_service.download_files_from_another_instance(project=project)
+    print_transfer_summary(
+        sync_service.download_files_from_another_instance(
+            project=project, workers=workers
+        )
+    )
 
 
-def download_file_from_storage():
-    sync_service.download_entity_thumbnails_from_storage()
-    sync_service.download_preview_files_from_storage()
+def download_file_from_storage(workers=8):
+    sync_service.download_entity_thumbnails_from_storage(workers=workers)
+    print_transfer_summary(
+        sync_service.download_preview_files_from_storage(workers=workers)
+    )
+
+
+def print_transfer_summary(summary):
+    print(
+        "%s files transferred (%.2f MB/s), %s skipped, %s failed."
+        % (
+            summary["transferred"],
+            summary["throughput"] / 1024 / 1024,
+            summary["skipped"],
+            summary["failed"],
+        )
+    )
 
 
 def dump_database():
@@ -415,17 +444,48 @@ def dump_database():
     backup_service.store_db_backup(filename)
 
 
-def upload_files_to_cloud_storage(days):
-    backup_service.upload_entity_thumbnails_to_storage(days)
-    backup_service.upload_preview_files_to_storage(days)
+def upload_files_to_cloud_storage(days, workers=8):
+    backup_service.upload_entity_thumbnails_to_storage(days, workers=workers)
+    print_transfer_summary(
+        backup_service.upload_preview_files_to_storage(days, workers=workers)
+    )
 
 
 def reset_tasks_data(project_id):
     deletion_service.reset_tasks_data(project_id)
 
 
+def rebuild_project_stats(project_id=None):
+    print("Start rebuilding project stats.")
+    project_ids = stats_service.rebuild_project_stats(project_id)
+    print("Stats rebuilt for %s project(s)." % len(project_ids))
+
+
+def consume_events(group, consumer=None):
+    print("Start consuming events of the %s group." % group)
+    events_service.consume_events(group, consumer=consumer)
+
+
+def evict_cache_files():
+    print("Start evicting cache files from %s." % config.TMP_DIR)
+    removed_files = fs.evict_cache_files(
+        config.TMP_DIR,
+        config.FS_CACHE_MAX_SIZE,
+        grace_period=config.FS_CACHE_GRACE_PERIOD,
+    )
+    print("%s cache file(s) removed." % len(removed_files))
+
+
+def create_event_partitions():
+    print("Start creating event partitions.")
+    created_partitions = events_service.create_event_partitions()
+    print("%s event partition(s) created." % len(created_partitions))
+
+
 def remove_old_data(days_old=90):
     print("Start removing non critical data older than %s." % days_old)
+    print("Preparing event partitions...")
+    events_service.create_event_partitions()
     print("Removing old events...")
     deletion_service.remove_old_events(days_old)
     print("Removing old login logs...")
@@ -3,11 +3,14 @@ try:
 except ImportError:
     from io import StringIO
 import csv
+import zlib
 
 from zou.app import config
-from flask import make_response
+from flask import Response, make_response, stream_with_context
 from slugify import slugify
 
+from zou.app.utils import streaming, xlsx_utils
+
 
 def build_csv_response(csv_content, file_name="export"):
     """
@@ -21,6 +24,78 @@ def build_csv_response(csv_content, file_name="export"):
     return csv_response
 
 
+def build_csv_stream_response(
+    rows, file_name="export", file_format="csv", compress=False
+):
+    """
+    Construct a Flask response that sends given rows while they are
+    generated. Rows can be written as CSV (optionally gzipped) or as an XLSX
+    spreadsheet. The request context is kept alive until the end of the
+    stream, so rows can still be loaded from the database.
+    """
+    file_name = build_csv_file_name(file_name)
+    if file_format == "xlsx":
+        chunks = xlsx_utils.iter_xlsx_chunks(rows)
+        mimetype = xlsx_utils.XLSX_MIMETYPE
+        extension = "xlsx"
+    elif compress:
+        chunks = iter_gzip_chunks(iter_csv_chunks(rows))
+        mimetype = "application/gzip"
+        extension = "csv.gz"
+    else:
+        chunks = iter_csv_chunks(rows)
+        mimetype = "text/csv"
+        extension = "csv"
+
+    csv_response = Response(stream_with_context(chunks), mimetype=mimetype)
+    csv_response.headers["Content-Disposition"] = (
+        "attachment; filename=%s.%s" % (file_name, extension)
+    )
+    return csv_response
+
+
+def get_export_format(request):
+    """
+    Return the export format requested by the client: csv or xlsx.
+    """
+    if request.args.get("format", "csv") == "xlsx":
+        return "xlsx"
+    else:
+        return "csv"
+
+
+def is_compression_requested(request):
+    """
+    Return True if the client asked for a gzipped CSV file.
+    """
+    return request.args.get("gzip", "false") == "true"
+
+
+def iter_csv_chunks(rows, size=streaming.STREAM_CHUNK_SIZE):
+    """
+    Encode given rows as CSV, by batch of `size` rows.
+    """
+    string_wrapper = StringIO()
+    csv_writer = csv.writer(string_wrapper, delimiter=";")
+    for chunk in streaming.iter_chunks(rows, size):
+        csv_writer.writerows(chunk)
+        yield string_wrapper.getvalue()
+        string_wrapper.seek(0)
+        string_wrapper.truncate(0)
+
+
+def iter_gzip_chunks(chunks):
+    """
+    Compress given string chunks into a gzip stream.
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if len(data) > 0:
+            yield data
+    yield compressor.flush()
+
+
 def build_csv_file_name(file_name):
     """
     Add application name as prefix of the file name.
@@ -1,16 +1,41 @@
+import datetime
+
 from collections import OrderedDict
 
 from flask import current_app
 
-from zou.app.stores import publisher_store
+from zou.app.stores import event_bus_store, publisher_store
 from zou.app.models.event import ApiEvent
-from zou.app.utils import fields
+from zou.app.utils import cache, fields, permissions
 
 import event_handlers
 
 handlers = {}
 
+# Events about entity types are stored in the entity table.
+ENTITY_EVENT_MODELS = [
+    "asset",
+    "edit",
+    "episode",
+    "scene",
+    "sequence",
+    "shot",
+]
+
+# Events that can change the team memberships or the task assignations used
+# by access checks.
+PERMISSION_EVENTS = [
+    "person:delete",
+    "person:update",
+    "project:delete",
+    "project:update",
+    "task:assign",
+    "task:delete",
+    "task:unassign",
+]
+
 publisher_store.init()
+event_bus_store.init()
 
 
 def register(event, name, handler, app=None):
@@ -62,7 +87,8 @@ def emit(event, data=None, persist=True, project_id=None):
     Emit an event which leads to the execution of all event handlers registered
     for that event name.
     It publishes too the event to other services
-    (like the realtime event daemon).
+    (like the realtime event daemon). If the event bus is enabled but can't
+    be reached, the event is handled directly.
     """
 
     if not data:
@@ -72,6 +98,21 @@ def emit(event, data=None, persist=True, project_id=None):
         data["project_id"] = project_id
 
     data = fields.serialize_dict(data)
+    cache.invalidate_tags(*get_cache_tags(event, data))
+    if event in PERMISSION_EVENTS:
+        permissions.clear_permission_context()
+
+    if event_bus_store.is_enabled():
+        try:
+            publish_to_bus(
+                event, [data], persist=persist, project_id=project_id
+            )
+            return
+        except Exception:
+            current_app.logger.error(
+                "Event can't be sent to the event bus", exc_info=1
+            )
+
     publisher_store.publish(event, data)
 
     if persist:
@@ -84,17 +125,111 @@ def emit(event, data=None, persist=True, project_id=None):
         current_app.logger.error("Error handling event", exc_info=1)
 
 
-def save_event(event, data, project_id=None):
+def emit_many(event, data_list, persist=True, project_id=None):
     """
-    Store event information in the database.
+    Emit given event once for each data of given list. Cache invalidations
+    are merged and events are stored in a single transaction, which makes it
+    suited to batch operations.
+    """
+    if project_id is not None:
+        data_list = [dict(data, project_id=project_id) for data in data_list]
+    data_list = [fields.serialize_dict(data) for data in data_list]
+
+    cache_tags = set()
+    for data in data_list:
+        cache_tags.update(get_cache_tags(event, data))
+    cache.invalidate_tags(*cache_tags)
+    if event in PERMISSION_EVENTS:
+        permissions.clear_permission_context()
+
+    if event_bus_store.is_enabled():
+        try:
+            publish_to_bus(
+                event, data_list, persist=persist, project_id=project_id
+            )
+            return
+        except Exception:
+            current_app.logger.error(
+                "Events can't be sent to the event bus", exc_info=1
+            )
+
+    for data in data_list:
+        publisher_store.publish(event, data)
+
+    if persist:
+        save_events(event, data_list, project_id=project_id)
+
+    for data in data_list:
+        try:
+            event_handlers.listen_event_task.delay(event, data)
+        except Exception:
+            current_app.logger.error("Error handling event", exc_info=1)
+
+
+def publish_to_bus(event, data_list, persist=True, project_id=None):
+    """
+    Append given events to the event bus. Their storage, their publication to
+    the event stream and their handling are done by the bus consumers.
+    """
+    if project_id == 'None':
+        project_id = None
+    user_id = fields.serialize_value(get_current_user_id())
+    created_at = datetime.datetime.utcnow().isoformat()
+    event_bus_store.publish([
+        {
+            "id": str(fields.gen_uuid()),
+            "name": event,
+            "data": data,
+            "persist": persist,
+            "project_id": fields.serialize_value(project_id),
+            "user_id": user_id,
+            "created_at": created_at,
+        }
+        for data in data_list
+    ])
+
+
+def get_cache_tags(event, data):
+    """
+    Return the cache tags related to the model instance concerned by given
+    event. The event name is expected to be formatted like `model:action`
+    with a `model_id` field in its data.
     """
+    model_name = event.split(":")[0]
+    instance_id = data.get("%s_id" % model_name.replace("-", "_"), None)
+    if instance_id is None:
+        return []
+
+    if model_name in ENTITY_EVENT_MODELS:
+        table_name = "entity"
+    else:
+        table_name = model_name.replace("-", "_")
+    tags = [
+        cache.get_model_tag(table_name),
+        cache.get_model_tag(table_name, instance_id),
+    ]
+    if model_name == "episode" and data.get("project_id", None) is not None:
+        tags.append(
+            cache.get_model_tag("project_episodes", data["project_id"])
+        )
+    return tags
+
+
+def get_current_user_id():
     try:
         from zou.app.services.persons_service import get_current_user_raw
 
         person = get_current_user_raw()
-        person_id = person.id
+        return person.id
     except:
-        person_id = None
+        return None
+
+
+def save_event(event, data, project_id=None):
+    """
+    Store event information in the database.
+    """
+    person_id = get_current_user_id()
 
     if project_id == 'None':
         project_id = None
@@ -102,3 +237,22 @@ def save_event(event, data, project_id=None):
     return ApiEvent.create(
         name=event, data=data, user_id=person_id, project_id=project_id
     )
+
+
+def save_events(event, data_list, project_id=None):
+    """
+    Store information of given events in the database with a single commit.
+    """
+    person_id = get_current_user_id()
+
+    if project_id == 'None':
+        project_id = None
+
+    api_events = [
+        ApiEvent.create_no_commit(
+            name=event, data=data, user_id=person_id, project_id=project_id
+        )
+        for data in data_list
+    ]
+    ApiEvent.commit()
+    return api_events
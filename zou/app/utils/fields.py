@@ -8,6 +8,8 @@ from babel import Locale
 from ipaddress import IPv4Address
 from sqlalchemy_utils.types.choice import Choice
 
+SCALAR_TYPES = (str, int, bool)
+
 
 def serialize_value(value):
     """
@@ -51,6 +53,44 @@ def serialize_value(value):
         return value
 
 
+def serialize_datetime(value):
+    """
+    Fast path of serialize_value for datetime columns.
+    """
+    if isinstance(value, datetime.datetime):
+        return value.replace(microsecond=0).isoformat()
+    return serialize_value(value)
+
+
+def serialize_date(value):
+    """
+    Fast path of serialize_value for date columns.
+    """
+    if type(value) is datetime.date:
+        return value.isoformat()
+    return serialize_value(value)
+
+
+def serialize_uuid(value):
+    """
+    Fast path of serialize_value for UUID columns.
+    """
+    if value is None:
+        return None
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return serialize_value(value)
+
+
+def serialize_scalar(value):
+    """
+    Fast path of serialize_value for string, integer and boolean columns.
+    """
+    if value is None or type(value) in SCALAR_TYPES:
+        return value
+    return serialize_value(value)
+
+
 def serialize_list(list_value):
     """
     Serialize a list of any kind of objects into data structures
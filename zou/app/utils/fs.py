@@ -1,8 +1,13 @@
 import os
 import shutil
+import time
+import uuid
 
 import errno
 
+CACHE_FILE_PREFIX = "cache-"
+PART_FILE_SUFFIX = ".part"
+
 
 def mkdir_p(path):
     try:
@@ -31,19 +36,94 @@ def copyfile(src, dest):
 def get_file_path(
     config, get_local_path, open_file, prefix, instance_id, extension
 ):
+    """
+    Return a local path for given stored file. If the storage is not local,
+    the file is downloaded in the cache folder first (TMP_DIR). Cache files
+    are never removed here, see `evict_cache_files`.
+    """
     if config.FS_BACKEND == "local":
         file_path = get_local_path(prefix, instance_id)
     else:
-        file_path = os.path.join(
-            config.TMP_DIR, "cache-%s-%s.%s" % (prefix, instance_id, extension)
-        )
-        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
-            with open(file_path, "wb") as tmp_file:
-                for chunk in open_file(prefix, instance_id):
-                    tmp_file.write(chunk)
+        file_path = get_cache_file_path(config, prefix, instance_id, extension)
+        if is_cached(file_path):
+            touch(file_path)
+        else:
+            tmp_file_path = "%s.%s%s" % (
+                file_path, uuid.uuid4(), PART_FILE_SUFFIX
+            )
+            try:
+                with open(tmp_file_path, "wb") as tmp_file:
+                    for chunk in open_file(prefix, instance_id):
+                        tmp_file.write(chunk)
+                os.replace(tmp_file_path, file_path)
+            finally:
+                rm_file(tmp_file_path)
     return file_path
 
 
+def get_cache_file_path(config, prefix, instance_id, extension):
+    """
+    Return path of the cache file for given stored file.
+    """
+    return os.path.join(
+        config.TMP_DIR,
+        "%s%s-%s.%s" % (CACHE_FILE_PREFIX, prefix, instance_id, extension),
+    )
+
+
+def is_cached(file_path):
+    """
+    Return True if given cache file is available.
+    """
+    return os.path.exists(file_path) and os.path.getsize(file_path) > 0
+
+
+def touch(file_path):
+    """
+    Set modification date of given file to now. The cache relies on it to
+    know which files were used recently.
+    """
+    try:
+        os.utime(file_path)
+    except OSError:
+        pass
+
+
+def evict_cache_files(folder, max_size, grace_period=3600):
+    """
+    Remove least recently used cache files of given folder until their total
+    size is under max_size (in bytes). Files used during the last
+    grace_period seconds are kept: they may still be read by a running
+    request or build. Nothing is removed if max_size is 0. Return the list
+    of removed files.
+    """
+    removed_files = []
+    if max_size <= 0:
+        return removed_files
+
+    cache_files = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.name.startswith(CACHE_FILE_PREFIX) and \
+               PART_FILE_SUFFIX not in entry.name and \
+               entry.is_file():
+                stat = entry.stat()
+                cache_files.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total_size = sum(size for (_, size, _) in cache_files)
+    min_mtime = time.time() - grace_period
+    for (mtime, size, file_path) in sorted(cache_files):
+        if total_size <= max_size or mtime > min_mtime:
+            break
+        try:
+            os.remove(file_path)
+            total_size -= size
+            removed_files.append(file_path)
+        except OSError:
+            pass
+    return removed_files
+
+
 def save_file(tmp_folder, instance_id, file_to_save):
     """
     Save file in given folder. The file must only be temporary saved via
@@ -3,10 +3,22 @@ import os
 import math
 import subprocess
 
+from fractions import Fraction
 from PIL import Image
 
 from . import fs
 
+# Settings that must be the same in all movies concatenated without being
+# re-encoded.
+STREAM_COPY_FIELDS = [
+    "pix_fmt",
+    "video_profile",
+    "time_base",
+    "audio_profile",
+    "sample_rate",
+    "channels",
+]
+
 
 def save_file(tmp_folder, instance_id, file_to_save):
     """
@@ -127,23 +139,119 @@ def has_soundtrack(file_path):
     return len(audio["streams"]) > 0
 
 
+def get_movie_info(movie_path):
+    """
+    Return codecs, resolution, frame rate and audio settings of given movie
+    (probed once). Audio fields are None if the movie has no soundtrack.
+    """
+    streams = ffmpeg.probe(movie_path)["streams"]
+    video = next(
+        (stream for stream in streams if stream["codec_type"] == "video"), {}
+    )
+    audio = next(
+        (stream for stream in streams if stream["codec_type"] == "audio"), {}
+    )
+    return {
+        "video_codec": video.get("codec_name", None),
+        "width": video.get("width", None),
+        "height": video.get("height", None),
+        "fps": float(Fraction(video.get("r_frame_rate", "0/1"))),
+        "pix_fmt": video.get("pix_fmt", None),
+        "video_profile": video.get("profile", None),
+        "time_base": video.get("time_base", None),
+        "audio_codec": audio.get("codec_name", None),
+        "audio_profile": audio.get("profile", None),
+        "sample_rate": audio.get("sample_rate", None),
+        "channels": audio.get("channels", None),
+    }
+
+
+def can_concat_with_stream_copy(movie_infos, width, height, fps):
+    """
+    Return True if all movies share the same codecs and settings, matching
+    the expected normalized ones. In that case they can be concatenated
+    without being re-encoded. Settings that can't be read are considered
+    different.
+    """
+    first_info = movie_infos[0]
+    if width is None:
+        width = first_info["width"]
+    for field in STREAM_COPY_FIELDS:
+        if first_info.get(field, None) is None:
+            return False
+
+    for movie_info in movie_infos:
+        if (
+            movie_info["video_codec"] != "h264"
+            or movie_info["audio_codec"] != "aac"
+            or movie_info["width"] != width
+            or movie_info["height"] != height
+            or abs(movie_info["fps"] - float(fps)) > 0.01
+            or any(
+                movie_info.get(field, None) != first_info[field]
+                for field in STREAM_COPY_FIELDS
+            )
+        ):
+            return False
+    return True
+
+
+def concat_movies_with_stream_copy(tmp_file_paths, movie_file_path):
+    """
+    Concatenate given movies with the concat demuxer. Streams are copied,
+    nothing is re-encoded.
+    """
+    list_file_path = movie_file_path + ".txt"
+    with open(list_file_path, "w") as list_file:
+        for (tmp_file_path, _) in tmp_file_paths:
+            file_path = os.path.abspath(tmp_file_path)
+            list_file.write("file '%s'\n" % file_path.replace("'", "'\\''"))
+
+    try:
+        ffmpeg.input(list_file_path, format="concat", safe=0).output(
+            movie_file_path, c="copy", movflags="+faststart"
+        ).overwrite_output().run(quiet=True)
+    except ffmpeg.Error as e:
+        return {"success": False, "message": str(e.stderr)}
+    finally:
+        fs.rm_file(list_file_path)
+    return {"success": True}
+
+
 def build_playlist_movie(
     tmp_file_paths, movie_file_path, width=None, height=1080, fps="24.00"
 ):
     """
-    Build a single movie file from a playlist.
+    Build a single movie file from a playlist. When all movies are normalized
+    the same way, they are concatenated without re-encoding. Else they are
+    rescaled and re-encoded. Given movie files are not modified.
     """
     in_files = []
     if len(tmp_file_paths) > 0:
-        (first_movie_file_path, _) = tmp_file_paths[0]
+        movie_infos = [
+            get_movie_info(tmp_file_path)
+            for (tmp_file_path, _) in tmp_file_paths
+        ]
+        if can_concat_with_stream_copy(movie_infos, width, height, fps):
+            result = concat_movies_with_stream_copy(
+                tmp_file_paths, movie_file_path
+            )
+            if result["success"]:
+                return result
+
         if width is None:
-            (width, height) = get_movie_size(first_movie_file_path)
+            width = movie_infos[0]["width"]
+            height = movie_infos[0]["height"]
 
-        for tmp_file_path, file_name in tmp_file_paths:
-            if not has_soundtrack(tmp_file_path):
-                add_empty_soundtrack(tmp_file_path)
+        soundtrack_file_paths = []
+        for index, (tmp_file_path, file_name) in enumerate(tmp_file_paths):
+            if movie_infos[index]["audio_codec"] is None:
+                soundtrack_file_path = "%s.%s.mp4" % (movie_file_path, index)
+                fs.copyfile(tmp_file_path, soundtrack_file_path)
+                add_empty_soundtrack(soundtrack_file_path)
+                soundtrack_file_paths.append(soundtrack_file_path)
+                tmp_file_path = soundtrack_file_path
 
-        for tmp_file_path, file_name in tmp_file_paths:
             in_file = ffmpeg.input(tmp_file_path)
             in_files.append(
                 in_file["v"]
@@ -163,4 +271,7 @@ def build_playlist_movie(
         except Exception as e:
             print(e)
             return {"success": False, "message": str(e)}
+        finally:
+            for soundtrack_file_path in soundtrack_file_paths:
+                fs.rm_file(soundtrack_file_path)
     return {"success": True}
@@ -1,4 +1,5 @@
 from functools import wraps
+from flask import g, has_app_context
 from flask_principal import RoleNeed, Permission
 from werkzeug.exceptions import Forbidden
 
@@ -12,6 +13,31 @@ class PermissionDenied(Forbidden):
     pass
 
 
+def get_permission_context():
+    """
+    Return the permission context stored for the current request, None if it
+    was not built yet.
+    """
+    return g.get("permission_context", None)
+
+
+def set_permission_context(permission_context):
+    """
+    Store given permission context for the rest of the current request.
+    """
+    g.permission_context = permission_context
+    return permission_context
+
+
+def clear_permission_context():
+    """
+    Drop the permission context of the current request. It will be rebuilt
+    on next access check.
+    """
+    if has_app_context():
+        g.pop("permission_context", None)
+
+
 def has_manager_permissions():
     """
     Return True if user is admin or manager.
@@ -1,7 +1,14 @@
+import base64
+import datetime
+import json
 import math
 
-from zou.app import app
+from sqlalchemy import bindparam, text, tuple_
+from sqlalchemy.dialects import postgresql
+
+from zou.app import app, db
 from zou.app.utils import fields
+from zou.app.services.exception import WrongParameterException
 
 
 def get_query_criterions_from_request(request):
@@ -11,7 +18,7 @@ def get_query_criterions_from_request(request):
     """
     criterions = {}
     for key, value in request.args.items():
-        if key not in ["page"]:
+        if key not in ["page", "stream", "cursor", "approximate_total"]:
             criterions[key] = value
     return criterions
 
@@ -72,3 +79,97 @@ def get_paginated_results(query, page, relations=False):
                 "page": page,
             }
         return result
+
+
+def encode_cursor(updated_at, instance_id):
+    """
+    Build an opaque cursor pointing to given position in a result list
+    ordered by update date and id.
+    """
+    position = [updated_at.isoformat(), str(instance_id)]
+    return base64.urlsafe_b64encode(
+        json.dumps(position).encode("utf-8")
+    ).decode("utf-8")
+
+
+def decode_cursor(cursor):
+    """
+    Return the update date and the id stored in given cursor.
+    """
+    try:
+        (updated_at, instance_id) = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("utf-8")).decode("utf-8")
+        )
+        date_format = "%Y-%m-%dT%H:%M:%S"
+        if "." in updated_at:
+            date_format += ".%f"
+        updated_at = datetime.datetime.strptime(updated_at, date_format)
+    except (TypeError, ValueError):
+        raise WrongParameterException("Malformed cursor.")
+    if not fields.is_valid_id(instance_id):
+        raise WrongParameterException("Malformed cursor.")
+    return (updated_at, instance_id)
+
+
+def get_approximate_count(query):
+    """
+    Return the number of rows the database planner expects for given query.
+    It is much cheaper than a COUNT(*) on big tables.
+    """
+    statement = query.statement.compile(
+        dialect=postgresql.dialect(paramstyle="named")
+    )
+    explain = text("EXPLAIN (FORMAT JSON) %s" % statement).bindparams(
+        *[
+            bindparam(name, statement.params[name], type_=bind.type)
+            for (bind, name) in statement.bind_names.items()
+        ]
+    )
+    plan = db.session.execute(explain).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+def get_cursor_page(query, model, cursor=None):
+    """
+    Apply keyset pagination to the query object: results are ordered by
+    update date and id, and the page starts right after the position stored
+    in the cursor. Unlike offset pagination, the cost of a page doesn't
+    depend on its depth. It returns the page entries and the cursor of the
+    next page (None when there is no more result).
+    """
+    limit = app.config["NB_RECORDS_PER_PAGE"]
+    query = query.order_by(None).order_by(model.updated_at, model.id)
+    if cursor:
+        (updated_at, instance_id) = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(model.updated_at, model.id) > (updated_at, instance_id)
+        )
+
+    entries = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        last_entry = entries[-1]
+        next_cursor = encode_cursor(last_entry.updated_at, last_entry.id)
+    return (entries, next_cursor)
+
+
+def get_cursor_paginated_results(
+    query, model, cursor=None, relations=False, approximate_total=False
+):
+    """
+    Return the page of results starting after given cursor (see
+    get_cursor_page). If approximate total flag is set, an estimation of the
+    total number of results is added.
+    """
+    (entries, next_cursor) = get_cursor_page(query, model, cursor)
+    result = {
+        "data": fields.serialize_models(entries, relations=relations),
+        "limit": app.config["NB_RECORDS_PER_PAGE"],
+        "next_cursor": next_cursor,
+    }
+    if approximate_total:
+        result["total"] = get_approximate_count(query)
+    return result
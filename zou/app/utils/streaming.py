@@ -0,0 +1,91 @@
+"""
+Helpers to stream large JSON lists to the client instead of building the whole
+result in memory before serializing it.
+"""
+import itertools
+import json
+
+from flask import Response, stream_with_context
+
+STREAM_CHUNK_SIZE = 500
+
+
+def iter_chunks(iterable, size=STREAM_CHUNK_SIZE):
+    """
+    Split given iterable into lists of at most `size` elements.
+    """
+    chunk = []
+    for element in iterable:
+        chunk.append(element)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if len(chunk) > 0:
+        yield chunk
+
+
+def iter_query_chunks(query, size=STREAM_CHUNK_SIZE):
+    """
+    Fetch query results through a server-side cursor and return them by
+    chunks of `size` elements.
+    """
+    return iter_chunks(query.yield_per(size), size)
+
+
+def iter_json_array(elements, size=STREAM_CHUNK_SIZE):
+    """
+    Encode given elements as a JSON array, piece by piece. Elements must be
+    already serialized. They are written by batch of `size` elements to avoid
+    too many small writes.
+    """
+    yield "["
+    is_first = True
+    for chunk in iter_chunks(elements, size):
+        encoded_chunk = ",".join(
+            json.dumps(element, ensure_ascii=False)
+            for element in chunk
+        )
+        if is_first:
+            is_first = False
+            yield encoded_chunk
+        else:
+            yield "," + encoded_chunk
+    yield "]"
+
+
+def prefetch_first(elements):
+    """
+    Generate the first element of given iterable right away and return an
+    iterator over all elements. Errors raised while starting the generation
+    (like a malformed filter in a query) are raised by this call instead of
+    during the iteration.
+    """
+    elements = iter(elements)
+    try:
+        first_element = next(elements)
+    except StopIteration:
+        return iter([])
+    return itertools.chain([first_element], elements)
+
+
+def build_json_stream_response(elements):
+    """
+    Build a Flask response that sends given elements as a JSON array while
+    they are generated. The request context is kept alive until the end of
+    the stream, so elements can still be loaded from the database.
+
+    The first element is generated before the response is built. This way,
+    errors occurring when running the query are raised before the headers
+    are sent and can still be turned into a proper error response.
+    """
+    return Response(
+        stream_with_context(iter_json_array(prefetch_first(elements))),
+        mimetype="application/json",
+    )
+
+
+def is_stream_requested(request):
+    """
+    Return True if the client asked for a streamed response.
+    """
+    return request.args.get("stream", "false") == "true"
@@ -1,5 +1,4 @@
 import os
-import shutil
 import math
 
 from zou.app.utils import fs
@@ -11,6 +10,9 @@ RECTANGLE_SIZE = 150, 100
 SQUARE_SIZE = 100, 100
 PREVIEW_SIZE = 1200, 0
 BIG_SQUARE_SIZE = 400, 400
+# Images are first reduced with a fast integer downscale to a size at most
+# REDUCING_GAP times bigger than the target size, then resampled.
+REDUCING_GAP = 3.0
 
 
 def save_file(tmp_folder, instance_id, file_to_save):
@@ -69,7 +71,18 @@ def turn_into_thumbnail(file_path, size=None):
     Turn given picture into a smaller version.
     """
     im = Image.open(file_path)
+    im = resize_image(im, size)
+    im.save(file_path, "PNG")
+    return file_path
+
 
+def resize_image(im, size=None):
+    """
+    Return a resized copy of given image. If given height is 0, it is computed
+    from the width to keep the image ratio. Else the image is cropped to avoid
+    deformation. Large reductions start with a fast integer downscale before
+    applying the LANCZOS filter on the reduced image.
+    """
     if size is not None:
         (width, height) = size
 
@@ -80,11 +93,10 @@ def turn_into_thumbnail(file_path, size=None):
     else:
         size = im.size
 
-    im = im.resize(size, Image.LANCZOS)
+    im = im.resize(size, Image.LANCZOS, reducing_gap=REDUCING_GAP)
     if im.mode == "CMYK":
         im = im.convert("RGB")
-    im.save(file_path, "PNG")
-    return file_path
+    return im
 
 
 def prepare_image_for_thumbnail(im, size):
@@ -124,23 +136,34 @@ def generate_preview_variants(original_path, instance_id):
     1. Rectangle thumbnail
     2. Square thumbnail
     3. Big rectangle thumbnail
+
+    The original picture is decoded only once. Small thumbnails are derived
+    from the big rectangle one when it is smaller than the original.
     """
     file_name = get_file_name(instance_id)
+    folder_path = os.path.dirname(original_path)
+
+    im = Image.open(original_path)
+    im.load()
+    preview_im = resize_image(im, PREVIEW_SIZE)
+    if preview_im.size[0] < im.size[0]:
+        source_im = preview_im
+    else:
+        source_im = im
+
     variants = [
-        ("thumbnails", RECTANGLE_SIZE),
-        ("thumbnails-square", SQUARE_SIZE),
-        ("previews", PREVIEW_SIZE),
+        ("thumbnails", resize_image(source_im, RECTANGLE_SIZE)),
+        ("thumbnails-square", resize_image(source_im, SQUARE_SIZE)),
+        ("previews", preview_im),
     ]
+    im.close()
 
     result = []
-    for picture_data in variants:
-        (picture_type, size) = picture_data
-        folder_path = os.path.dirname(original_path)
+    for (picture_type, variant_im) in variants:
         picture_path = os.path.join(
             folder_path, "%s-%s" % (picture_type, file_name)
         )
-        shutil.copyfile(original_path, picture_path)
-        turn_into_thumbnail(picture_path, size)
+        variant_im.save(picture_path, "PNG")
         result.append((picture_type, picture_path))
     return result
 
@@ -0,0 +1,154 @@
+"""
+Helpers to run a large number of file transfers (downloads or uploads) with
+a pool of workers. Failed transfers are retried with an exponential backoff,
+files already transferred are skipped and progress is logged regularly.
+"""
+import collections
+import itertools
+import logging
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+TRANSFER_WORKERS = 8
+TRANSFER_RETRIES = 3
+TRANSFER_BACKOFF = 1.0
+PROGRESS_INTERVAL = 30
+
+logger = logging.getLogger(__name__)
+
+# A transfer to run. `run` performs it and returns the number of transferred
+# bytes. `is_done` returns True if the file is already at destination (same
+# size), in which case the transfer is skipped. It can be None.
+Transfer = collections.namedtuple("Transfer", ["name", "run", "is_done"])
+
+
+class TransferProgress(object):
+    """
+    Thread safe counters about running transfers.
+    """
+
+    def __init__(self, total=None):
+        self.lock = threading.Lock()
+        self.total = total
+        self.transferred = 0
+        self.skipped = 0
+        self.failed = 0
+        self.size = 0
+        self.start_time = time.time()
+        self.last_log_time = self.start_time
+
+    def add(self, status, size=0):
+        with self.lock:
+            setattr(self, status, getattr(self, status) + 1)
+            self.size += size
+
+    def get_throughput(self):
+        """
+        Return the average throughput in bytes per second.
+        """
+        duration = time.time() - self.start_time
+        if duration > 0:
+            return self.size / duration
+        else:
+            return 0
+
+    def serialize(self):
+        return {
+            "total": self.total,
+            "transferred": self.transferred,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "size": self.size,
+            "throughput": self.get_throughput(),
+        }
+
+    def log(self, force=False):
+        now = time.time()
+        if force or now - self.last_log_time >= PROGRESS_INTERVAL:
+            self.last_log_time = now
+            processed = self.transferred + self.skipped + self.failed
+            logger.info(
+                "%s/%s files processed (%s transferred, %s skipped, "
+                "%s failed), %.2f MB/s"
+                % (
+                    processed,
+                    self.total if self.total is not None else "?",
+                    self.transferred,
+                    self.skipped,
+                    self.failed,
+                    self.get_throughput() / 1024 / 1024,
+                )
+            )
+
+
+def run_transfer(
+    transfer,
+    progress,
+    retries=TRANSFER_RETRIES,
+    backoff=TRANSFER_BACKOFF
+):
+    """
+    Run given transfer unless it's already done. It is retried after
+    `backoff`, then twice this delay, and so on, until it succeeds or
+    `retries` attempts failed.
+    """
+    try:
+        if transfer.is_done is not None and transfer.is_done():
+            progress.add("skipped")
+            return "skipped"
+    except Exception:
+        logger.error("Check of %s failed" % transfer.name, exc_info=1)
+
+    for attempt in range(retries + 1):
+        try:
+            size = transfer.run() or 0
+            progress.add("transferred", size)
+            return "transferred"
+        except Exception:
+            if attempt < retries:
+                delay = backoff * (2 ** attempt)
+                logger.warning(
+                    "Transfer of %s failed, retry in %ss"
+                    % (transfer.name, delay)
+                )
+                time.sleep(delay)
+            else:
+                logger.error(
+                    "Transfer of %s failed" % transfer.name, exc_info=1
+                )
+    progress.add("failed")
+    return "failed"
+
+
+def run_transfers(
+    transfers,
+    workers=TRANSFER_WORKERS,
+    retries=TRANSFER_RETRIES,
+    backoff=TRANSFER_BACKOFF,
+    total=None,
+):
+    """
+    Run given transfers with a pool of workers. Transfers are consumed
+    lazily, at most a few times the number of workers are queued at the same
+    time. Return the progress counters once everything is done.
+    """
+    progress = TransferProgress(total)
+    transfers = iter(transfers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = collections.deque(
+            executor.submit(run_transfer, transfer, progress, retries, backoff)
+            for transfer in itertools.islice(transfers, workers * 2)
+        )
+        while len(futures) > 0:
+            futures.popleft().result()
+            for transfer in itertools.islice(transfers, 1):
+                futures.append(
+                    executor.submit(
+                        run_transfer, transfer, progress, retries, backoff
+                    )
+                )
+            progress.log()
+    progress.log(force=True)
+    return progress.serialize()
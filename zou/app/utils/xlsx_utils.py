@@ -0,0 +1,108 @@
+"""
+Minimal XLSX writer that generates the spreadsheet while rows are read. The
+archive is written to a buffer which is emptied each time a chunk of rows is
+encoded, so the whole file is never kept in memory.
+"""
+import numbers
+import zipfile
+
+from xml.sax.saxutils import escape
+
+from zou.app.utils import streaming
+
+XLSX_MIMETYPE = (
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+)
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+</Types>"""
+
+ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+
+WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="%s" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+
+WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+</Relationships>"""
+
+SHEET_START = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<sheetData>"""
+
+SHEET_END = """</sheetData></worksheet>"""
+
+
+class StreamBuffer(object):
+    """
+    Write-only file object that keeps written data until it is read. It's not
+    seekable, which makes the zip module write entries with data descriptors.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def read_all(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def build_cell(value):
+    """
+    Encode given value as a spreadsheet cell. Numbers are kept as numbers,
+    other values are written as strings.
+    """
+    if value is None:
+        return "<c/>"
+    elif isinstance(value, numbers.Number) and not isinstance(value, bool):
+        return "<c><v>%s</v></c>" % value
+    else:
+        return '<c t="inlineStr"><is><t xml:space="preserve">%s</t></is></c>' \
+            % escape(str(value))
+
+
+def build_row(row):
+    return "<row>%s</row>" % "".join(build_cell(value) for value in row)
+
+
+def iter_xlsx_chunks(rows, sheet_name="export"):
+    """
+    Generate the bytes of a spreadsheet containing given rows. Rows are
+    encoded by chunks.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES)
+        archive.writestr("_rels/.rels", ROOT_RELS)
+        archive.writestr("xl/workbook.xml", WORKBOOK % escape(sheet_name))
+        archive.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS)
+        with archive.open(
+            "xl/worksheets/sheet1.xml", "w", force_zip64=True
+        ) as sheet:
+            sheet.write(SHEET_START.encode("utf-8"))
+            for chunk in streaming.iter_chunks(rows):
+                sheet.write(
+                    "".join(build_row(row) for row in chunk).encode("utf-8")
+                )
+                yield buffer.read_all()
+            sheet.write(SHEET_END.encode("utf-8"))
+    yield buffer.read_all()
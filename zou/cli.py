@@ -175,17 +175,26 @@ def sync_with_ldap_server():
 @click.option("--target", default="http://localhost:5000")
 @click.option("--project")
 @click.option("--with-events")
-def sync_full(target, project=None, with_events=False):
+@click.option("--workers", default=4)
+@click.option("--reset", is_flag=True)
+def sync_full(target, project=None, with_events=False, workers=4, reset=False):
     """
     Retrieve all data from target instance. It expects that credentials to
     connect to target instance are given through SYNC_LOGIN and SYNC_PASSWORD
-    environment variables.
+    environment variables. An interrupted sync is resumed where it stopped,
+    use --reset to start from scratch.
     """
     print("Start syncing.")
     login = os.getenv("SYNC_LOGIN")
     password = os.getenv("SYNC_PASSWORD")
     commands.import_data_from_another_instance(
-        target, login, password, project=project, with_events=with_events
+        target,
+        login,
+        password,
+        project=project,
+        with_events=with_events,
+        workers=workers,
+        reset=reset,
     )
     print("Syncing ended.")
 
@@ -193,7 +202,8 @@ def sync_full(target, project=None, with_events=False):
 @cli.command()
 @click.option("--target", default="http://localhost:5000")
 @click.option("--project")
-def sync_full_files(target, project=None):
+@click.option("--workers", default=8)
+def sync_full_files(target, project=None, workers=8):
     """
     Retrieve all files from target instance. It expects that credentials to
     connect to target instance are given through SYNC_LOGIN and SYNC_PASSWORD
@@ -202,7 +212,9 @@ def sync_full_files(target, project=None):
     print("Start syncing.")
     login = os.getenv("SYNC_LOGIN")
     password = os.getenv("SYNC_PASSWORD")
-    commands.import_files_from_another_instance(target, login, password, project=project)
+    commands.import_files_from_another_instance(
+        target, login, password, project=project, workers=workers
+    )
     print("Syncing ended.")
 
 
@@ -275,12 +287,13 @@ def sync_last_files(target, minutes, page_size):
 
 
 @cli.command()
-def download_storage_files():
+@click.option("--workers", default=8)
+def download_storage_files(workers):
     """
     Download all files from a Swift object storage and store them in a local
     storage.
     """
-    commands.download_file_from_storage()
+    commands.download_file_from_storage(workers=workers)
 
 
 @cli.command()
@@ -294,11 +307,12 @@ def dump_database():
 
 @cli.command()
 @click.option("--days", default=None)
-def upload_files_to_cloud_storage(days):
+@click.option("--workers", default=8)
+def upload_files_to_cloud_storage(days, workers):
     """
     Upload all files related to previews to configured object storage.
     """
-    commands.upload_files_to_cloud_storage(days)
+    commands.upload_files_to_cloud_storage(days, workers=workers)
 
 
 @cli.command()
@@ -311,6 +325,51 @@ def clean_tasks_data(projectid):
         commands.reset_tasks_data(projectid)
 
 
+@cli.command()
+@click.option("--projectid", default=None)
+def rebuild_project_stats(projectid):
+    """
+    Rebuild the task counts by episode, task type and task status used by
+    the project statistics (for all projects if no project id is given).
+    """
+    commands.rebuild_project_stats(projectid)
+
+
+@cli.command()
+@click.option(
+    "--group",
+    type=click.Choice(["event-log", "event-handlers"]),
+    default="event-log",
+)
+@click.option("--consumer", default=None)
+def consume_events(group, consumer=None):
+    """
+    Consume the events of the event bus (enabled with EVENT_BUS_ENABLED):
+    store them in the event log or send them to the event handlers.
+    """
+    commands.consume_events(group, consumer=consumer)
+
+
+@cli.command()
+def evict_cache():
+    """
+    Remove least recently used files downloaded from the object storage
+    until the cache folder size is under FS_CACHE_MAX_SIZE. Aimed at being
+    run periodically (cron).
+    """
+    commands.evict_cache_files()
+
+
+@cli.command()
+def create_event_partitions():
+    """
+    Create the monthly partitions of the event table for the coming months
+    and move the events stored in the default partition to their own
+    partition. Aimed at being run periodically (cron).
+    """
+    commands.create_event_partitions()
+
+
 @cli.command()
 @click.option("--days", default=90)
 def remove_old_data(days):
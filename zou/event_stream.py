@@ -2,7 +2,7 @@ from flask import Flask, jsonify
 from flask_jwt_extended import verify_jwt_in_request, JWTManager
 from flask_socketio import SocketIO, disconnect
 from zou.app import config
-from zou.app.stores import auth_tokens_store
+from zou.app.stores import auth_tokens_store, event_bus_store
 
 from gevent import monkey
 
@@ -44,9 +44,29 @@ def create_app(redis_url):
         app.logger.error(error)
 
     socketio.init_app(app, message_queue=redis_url, async_mode="gevent")
+
+    if event_bus_store.init() is not None:
+        socketio.start_background_task(consume_events, socketio)
     return (app, socketio)
 
 
+def consume_events(socketio):
+    """
+    Send to websocket clients the events of the event bus. Events are
+    acknowledged once sent, so events emitted while the event stream was
+    down are sent when it restarts.
+    """
+    def send_events(events):
+        for event in events:
+            socketio.emit(event["name"], event["data"], namespace="/events")
+
+    event_bus_store.consume(
+        event_bus_store.EVENT_STREAM_GROUP,
+        event_bus_store.get_consumer_name(),
+        send_events,
+    )
+
+
 redis_url = get_redis_url()
 (app, socketio) = create_app(redis_url)
 jwt = JWTManager(app)  # JWT auth tokens
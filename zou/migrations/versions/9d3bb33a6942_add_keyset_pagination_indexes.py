@@ -0,0 +1,33 @@
+"""add keyset pagination indexes
+
+Revision ID: 9d3bb33a6942
+Revises: 346250b5304c
+Create Date: 2020-11-16 10:12:31.207418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3bb33a6942'
+down_revision = '346250b5304c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_task_updated_at_id', 'task', ['updated_at', 'id'], unique=False)
+    op.create_index('ix_comment_updated_at_id', 'comment', ['updated_at', 'id'], unique=False)
+    op.create_index('ix_preview_file_updated_at_id', 'preview_file', ['updated_at', 'id'], unique=False)
+    op.create_index('ix_notification_updated_at_id', 'notification', ['updated_at', 'id'], unique=False)
+    op.create_index('ix_api_event_updated_at_id', 'api_event', ['updated_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_api_event_updated_at_id', table_name='api_event')
+    op.drop_index('ix_notification_updated_at_id', table_name='notification')
+    op.drop_index('ix_preview_file_updated_at_id', table_name='preview_file')
+    op.drop_index('ix_comment_updated_at_id', table_name='comment')
+    op.drop_index('ix_task_updated_at_id', table_name='task')
@@ -0,0 +1,32 @@
+"""add preview file status
+
+Revision ID: a252a094e977
+Revises: 9d3bb33a6942
+Create Date: 2020-11-18 15:42:08.326572
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+
+
+# revision identifiers, used by Alembic.
+revision = 'a252a094e977'
+down_revision = '9d3bb33a6942'
+branch_labels = None
+depends_on = None
+
+STATUSES = [
+    ('processing', 'Processing'),
+    ('ready', 'Ready'),
+    ('broken', 'Broken'),
+]
+
+
+def upgrade():
+    op.add_column('preview_file', sa.Column('status', sqlalchemy_utils.types.choice.ChoiceType(STATUSES), nullable=True))
+    op.execute("UPDATE preview_file SET status = 'ready'")
+
+
+def downgrade():
+    op.drop_column('preview_file', 'status')
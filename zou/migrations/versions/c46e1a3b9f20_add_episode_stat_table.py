@@ -0,0 +1,82 @@
+"""add episode stat table
+
+Revision ID: c46e1a3b9f20
+Revises: a252a094e977
+Create Date: 2020-11-24 10:12:37.514862
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+import datetime
+import uuid
+
+
+# revision identifiers, used by Alembic.
+revision = 'c46e1a3b9f20'
+down_revision = 'a252a094e977'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    episode_stat = op.create_table('episode_stat',
+    sa.Column('id', sqlalchemy_utils.types.uuid.UUIDType(binary=False), default=uuid.uuid4, nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('project_id', sqlalchemy_utils.types.uuid.UUIDType(binary=False), nullable=False),
+    sa.Column('episode_id', sqlalchemy_utils.types.uuid.UUIDType(binary=False), nullable=False),
+    sa.Column('task_type_id', sqlalchemy_utils.types.uuid.UUIDType(binary=False), nullable=False),
+    sa.Column('task_status_id', sqlalchemy_utils.types.uuid.UUIDType(binary=False), nullable=False),
+    sa.Column('retake_count', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('frames', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('project_id', 'episode_id', 'task_type_id', 'task_status_id', 'retake_count', name='episode_stat_uc')
+    )
+    op.create_index(op.f('ix_episode_stat_episode_id'), 'episode_stat', ['episode_id'], unique=False)
+    op.create_index(op.f('ix_episode_stat_project_id'), 'episode_stat', ['project_id'], unique=False)
+
+    rows = op.get_bind().execute(sa.text("""
+        SELECT task.project_id, episode.id, task.task_type_id,
+               task.task_status_id, COALESCE(task.retake_count, 0),
+               COUNT(task.id), COALESCE(SUM(entity.nb_frames), 0)
+        FROM task
+        JOIN entity ON entity.id = task.entity_id
+        JOIN entity AS sequence ON sequence.id = entity.parent_id
+        JOIN entity AS episode ON episode.id = sequence.parent_id
+        GROUP BY task.project_id, episode.id, task.task_type_id,
+                 task.task_status_id, COALESCE(task.retake_count, 0)
+    """))
+    now = datetime.datetime.utcnow()
+    stats = [
+        {
+            'id': uuid.uuid4(),
+            'created_at': now,
+            'updated_at': now,
+            'project_id': project_id,
+            'episode_id': episode_id,
+            'task_type_id': task_type_id,
+            'task_status_id': task_status_id,
+            'retake_count': retake_count,
+            'count': count,
+            'frames': frames,
+        }
+        for (
+            project_id,
+            episode_id,
+            task_type_id,
+            task_status_id,
+            retake_count,
+            count,
+            frames,
+        ) in rows
+    ]
+    if len(stats) > 0:
+        op.bulk_insert(episode_stat, stats)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_episode_stat_project_id'), table_name='episode_stat')
+    op.drop_index(op.f('ix_episode_stat_episode_id'), table_name='episode_stat')
+    op.drop_table('episode_stat')
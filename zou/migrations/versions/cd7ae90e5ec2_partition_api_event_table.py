@@ -0,0 +1,124 @@
+"""partition api event table
+
+Revision ID: cd7ae90e5ec2
+Revises: 8e2c1b7f3d45
+Create Date: 2020-12-03 10:12:45.204317
+
+"""
+from alembic import op
+import datetime
+
+
+# revision identifiers, used by Alembic.
+revision = 'cd7ae90e5ec2'
+down_revision = '8e2c1b7f3d45'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+COLUMNS = "id, created_at, updated_at, name, user_id, project_id, data"
+
+
+def get_month_start(date, months=0):
+    month_index = date.year * 12 + date.month - 1 + months
+    return datetime.datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def create_event_indexes():
+    op.create_index('ix_api_event_user_id', 'api_event', ['user_id'], unique=False)
+    op.create_index('ix_api_event_updated_at_id', 'api_event', ['updated_at', 'id'], unique=False)
+    op.create_index('ix_api_event_created_at_id', 'api_event', ['created_at', 'id'], unique=False)
+    op.create_index('ix_api_event_project_id_created_at', 'api_event', ['project_id', 'created_at'], unique=False)
+    op.create_index('ix_api_event_name_created_at', 'api_event', ['name', 'created_at'], unique=False)
+
+
+def upgrade():
+    # The event table is rebuilt as a table partitioned by month on the
+    # creation date. Old months are then removed by dropping partitions.
+    op.drop_index('ix_api_event_updated_at_id', table_name='api_event')
+    op.drop_index('ix_api_event_project_id', table_name='api_event')
+    op.drop_index('ix_api_event_user_id', table_name='api_event')
+    op.drop_index('ix_api_event_name', table_name='api_event')
+    op.execute("ALTER TABLE api_event RENAME TO api_event_old")
+    op.execute(
+        "ALTER TABLE api_event_old "
+        "RENAME CONSTRAINT api_event_pkey TO api_event_old_pkey"
+    )
+    op.execute(
+        "UPDATE api_event_old SET created_at = COALESCE(updated_at, now()) "
+        "WHERE created_at IS NULL"
+    )
+
+    op.execute("""
+        CREATE TABLE api_event (
+            id uuid NOT NULL,
+            created_at timestamp without time zone NOT NULL,
+            updated_at timestamp without time zone,
+            name varchar(80) NOT NULL,
+            user_id uuid REFERENCES person (id),
+            project_id uuid REFERENCES project (id),
+            data jsonb,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE api_event_default PARTITION OF api_event DEFAULT")
+
+    now = datetime.datetime.utcnow()
+    first_date = op.get_bind().execute(
+        "SELECT min(created_at) FROM api_event_old"
+    ).scalar() or now
+    start = get_month_start(first_date)
+    last_start = get_month_start(now, MONTHS_AHEAD)
+    while start <= last_start:
+        end = get_month_start(start, 1)
+        op.execute(
+            "CREATE TABLE api_event_%s PARTITION OF api_event "
+            "FOR VALUES FROM ('%s') TO ('%s')" % (
+                start.strftime("%Y_%m"), start.isoformat(), end.isoformat()
+            )
+        )
+        start = end
+
+    op.execute(
+        "INSERT INTO api_event (%s) SELECT %s FROM api_event_old"
+        % (COLUMNS, COLUMNS)
+    )
+    op.drop_table('api_event_old')
+    create_event_indexes()
+
+
+def downgrade():
+    op.execute("ALTER TABLE api_event RENAME TO api_event_partitioned")
+    op.execute(
+        "ALTER TABLE api_event_partitioned "
+        "RENAME CONSTRAINT api_event_pkey TO api_event_partitioned_pkey"
+    )
+    for index_name in [
+        'ix_api_event_user_id',
+        'ix_api_event_updated_at_id',
+        'ix_api_event_created_at_id',
+        'ix_api_event_project_id_created_at',
+        'ix_api_event_name_created_at',
+    ]:
+        op.drop_index(index_name, table_name='api_event_partitioned')
+    op.execute("""
+        CREATE TABLE api_event (
+            id uuid NOT NULL,
+            created_at timestamp without time zone,
+            updated_at timestamp without time zone,
+            name varchar(80) NOT NULL,
+            user_id uuid REFERENCES person (id),
+            project_id uuid REFERENCES project (id),
+            data jsonb,
+            PRIMARY KEY (id)
+        )
+    """)
+    op.execute(
+        "INSERT INTO api_event (%s) SELECT %s FROM api_event_partitioned"
+        % (COLUMNS, COLUMNS)
+    )
+    op.drop_table('api_event_partitioned')
+    op.create_index('ix_api_event_name', 'api_event', ['name'], unique=False)
+    op.create_index('ix_api_event_user_id', 'api_event', ['user_id'], unique=False)
+    op.create_index('ix_api_event_project_id', 'api_event', ['project_id'], unique=False)
+    op.create_index('ix_api_event_updated_at_id', 'api_event', ['updated_at', 'id'], unique=False)
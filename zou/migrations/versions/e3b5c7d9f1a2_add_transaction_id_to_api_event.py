@@ -0,0 +1,35 @@
+"""add transaction id to api event
+
+Revision ID: e3b5c7d9f1a2
+Revises: cd7ae90e5ec2
+Create Date: 2020-12-10 14:32:08.511276
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b5c7d9f1a2'
+down_revision = 'cd7ae90e5ec2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing events get 0, so they are read first, by creation date. The
+    # constant default doesn't rewrite the table. New events get the id of
+    # the transaction that stores them.
+    op.execute(
+        "ALTER TABLE api_event "
+        "ADD COLUMN transaction_id bigint NOT NULL DEFAULT 0"
+    )
+    op.execute(
+        "ALTER TABLE api_event "
+        "ALTER COLUMN transaction_id SET DEFAULT txid_current()"
+    )
+    op.create_index('ix_api_event_transaction_id_created_at_id', 'api_event', ['transaction_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_api_event_transaction_id_created_at_id', table_name='api_event')
+    op.drop_column('api_event', 'transaction_id')
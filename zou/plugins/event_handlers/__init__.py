@@ -1,6 +1,13 @@
 # Not used - it exists only for an example
 from zou.app.events import celery
 from zou.app.services.playlists_service import build_playlist_job
+from zou.app.services.comments_service import (
+    manage_comment_subscriptions_job,
+)
+from zou.app.services.deletion_service import remove_project_job
+from zou.app.services.preview_files_service import (
+    prepare_and_store_movie_job,
+)
 from zou.app.utils import emails, chats
 
 # Celery tasks
@@ -10,10 +17,22 @@ def build_playlist_task(playlist, email):
     build_playlist_job(playlist, email)
 
 @celery.task
+def prepare_and_store_movie_task(preview_file_id, uploaded_movie_path):
+    prepare_and_store_movie_job(preview_file_id, uploaded_movie_path)
+
+@celery.task
+def remove_project_task(project_id):
+    remove_project_job(project_id)
+
+@celery.task(autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def manage_comment_subscriptions_task(task_id, comment_id, status_changed):
+    manage_comment_subscriptions_job(task_id, comment_id, status_changed)
+
+@celery.task(autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
 def send_email_task(subject, message, email):
     emails.send_email(subject, message, email)
 
-@celery.task
+@celery.task(autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
 def send_to_slack_task(token, user, message):
     chats.send_to_slack(token, user, message)
 